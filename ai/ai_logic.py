@@ -1,20 +1,30 @@
 # ai/ai_logic.py
 import io
+import json
 import random
+from urllib.parse import quote
 
-import google.generativeai as genai
-import requests
 from PIL import Image
 
+from ai.image_pipeline import get_image_pipeline
+from ai.image_submission import get_image_submitter
+from ai.resilience import get_resilience, remaining_time
+from utils.metrics import get_metrics
 
-def generate_ai_text(model):
+
+def generate_ai_text(model, scheduler=None):
     """
     Generates a unique text prompt using Google's Gemini model.
+    Requests go through the scheduler (default: the process-wide one) to respect rate limits,
+    and are retried, hedged and bounded by the phase deadline (see ai.resilience).
     """
     try:
         prompt = "We're playing Gartic Phone. Come up with something to draw. Give a short answer, starting with A/An. Use your creativity."
         # Initialize the Gemini model (assuming 'text-generation' is the correct model name)
-        response = model.generate_content([prompt], generation_config={"temperature":1.5})
+        response = get_resilience().call(
+            "gemini", "generate_content", model.generate_content,
+            args=([prompt],), kwargs={"generation_config": {"temperature":1.5}}, scheduler=scheduler,
+        )
         ai_text = response.text.strip()
         # print(f"DEBUG: Gemini generated text: {ai_text}")  # Debug statement
         return ai_text
@@ -33,22 +43,52 @@ def generate_ai_text(model):
         return random.choice(responses)
 
 
-def generate_ai_guess(drawing_path, model):
+def generate_ai_texts(model, count, scheduler=None):
+    """
+    Asks Gemini for count different prompts in one request. Errors are raised, so the
+    caller can fall back to generate_ai_text.
+
+    Returns:
+        list: The prompts, as many as the answer held.
+    """
+    prompt = (
+        f"We're playing Gartic Phone. Come up with {count} different things to draw, as varied as you can: "
+        "different subjects, actions and places. Give each as a short answer, starting with A/An. "
+        "Use your creativity. Answer with a JSON array of strings."
+    )
+    response = get_resilience().call(
+        "gemini", "generate_content", model.generate_content,
+        args=([prompt],),
+        kwargs={"generation_config": {"temperature": 1.5, "response_mime_type": "application/json"}},
+        scheduler=scheduler,
+    )
+    texts = json.loads(response.text)
+    if not isinstance(texts, list):
+        raise ValueError("Expected a JSON array of prompts")
+    return [text.strip() for text in texts if isinstance(text, str) and text.strip()]
+
+
+def generate_ai_guess(drawing_path, model, submitter=None, scheduler=None):
     """
     Generates a guess based on a drawing using Google's Gemini model.
     
     Parameters:
         drawing_path (str): The file path to the drawing image.
         model: The Gemini model instance.
+        submitter (ImageSubmitter): Turns the drawing into a request part.
+            Defaults to the process-wide one, which sends small drawings inline.
+        scheduler (RequestScheduler): Admits the request within rate limits.
+            Defaults to the process-wide one.
     
     Returns:
         str: The AI's guess text.
     """
     try:
-        # Upload the image file to Gemini (assuming 'upload_file' is the correct method)
-        image = genai.upload_file(drawing_path)
+        image = (submitter or get_image_submitter()).part(drawing_path)
         prompt = "We're playing Gartic Phone. What do you think this drawing is trying to show? Give a short answer, starting with A/An. Use your creativity."
-        response = model.generate_content([image, "\n", prompt])
+        response = get_resilience().call(
+            "gemini", "generate_content", model.generate_content, args=([image, "\n", prompt],), scheduler=scheduler
+        )
         ai_guess = response.text.strip()
         # print(f"DEBUG: Gemini generated guess: {ai_guess}")  # Debug statement
         return ai_guess
@@ -58,28 +98,140 @@ def generate_ai_guess(drawing_path, model):
         return "No guess"
 
 
-def generate_ai_drawing(prompt, model):
+def generate_ai_guesses(drawing_paths, model, submitter=None, scheduler=None):
+    """
+    Guesses several drawings with one multimodal Gemini request.
+    Unlike generate_ai_guess, errors are raised so the caller can fall back to single requests.
+
+    Parameters:
+        drawing_paths (list): The file paths of the drawings.
+        model: The Gemini model instance.
+        submitter (ImageSubmitter): Turns the drawings into request parts.
+        scheduler (RequestScheduler): Admits the request within rate limits.
+
+    Returns:
+        list: One guess per drawing, in order; None where the answer had no usable guess.
+    """
+    submitter = submitter or get_image_submitter()
+    parts = ["We're playing Gartic Phone. Here are several drawings by different players."]
+    # One request: the drawings share its inline size limit
+    for number, image in enumerate(submitter.parts(drawing_paths), start=1):
+        parts += [f"\nDrawing {number}:", image]
+    parts.append(
+        "\nFor each drawing, what do you think it is trying to show? Give a short answer, starting with A/An. "
+        "Use your creativity and judge every drawing on its own. Answer with a JSON array holding one object "
+        'per drawing: {"drawing": <number>, "guess": "<answer>"}.'
+    )
+    response = get_resilience().call(
+        "gemini", "generate_content", model.generate_content,
+        args=(parts,), kwargs={"generation_config": {"response_mime_type": "application/json"}},
+        scheduler=scheduler,
+    )
+    return parse_batch_guesses(response.text, len(drawing_paths))
+
+
+def parse_batch_guesses(text, count):
+    """
+    Reads the answer to a batched guess request: a JSON array of {"drawing", "guess"} objects.
+
+    Returns:
+        list: count guesses in drawing order, with None for drawings the answer did not cover.
+
+    Raises:
+        ValueError: If the answer is not such an array.
+    """
+    text = text.strip()
+    if text.startswith("```"):
+        # Strip a Markdown code fence around the JSON
+        text = text.strip("`").split("\n", 1)[-1]
+    answers = json.loads(text)
+    if not isinstance(answers, list):
+        raise ValueError("Expected a JSON array of guesses")
+    guesses = [None] * count
+    for position, answer in enumerate(answers):
+        if not isinstance(answer, dict):
+            continue
+        number = answer.get("drawing", position + 1)
+        guess = answer.get("guess")
+        if isinstance(number, int) and 1 <= number <= count and isinstance(guess, str) and guess.strip():
+            guesses[number - 1] = guess.strip()
+    return guesses
+
+
+def image_request(prompt, model, negative=""):
     """
-    Generates an image based on the provided prompt using Google's Gemini model.
-    Returns the image bytes.
+    Builds the pollinations request for an image, using the settings of a pollinations image model.
+
+    Returns:
+        tuple: The request URL and its query parameters.
     """
+    import pollinations
+
+    seed = random.randint(0, 9999999999) if model.seed == "random" else model.seed
+    url = f"https://{pollinations.IMAGE_API}/prompt/{quote(prompt, safe='')}"
+    params = {
+        "negative": negative,
+        "seed": seed,
+        "width": model.width,
+        "height": model.height,
+        "nologo": model.nologo,
+        "private": model.private,
+        "model": model.model,
+        "enhance": model.enhance,
+    }
+    return url, params
+
+
+def generate_ai_drawing(prompt, model, session=None, cache=None, scheduler=None, pipeline=None):
+    """
+    Generates an image based on the provided prompt using a pollinations image model.
+    Returns the bytes of a compact grayscale PNG.
+
+    Parameters:
+        prompt (str): What to draw.
+        model: The pollinations image model instance.
+        session: The requests session to download with, e.g. the shared one from
+            ai.clients. Defaults to a one-off connection.
+        cache (ImageCache): Where to look up and store drawings of the same prompt.
+            None always asks pollinations for a new image.
+        scheduler (RequestScheduler): Admits the request within rate limits.
+            Defaults to the process-wide one.
+        pipeline (ImagePipeline): Checks and shrinks the download. Defaults to the process-wide one.
+    """
+    pipeline = pipeline or get_image_pipeline()
+    negative = "Color, realism"
+    if cache is not None:
+        key = cache.key(prompt, model.model, model.width, model.height, negative)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
     try:
-        # Encode the prompt for URL inclusion
-        
-        response = requests.get(
-            url=model.generate(
-                prompt = f"Colorless doodle of {prompt}",
-                negative = "Color, realism",
-                save = False,
-            ).params["url"],
-            headers={"Content-Type": "application/json"},
-            timeout=60,
-        )
-        response.raise_for_status()
-        return response.content
+        import pollinations
+        import requests
+
+        url, params = image_request(f"Colorless doodle of {prompt}", model, negative=negative)
+
+        def fetch():
+            response = (session or requests).get(
+                url=url,
+                params=params,
+                headers=pollinations.HEADER,
+                timeout=remaining_time(60),
+            )
+            # Raising inside the scheduled call lets the scheduler see 429 responses
+            response.raise_for_status()
+            return response
+
+        response = get_resilience().call("pollinations", "image", fetch, scheduler=scheduler)
+        get_metrics().count("drawing_bytes_total", len(response.content), kind="downloaded")
+        # Downloads are large color JPEGs; they are stored and cached as small grayscale PNGs
+        drawing = pipeline.normalize(response.content)
+        if cache is not None:
+            cache.put(key, drawing)
+        return drawing
     except Exception as e:
         print(f"Error generating ai image: {e}")
-        return load_image(Image.open("temp_ai_img.jpg"))
+        return pipeline.fallback()
 
 
 def load_image(img):
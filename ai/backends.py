@@ -0,0 +1,328 @@
+# ai/backends.py
+import io
+import random
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+
+from PIL import Image, ImageDraw
+from PIL.PngImagePlugin import PngInfo
+
+from ai.ai_logic import generate_ai_drawing, generate_ai_guess, generate_ai_guesses, generate_ai_text
+from ai.clients import get_registry
+from ai.image_cache import get_image_cache
+from ai.prompt_pool import get_prompt_pool
+from ai.resilience import remaining_time
+from utils.metrics import get_metrics
+
+
+class AIBackend(ABC):
+    """
+    The services an AI player needs: inventing a prompt, guessing a drawing and drawing a prompt.
+    """
+
+    @abstractmethod
+    def generate_text(self):
+        """
+        Returns a new text prompt.
+        """
+        pass
+
+    @abstractmethod
+    def generate_guess(self, drawing_path):
+        """
+        Returns a guess of what the drawing at drawing_path shows.
+        """
+        pass
+
+    @abstractmethod
+    def generate_drawing(self, prompt):
+        """
+        Returns the bytes of an image drawn from the prompt.
+        """
+        pass
+
+    def generate_guesses(self, drawing_paths):
+        """
+        Returns one guess per drawing, with None for drawings that got no usable guess.
+        Backends that can guess several drawings in one request override this.
+        """
+        return [self.generate_guess(drawing_path) for drawing_path in drawing_paths]
+
+
+class GeminiBackend(AIBackend):
+    """
+    Uses Gemini for text and guesses and pollinations for drawings, through the shared clients
+    in ai.clients. Clients are created on first use, so building the backend needs no API key.
+
+    Parameters:
+        cache_drawings (bool): Whether to reuse cached drawings of prompts seen before.
+        prompt_pool (bool): Whether to take new prompts from the shared, de-duplicated PromptPool
+            instead of asking for each one separately.
+    """
+
+    def __init__(self, cache_drawings=True, prompt_pool=True):
+        self.cache_drawings = cache_drawings
+        self.prompt_pool = prompt_pool
+
+    def generate_text(self):
+        if self.prompt_pool:
+            try:
+                return get_prompt_pool().take(timeout=remaining_time(30.0))
+            except LookupError as e:
+                print(f"Error taking a prompt from the pool: {e}")
+        return generate_ai_text(self._registry().text_model())
+
+    def generate_guess(self, drawing_path):
+        return generate_ai_guess(drawing_path, self._registry().text_model())
+
+    def generate_guesses(self, drawing_paths):
+        return generate_ai_guesses(drawing_paths, self._registry().text_model())
+
+    def generate_drawing(self, prompt):
+        registry = self._registry()
+        cache = get_image_cache() if self.cache_drawings else None
+        return generate_ai_drawing(prompt, registry.image_model(), session=registry.session(), cache=cache)
+
+    def _registry(self):
+        return get_registry()
+
+
+class LocalBackendError(RuntimeError):
+    """
+    Raised by LocalBackend for an injected failure. code is 429 for an injected throttle.
+    """
+
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+SUBJECTS = ["cat", "robot", "dragon", "pirate", "astronaut", "wizard", "penguin", "octopus", "knight", "ghost"]
+ACTIONS = ["making coffee", "riding a bicycle", "reading a book", "flying a kite", "playing guitar",
+           "building a sandcastle", "juggling apples", "painting a fence", "chasing a mouse", "surfing a wave"]
+PLACES = ["on the moon", "in a forest", "at the beach", "in a castle", "under the sea",
+          "in a kitchen", "on a rooftop", "in the desert", "at a circus", "in space"]
+
+
+def with_article(phrase):
+    """
+    Prefixes a phrase with A or An, the way the Gemini prompts ask for.
+    """
+    article = "An" if phrase[:1].lower() in "aeiou" else "A"
+    return f"{article} {phrase}"
+
+
+class LocalBackend(AIBackend):
+    """
+    Offline stand-in for the real services, for load tests and benchmarks.
+    Outputs depend only on the seed and the inputs. Drawings are small generated PNGs that carry
+    their prompt, and guesses read it back with one word changed, so chains drift like real ones.
+
+    Parameters:
+        seed (int): Seed for all generated content, latencies and failures.
+        latency (float or dict): Seconds each call sleeps, or a dict with "text", "guess" and
+            "draw" entries. Entries may be (low, high) tuples for a uniform random latency.
+        failure_rate (float): Probability that a call raises LocalBackendError.
+        size (tuple): Width and height of generated drawings.
+        throttle_rate (float): Probability that a call is rejected like an HTTP 429.
+        scheduler (RequestScheduler): If given, calls go through its "local" lanes, like real requests.
+    """
+
+    def __init__(self, seed=0, latency=0.0, failure_rate=0.0, size=(400, 400), throttle_rate=0.0, scheduler=None):
+        self.seed = seed
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.size = size
+        self.throttle_rate = throttle_rate
+        self.scheduler = scheduler
+        self._lock = threading.Lock()
+        self._texts = 0  # Number of prompts invented so far
+        self.calls = {"text": 0, "guess": 0, "draw": 0}
+        self.failures = {"text": 0, "guess": 0, "draw": 0}
+        self.throttles = {"text": 0, "guess": 0, "draw": 0}
+
+    def generate_text(self):
+        with self._lock:
+            self._texts += 1
+            count = self._texts
+        rng = self._random("text", count)
+        self._simulate("text")
+        return with_article(f"{rng.choice(SUBJECTS)} {rng.choice(ACTIONS)} {rng.choice(PLACES)}.")
+
+    def generate_guess(self, drawing_path):
+        self._simulate("guess")
+        return self._guess(drawing_path)
+
+    def generate_guesses(self, drawing_paths):
+        # One simulated request for the whole batch, like a multimodal request
+        self._simulate("guess")
+        return [self._guess(drawing_path) for drawing_path in drawing_paths]
+
+    def _guess(self, drawing_path):
+        with Image.open(drawing_path) as image:
+            prompt = image.info.get("prompt", "")
+        rng = self._random("guess", prompt)
+        words = prompt.rstrip(".").split()[1:]
+        if not words:
+            return with_article(f"{rng.choice(SUBJECTS)} {rng.choice(PLACES)}.")
+        # Replace one of the nouns or verbs with a related-looking word
+        pools = [SUBJECTS, ACTIONS, PLACES]
+        pool = rng.choice(pools)
+        replacement = rng.choice(pool).split()
+        position = rng.randrange(len(words))
+        words[position:position + len(replacement)] = replacement
+        return with_article(" ".join(words) + ".")
+
+    def generate_drawing(self, prompt):
+        rng = self._random("draw", prompt)
+        self._simulate("draw")
+        width, height = self.size
+        image = Image.new("L", (width, height), 255)
+        draw = ImageDraw.Draw(image)
+        for _ in range(rng.randint(3, 8)):
+            x0, y0 = rng.randrange(width), rng.randrange(height)
+            x1, y1 = rng.randrange(width), rng.randrange(height)
+            shape = rng.choice(["line", "ellipse", "rectangle"])
+            if shape == "line":
+                draw.line([x0, y0, x1, y1], fill=0, width=3)
+            else:
+                box = [min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)]
+                getattr(draw, shape)(box, outline=0, width=3)
+        info = PngInfo()
+        info.add_text("prompt", prompt)
+        byte_io = io.BytesIO()
+        image.save(byte_io, format="PNG", pnginfo=info)
+        return byte_io.getvalue()
+
+    def _random(self, kind, value):
+        return random.Random(zlib.crc32(f"{self.seed}:{kind}:{value}".encode("utf-8")))
+
+    def _simulate(self, kind):
+        if self.scheduler is not None:
+            return self.scheduler.call("local", kind, self._respond, kind)
+        return self._respond(kind)
+
+    def _respond(self, kind):
+        """
+        Sleeps for the configured latency and raises an injected failure or throttle if one is drawn.
+        Latency and failures depend on the call count, so a retried call can succeed.
+        """
+        with self._lock:
+            self.calls[kind] += 1
+            rng = self._random(f"{kind}-call", self.calls[kind])
+        latency = self.latency.get(kind, 0.0) if isinstance(self.latency, dict) else self.latency
+        if isinstance(latency, tuple):
+            latency = rng.uniform(*latency)
+        fail = rng.random() < self.failure_rate
+        throttle = not fail and rng.random() < self.throttle_rate
+        if throttle:
+            with self._lock:
+                self.throttles[kind] += 1
+            raise LocalBackendError(f"Injected {kind} throttle", code=429)
+        if fail:
+            with self._lock:
+                self.failures[kind] += 1
+        if latency:
+            time.sleep(latency)
+        if fail:
+            raise LocalBackendError(f"Injected {kind} failure")
+
+
+# Result of a batched guess that has to be asked for on its own
+_SINGLE = object()
+
+
+class BatchedGuesses(AIBackend):
+    """
+    Wraps a backend so that guesses requested around the same time go out as one request
+    (see AIBackend.generate_guesses). A batch is sent once batch_size guesses are waiting or
+    max_wait seconds after its first guess; the answers are handed back to each waiting player.
+    Drawings the batch answer does not cover, or the whole batch if the request fails, are
+    guessed with single requests by the players that asked.
+
+    Parameters:
+        backend (AIBackend): Makes the requests. Texts and drawings are passed straight through.
+        batch_size (int): Most drawings per request. Batches fill fastest when it is no larger than
+            the number of guesses in flight at once (the game's max_workers).
+        max_wait (float): Seconds a guess may wait for others to join its batch.
+    """
+
+    def __init__(self, backend, batch_size=8, max_wait=0.5):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._pending = []  # (drawing path, Future) pairs of the batch being collected
+        self._timer = None
+        self.batches = 0
+        self.batched = 0
+        self.singles = 0
+
+    def generate_text(self):
+        return self.backend.generate_text()
+
+    def generate_drawing(self, prompt):
+        return self.backend.generate_drawing(prompt)
+
+    def generate_guesses(self, drawing_paths):
+        return self.backend.generate_guesses(drawing_paths)
+
+    def generate_guess(self, drawing_path):
+        future = Future()
+        batch = None
+        with self._lock:
+            self._pending.append((drawing_path, future))
+            if len(self._pending) >= self.batch_size:
+                batch = self._take()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.max_wait, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            # The guess that fills the batch sends it
+            self._send(batch)
+
+        guess = future.result(timeout=remaining_time())
+        if guess is _SINGLE:
+            with self._lock:
+                self.singles += 1
+            get_metrics().count("batched_guesses_total", reason="single")
+            return self.backend.generate_guess(drawing_path)
+        return guess
+
+    def _take(self):
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _flush(self):
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._send(batch)
+
+    def _send(self, batch):
+        if len(batch) == 1:
+            # Nobody else asked in time; a single request is cheaper than a batch of one
+            batch[0][1].set_result(_SINGLE)
+            return
+        paths = [drawing_path for drawing_path, _ in batch]
+        try:
+            guesses = self.backend.generate_guesses(paths)
+            if len(guesses) != len(paths):
+                raise ValueError(f"Expected {len(paths)} guesses, got {len(guesses)}")
+        except Exception as e:
+            print(f"Error generating batched AI guesses, asking one by one: {e}")
+            guesses = [_SINGLE] * len(paths)
+        answered = sum(1 for guess in guesses if guess is not _SINGLE and guess)
+        with self._lock:
+            self.batches += 1
+            self.batched += answered
+        get_metrics().count("batched_guesses_total", answered, reason="batched")
+        for (_, future), guess in zip(batch, guesses):
+            future.set_result(guess if guess is not _SINGLE and guess else _SINGLE)
@@ -0,0 +1,165 @@
+# ai/clients.py
+import os
+import threading
+
+# The provider SDKs take most of a second to import, so they are imported when the first
+# client is built rather than with this module
+
+TEXT_MODEL = "gemini-1.5-flash"
+
+# Parameters of the pollinations image model used by AI players; the model defaults to pollinations.flux
+IMAGE_MODEL_PARAMS = {
+    "width": 400,
+    "height": 400,
+    "enhance": False,
+    "nologo": True,
+}
+
+
+class ClientRegistry:
+    """
+    Holds the model clients and HTTP sessions shared by every AI player in the process.
+
+    Lifecycle: the registry is created on the first call to get_registry() and lives until
+    close_registry() is called, normally once at the end of main(). Clients are built on first use
+    and reused afterwards; close() drops them and closes the pooled connections. A closed registry
+    can still be used and will rebuild its clients on demand.
+
+    Parameters:
+        pool_connections (int): Number of per-host connection pools to keep.
+        pool_maxsize (int): Maximum number of kept-alive connections per host.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=32):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._lock = threading.Lock()
+        self._configured = False
+        self._text_models = {}
+        self._image_models = {}
+        self._session = None
+        self._hits = {"text_model": 0, "image_model": 0, "session": 0}
+        self._misses = {"text_model": 0, "image_model": 0, "session": 0}
+
+    def text_model(self, name=TEXT_MODEL):
+        """
+        Returns the shared Gemini model with the given name, configuring the API key once.
+        """
+        with self._lock:
+            if name in self._text_models:
+                self._hits["text_model"] += 1
+                return self._text_models[name]
+            self._misses["text_model"] += 1
+            import google.generativeai as genai
+
+            if not self._configured:
+                if "API_KEY" not in os.environ:
+                    raise RuntimeError("The API_KEY environment variable is not set (see README.md)")
+                genai.configure(api_key=os.environ["API_KEY"])
+                self._configured = True
+            model = genai.GenerativeModel(name)
+            self._text_models[name] = model
+            return model
+
+    def image_model(self, **params):
+        """
+        Returns the shared pollinations image model for the given parameters.
+        Defaults to IMAGE_MODEL_PARAMS.
+        """
+        import pollinations
+
+        params = {"model": pollinations.flux, **IMAGE_MODEL_PARAMS, **params}
+        key = tuple(sorted(params.items()))
+        with self._lock:
+            if key in self._image_models:
+                self._hits["image_model"] += 1
+                return self._image_models[key]
+            self._misses["image_model"] += 1
+            model = pollinations.image(**params)
+            self._image_models[key] = model
+            return model
+
+    def session(self):
+        """
+        Returns the shared requests session. Its connections are kept alive and pooled per host,
+        so image downloads after the first one skip the TCP and TLS handshake.
+        """
+        with self._lock:
+            if self._session is not None:
+                self._hits["session"] += 1
+                return self._session
+            self._misses["session"] += 1
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._session = session
+            return session
+
+    def stats(self):
+        """
+        Returns registry lookups and connection pool usage.
+
+        Returns:
+            dict: "hits" and "misses" per client kind, plus "connections" with the number of
+            requests sent, connections opened (pool misses) and requests that reused a kept-alive
+            connection (pool hits).
+        """
+        with self._lock:
+            requests_sent = 0
+            connections_opened = 0
+            if self._session is not None:
+                for adapter in set(self._session.adapters.values()):
+                    for key in adapter.poolmanager.pools.keys():
+                        pool = adapter.poolmanager.pools[key]
+                        requests_sent += pool.num_requests
+                        connections_opened += pool.num_connections
+            return {
+                "hits": dict(self._hits),
+                "misses": dict(self._misses),
+                "connections": {
+                    "requests": requests_sent,
+                    "opened": connections_opened,
+                    "reused": max(0, requests_sent - connections_opened),
+                },
+            }
+
+    def close(self):
+        """
+        Closes the pooled connections and forgets every client.
+        """
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+            self._text_models.clear()
+            self._image_models.clear()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """
+    Returns the process-wide ClientRegistry, creating it on first use.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ClientRegistry()
+        return _registry
+
+
+def close_registry():
+    """
+    Closes and discards the process-wide ClientRegistry, if one was created.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is not None:
+            _registry.close()
+            _registry = None
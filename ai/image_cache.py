@@ -0,0 +1,148 @@
+# ai/image_cache.py
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+CACHE_DIR = os.path.join("assets", "cache", "drawings")
+
+
+def normalize_prompt(prompt):
+    """
+    Normalizes a prompt so trivially different spellings share a cache entry:
+    case, repeated whitespace and trailing punctuation are ignored.
+    """
+    return " ".join(prompt.lower().split()).rstrip(".!?")
+
+
+class ImageCache:
+    """
+    Persistent cache of generated drawings, addressed by a hash of the normalized prompt and the
+    model parameters. Entries are stored as one file each; the least recently used ones are
+    evicted once the entry or size cap is exceeded. Recency survives restarts through the file
+    modification times.
+
+    Parameters:
+        directory (str): Where cached images are stored.
+        max_entries (int): Maximum number of cached images. None for no limit.
+        max_bytes (int): Maximum total size of cached images. None for no limit.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_entries=500, max_bytes=200 * 1024 * 1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # Maps keys to file sizes, least recently used first
+        self._size = 0
+        self._load()
+
+    def key(self, prompt, model, width, height, negative=""):
+        """
+        Returns the cache key for a drawing of the prompt with the given model parameters.
+        """
+        spec = json.dumps([normalize_prompt(prompt), model, width, height, negative])
+        return hashlib.sha256(spec.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Returns the cached image bytes for the key, or None.
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+                os.utime(self._path(key))
+            except OSError:
+                # Removed behind our back; treat as a miss
+                self._size -= self._entries.pop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        """
+        Stores image bytes under the key and evicts old entries if the cache is over its caps.
+        """
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            # A unique name, so other processes sharing the directory never write to the same file
+            with tempfile.NamedTemporaryFile(dir=self.directory, prefix=f"{key}.", suffix=".tmp", delete=False) as f:
+                f.write(data)
+            os.replace(f.name, self._path(key))
+            if key in self._entries:
+                self._size -= self._entries.pop(key)
+            self._entries[key] = len(data)
+            self._size += len(data)
+            self._evict()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.img")
+
+    def _load(self):
+        if not os.path.isdir(self.directory):
+            return
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".img"):
+                stat = os.stat(os.path.join(self.directory, name))
+                files.append((stat.st_mtime, name[:-len(".img")], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._size += size
+        self._evict()
+
+    def _evict(self):
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_bytes is not None and self._size > self.max_bytes)
+        ):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        self._size -= self._entries.pop(key)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_image_cache():
+    """
+    Returns the process-wide ImageCache, creating it on first use.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ImageCache()
+        return _cache
@@ -0,0 +1,179 @@
+# ai/image_pipeline.py
+import io
+import threading
+
+from PIL import Image
+
+# Size of the drawing canvas; larger AI drawings are scaled down to fit it
+CANVAS_SIZE = (400, 400)
+
+# Image used when a drawing cannot be generated
+FALLBACK_IMAGE = "temp_ai_img.jpg"
+
+# Formats pollinations and the drawing canvas are known to produce
+ACCEPTED_FORMATS = {"JPEG", "PNG", "GIF", "WEBP"}
+
+
+def normalize_image(data, size=CANVAS_SIZE, colors=16):
+    """
+    Converts image bytes to a compact PNG: grayscale, at most size, with a palette of colors shades.
+    Drawings are colorless doodles, so this loses little and makes files several times smaller
+    and quicker to decode for the guesser and the history viewer.
+
+    Parameters:
+        data (bytes): The image as downloaded or saved.
+        size (tuple): Largest width and height of the result.
+        colors (int): Number of gray levels kept. None keeps all 256.
+
+    Returns:
+        bytes: The PNG data.
+
+    Raises:
+        ValueError: If the data is not an image in one of the ACCEPTED_FORMATS.
+    """
+    try:
+        img = Image.open(io.BytesIO(data))
+        # JPEG can be decoded directly in grayscale at a reduced scale, which is much cheaper
+        img.draft("L", size)
+        img.load()
+    except Exception as e:
+        raise ValueError(f"Not a readable image: {e}") from e
+    if img.format not in ACCEPTED_FORMATS:
+        raise ValueError(f"Unexpected image format: {img.format}")
+
+    if img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info):
+        # Transparent areas are blank paper
+        background = Image.new("RGBA", img.size, "white")
+        background.alpha_composite(img.convert("RGBA"))
+        img = background
+    img = img.convert("L")
+    # Keeps the aspect ratio and never scales up
+    img.thumbnail(size, Image.LANCZOS)
+    if colors is not None:
+        img = img.quantize(colors)
+
+    byte_io = io.BytesIO()
+    img.save(byte_io, format="PNG", optimize=True)
+    return byte_io.getvalue()
+
+
+def normalize_file(path, size=CANVAS_SIZE, colors=16):
+    """
+    Returns the normalized PNG bytes of the image file at path.
+    """
+    with open(path, "rb") as f:
+        return normalize_image(f.read(), size=size, colors=colors)
+
+
+class ImagePipeline:
+    """
+    Normalizes drawings (see normalize_image) in a pool of processes, so decoding and re-encoding
+    large downloads does not hold the GIL while other players' requests are running.
+    The fallback image is encoded once and reused for every failed drawing.
+
+    Parameters:
+        processes (int): Number of worker processes. 0 normalizes in the calling thread;
+            None uses the ProcessPoolExecutor default.
+        size (tuple): Largest width and height of normalized drawings.
+        colors (int): Number of gray levels kept. None keeps all 256.
+        fallback_path (str): Image used when a drawing cannot be generated.
+    """
+
+    def __init__(self, processes=2, size=CANVAS_SIZE, colors=16, fallback_path=FALLBACK_IMAGE):
+        self.processes = processes
+        self.size = size
+        self.colors = colors
+        self.fallback_path = fallback_path
+        self._pool = None
+        self._fallback = None
+        self._lock = threading.Lock()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.rejected = 0
+
+    def normalize(self, data):
+        """
+        Returns the normalized PNG bytes of an image. Raises ValueError for data that is not an image.
+        """
+        try:
+            result = self._run(normalize_image, data)
+        except ValueError:
+            with self._lock:
+                self.rejected += 1
+            raise
+        with self._lock:
+            self.bytes_in += len(data)
+            self.bytes_out += len(result)
+        return result
+
+    def fallback(self):
+        """
+        Returns the normalized bytes of the fallback image, encoding it on first use.
+        """
+        with self._lock:
+            if self._fallback is None:
+                self._fallback = normalize_file(self.fallback_path, size=self.size, colors=self.colors)
+            return self._fallback
+
+    def stats(self):
+        with self._lock:
+            return {
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "rejected": self.rejected,
+            }
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, fn, data):
+        if self.processes == 0:
+            return fn(data, size=self.size, colors=self.colors)
+        # Imported on the first image rather than at startup
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
+
+        with self._lock:
+            if self._pool is None:
+                # Forking a process that runs many threads can copy a held lock into the child
+                self._pool = ProcessPoolExecutor(max_workers=self.processes,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            pool = self._pool
+        try:
+            return pool.submit(fn, data, size=self.size, colors=self.colors).result()
+        except BrokenProcessPool:
+            # A worker died; start a new pool next time and do this one here
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            return fn(data, size=self.size, colors=self.colors)
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_image_pipeline():
+    """
+    Returns the process-wide ImagePipeline, creating it on first use.
+    """
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = ImagePipeline()
+        return _pipeline
+
+
+def close_image_pipeline():
+    """
+    Stops the worker processes of the process-wide ImagePipeline, if it was created.
+    """
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is not None:
+            _pipeline.close()
+            _pipeline = None
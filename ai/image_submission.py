@@ -0,0 +1,130 @@
+# ai/image_submission.py
+import hashlib
+import threading
+from datetime import datetime, timedelta, timezone
+
+from ai.resilience import get_resilience
+from utils.metrics import get_metrics
+
+# Images are sent inline with the generate_content request while their total size stays within this
+INLINE_LIMIT = 4 * 1024 * 1024
+
+# How long Gemini keeps uploaded files when the upload response does not say
+DEFAULT_FILE_TTL = timedelta(hours=48)
+
+
+def image_mime_type(data):
+    """
+    Detects the image format from its first bytes. AI drawings are saved with a .png name
+    but usually hold JPEG data, so the file extension cannot be trusted.
+    """
+    if data.startswith(b"\x89PNG"):
+        return "image/png"
+    if data.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    if data.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/png"
+
+
+class ImageSubmitter:
+    """
+    Turns drawing files into content parts for Gemini requests.
+    Small images are sent inline as bytes, which saves the separate upload round-trip.
+    Larger images, and those that would push a request's inline bytes past the limit, are
+    uploaded once per distinct content and the file handle is reused until shortly before
+    Gemini expires it.
+
+    Parameters:
+        inline_limit (int): Most image bytes sent inline with one request.
+        expiry_margin (timedelta): How long before the remote expiry a handle stops being reused.
+    """
+
+    def __init__(self, inline_limit=INLINE_LIMIT, expiry_margin=timedelta(minutes=5)):
+        self.inline_limit = inline_limit
+        self.expiry_margin = expiry_margin
+        self._lock = threading.Lock()
+        self._uploads = {}  # Maps content hashes to (file handle, expiry time)
+        self.inline = 0
+        self.upload_hits = 0
+        self.uploads = 0
+
+    def part(self, drawing_path):
+        """
+        Returns a content part for the drawing at drawing_path.
+        """
+        return self.parts([drawing_path])[0]
+
+    def parts(self, drawing_paths):
+        """
+        Returns a content part for each drawing of one request, in order. Drawings are sent inline
+        while the request's inline bytes stay within inline_limit; the rest are uploaded, so a batch
+        of large drawings cannot push the request past the provider's size cap.
+        """
+        parts = []
+        budget = self.inline_limit
+        for drawing_path in drawing_paths:
+            with open(drawing_path, "rb") as f:
+                data = f.read()
+            if len(data) <= budget:
+                budget -= len(data)
+                parts.append(self._inline(data))
+            else:
+                parts.append(self._upload(drawing_path, data))
+        return parts
+
+    def _inline(self, data):
+        with self._lock:
+            self.inline += 1
+        get_metrics().count("drawing_bytes_total", len(data), kind="sent_inline")
+        return {"mime_type": image_mime_type(data), "data": data}
+
+    def _upload(self, drawing_path, data):
+        digest = hashlib.sha256(data).hexdigest()
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            cached = self._uploads.get(digest)
+            if cached is not None and cached[1] - self.expiry_margin > now:
+                self.upload_hits += 1
+                return cached[0]
+
+        get_metrics().count("drawing_bytes_total", len(data), kind="uploaded")
+        import google.generativeai as genai
+
+        handle = get_resilience().call("gemini", "upload_file", genai.upload_file, args=(drawing_path,),
+                                       kwargs={"mime_type": image_mime_type(data)})
+        expiry = getattr(handle, "expiration_time", None) or now + DEFAULT_FILE_TTL
+        with self._lock:
+            self._uploads[digest] = (handle, expiry)
+            self.uploads += 1
+            # Forget handles that can no longer be reused
+            for key, (_, expires) in list(self._uploads.items()):
+                if expires - self.expiry_margin <= now:
+                    del self._uploads[key]
+        return handle
+
+    def stats(self):
+        with self._lock:
+            return {
+                "inline": self.inline,
+                "upload_hits": self.upload_hits,
+                "uploads": self.uploads,
+                "cached_handles": len(self._uploads),
+            }
+
+
+_submitter = None
+_submitter_lock = threading.Lock()
+
+
+def get_image_submitter():
+    """
+    Returns the process-wide ImageSubmitter, creating it on first use.
+    """
+    global _submitter
+    with _submitter_lock:
+        if _submitter is None:
+            _submitter = ImageSubmitter()
+        return _submitter
@@ -0,0 +1,148 @@
+# ai/prompt_pool.py
+import threading
+import time
+from collections import deque
+from difflib import SequenceMatcher
+
+from ai.ai_logic import generate_ai_texts
+from ai.clients import get_registry
+from ai.image_cache import normalize_prompt
+from utils.metrics import get_metrics
+
+
+class PromptPool:
+    """
+    Keeps a stock of unique round-1 prompts, fetched many at a time. Candidates are dropped if
+    their normalized text (see normalize_prompt) equals, or is at least `similarity` alike
+    (difflib ratio) to, a prompt in stock or one handed out before, so no two chains start from
+    the same idea. Once the stock falls to low_water it is refilled in the background, so
+    players usually take a prompt without waiting for the network.
+
+    Parameters:
+        fetch (callable): Called with a count, returns a list of new prompts. May raise.
+        batch (int): Number of prompts asked for per fetch.
+        low_water (int): Stock size at which a background refill starts.
+        similarity (float): Ratio above which two prompts count as the same.
+        memory (int): Number of handed-out prompts remembered for de-duplication.
+        attempts (int): Number of fetches a waiting take() makes before giving up.
+    """
+
+    def __init__(self, fetch, batch=20, low_water=8, similarity=0.85, memory=1000, attempts=3):
+        self.fetch = fetch
+        self.batch = batch
+        self.low_water = low_water
+        self.similarity = similarity
+        self.attempts = attempts
+        self._stock = deque()
+        self._seen = deque(maxlen=memory)  # Normalized prompts handed out
+        self._condition = threading.Condition()
+        self._refilling = False
+        self._failed = False  # Whether the last fetch raised
+        self.fetches = 0
+        self.duplicates = 0
+
+    def prefetch(self):
+        """
+        Starts filling the stock in the background, e.g. while the players are being set up.
+        """
+        with self._condition:
+            self._start_refill()
+
+    def take(self, timeout=None):
+        """
+        Returns a prompt not handed out before. Waits for a refill if the stock is empty, and
+        fetches again, up to `attempts` times, if a refill brought only duplicates.
+
+        Raises:
+            LookupError: If no prompt arrived within timeout, or the fetch failed.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            for _ in range(self.attempts):
+                if self._stock:
+                    break
+                fetched = self.fetches
+                self._start_refill()
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                if not self._condition.wait_for(lambda: self._stock or self.fetches > fetched, timeout=remaining):
+                    break
+                if not self._stock and self._failed:
+                    break
+            if not self._stock:
+                raise LookupError("No prompts available")
+            prompt = self._stock.popleft()
+            self._seen.append(normalize_prompt(prompt))
+            if len(self._stock) <= self.low_water:
+                self._start_refill()
+            return prompt
+
+    def add(self, prompts):
+        """
+        Adds the candidates that are not duplicates to the stock and returns how many were added.
+        """
+        added = 0
+        with self._condition:
+            known = list(self._seen) + [normalize_prompt(prompt) for prompt in self._stock]
+            for prompt in prompts:
+                normalized = normalize_prompt(prompt)
+                if not normalized or self._is_duplicate(normalized, known):
+                    self.duplicates += 1
+                    continue
+                known.append(normalized)
+                self._stock.append(prompt)
+                added += 1
+            self._condition.notify_all()
+        get_metrics().count("prompt_pool_total", added, reason="added")
+        get_metrics().count("prompt_pool_total", len(prompts) - added, reason="duplicate")
+        return added
+
+    def stats(self):
+        with self._condition:
+            return {"stock": len(self._stock), "fetches": self.fetches, "duplicates": self.duplicates}
+
+    def _is_duplicate(self, normalized, known):
+        for other in known:
+            if normalized == other:
+                return True
+            matcher = SequenceMatcher(None, normalized, other)
+            # The quick ratios are upper bounds of ratio(), so they rule out most pairs cheaply
+            if (matcher.real_quick_ratio() >= self.similarity and matcher.quick_ratio() >= self.similarity
+                    and matcher.ratio() >= self.similarity):
+                return True
+        return False
+
+    def _start_refill(self):
+        # Called with the condition held
+        if self._refilling:
+            return
+        self._refilling = True
+        threading.Thread(target=self._refill, daemon=True, name="prompt-pool").start()
+
+    def _refill(self):
+        failed = False
+        try:
+            prompts = self.fetch(self.batch)
+        except Exception as e:
+            print(f"Error refilling the prompt pool: {e}")
+            prompts, failed = [], True
+        self.add(prompts)
+        with self._condition:
+            self.fetches += 1
+            self._failed = failed
+            self._refilling = False
+            self._condition.notify_all()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_prompt_pool():
+    """
+    Returns the process-wide PromptPool, which asks Gemini for prompts, creating it on first use.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PromptPool(lambda count: generate_ai_texts(get_registry().text_model(), count))
+        return _pool
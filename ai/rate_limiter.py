@@ -0,0 +1,277 @@
+# ai/rate_limiter.py
+import contextlib
+import heapq
+import itertools
+import threading
+import time
+
+# Limits per (provider, endpoint). rate and burst configure the token bucket (requests per second
+# and the most requests sent at once after a quiet period); the concurrency limit starts at
+# initial_concurrency and adapts between min_concurrency and max_concurrency.
+DEFAULT_LIMITS = {
+    ("gemini", "generate_content"): {"rate": 2.0, "burst": 10, "initial_concurrency": 4, "max_concurrency": 32,
+                                     "latency_limit": 20.0},
+    ("pollinations", "image"): {"rate": 4.0, "burst": 8, "initial_concurrency": 4, "max_concurrency": 32,
+                                "latency_limit": None},
+}
+
+# Used for lanes that have no entry in DEFAULT_LIMITS
+FALLBACK_LIMITS = {"rate": 10.0, "burst": 10, "initial_concurrency": 8, "max_concurrency": 64, "latency_limit": None}
+
+_priority = threading.local()
+_deadline = threading.local()
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when a request cannot finish before the deadline of its phase.
+    """
+    pass
+
+
+@contextlib.contextmanager
+def request_priority(priority):
+    """
+    Sets the priority of requests made by this thread; lower values are sent first.
+    Game code sets it around a player's turn so older rounds, which hold up the game, go first.
+    """
+    previous = getattr(_priority, "value", None)
+    _priority.value = priority
+    try:
+        yield
+    finally:
+        _priority.value = previous
+
+
+def thread_priority():
+    """
+    Returns the priority set with request_priority in this thread, or None.
+    """
+    return getattr(_priority, "value", None)
+
+
+@contextlib.contextmanager
+def deadline_scope(deadline):
+    """
+    Sets the time (time.monotonic()) by which requests made by this thread must finish.
+    The phase executor sets it around each player's turn; requests still waiting for their lane
+    when it passes are dropped without being sent.
+    """
+    previous = getattr(_deadline, "value", None)
+    _deadline.value = deadline
+    try:
+        yield
+    finally:
+        _deadline.value = previous
+
+
+def current_deadline():
+    """
+    Returns the deadline set with deadline_scope in this thread, or None.
+    """
+    return getattr(_deadline, "value", None)
+
+
+def remaining_time(default=None):
+    """
+    Returns the seconds left until the current deadline, or default if there is none.
+    """
+    deadline = current_deadline()
+    if deadline is None:
+        return default
+    remaining = max(0.0, deadline - time.monotonic())
+    return remaining if default is None else min(default, remaining)
+
+
+def current_priority():
+    """
+    Returns the key waiting requests of this thread are ordered by. Requests without a
+    priority go after all requests that have one.
+    """
+    value = thread_priority()
+    return (1, ()) if value is None else (0, value)
+
+
+def is_throttled(exc):
+    """
+    Whether an exception means the provider rejected the request for exceeding its quota (HTTP 429).
+    Covers google.api_core errors (code) and requests errors (response.status_code).
+    """
+    if getattr(exc, "code", None) == 429:
+        return True
+    response = getattr(exc, "response", None)
+    return getattr(response, "status_code", None) == 429
+
+
+class Lane:
+    """
+    Admission control for one provider endpoint: a token bucket caps the request rate, an AIMD
+    limit caps requests in flight, and waiting requests are admitted in priority order until
+    their deadline.
+    The limit grows by about one per window of successful requests and halves on a 429;
+    responses slower than latency_limit shrink it by a quarter.
+    """
+
+    def __init__(self, name, rate, burst, initial_concurrency, min_concurrency=1, max_concurrency=64,
+                 latency_limit=None):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.limit = float(initial_concurrency)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.latency_limit = latency_limit
+        self.tokens = float(burst)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._refilled = time.monotonic()
+        self._waiting = []  # Heap of (priority, sequence number)
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self.stats = {"requests": 0, "throttled": 0, "slow": 0, "expired": 0, "wait_s": 0.0, "max_wait_s": 0.0}
+
+    def acquire(self, priority, deadline=None):
+        """
+        Blocks until a request with the given priority may be sent. If deadline (time.monotonic())
+        passes first, the request leaves the queue without being sent and DeadlineExceeded is raised.
+        """
+        started = time.monotonic()
+        with self._condition:
+            entry = (priority, next(self._sequence))
+            heapq.heappush(self._waiting, entry)
+            while True:
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                    self.stats["expired"] += 1
+                    self._condition.notify_all()  # The next request may be at the head now
+                    raise DeadlineExceeded(f"{self.name}: phase deadline passed while waiting to be sent")
+                self._refill(now)
+                timeout = None
+                if self._waiting[0] == entry and self.in_flight < int(self.limit):
+                    if now < self.paused_until:
+                        timeout = self.paused_until - now
+                    elif self.tokens >= 1:
+                        self.tokens -= 1
+                        heapq.heappop(self._waiting)
+                        self.in_flight += 1
+                        waited = now - started
+                        self.stats["requests"] += 1
+                        self.stats["wait_s"] += waited
+                        self.stats["max_wait_s"] = max(self.stats["max_wait_s"], waited)
+                        self._condition.notify_all()
+                        return
+                    else:
+                        timeout = (1 - self.tokens) / self.rate
+                if deadline is not None:
+                    timeout = deadline - now if timeout is None else min(timeout, deadline - now)
+                self._condition.wait(timeout)
+
+    def release(self, latency, throttled=False):
+        """
+        Frees the slot of a finished request and adapts the concurrency limit.
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self.stats["throttled"] += 1
+                self.limit = max(self.min_concurrency, self.limit / 2)
+                # Let the quota recover before anything else is sent
+                self.tokens = 0.0
+                self.paused_until = max(self.paused_until, time.monotonic() + 1.0 / self.rate)
+            elif self.latency_limit is not None and latency > self.latency_limit:
+                self.stats["slow"] += 1
+                self.limit = max(self.min_concurrency, self.limit * 0.75)
+            else:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+    def snapshot(self):
+        with self._condition:
+            return {
+                **self.stats,
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "waiting": len(self._waiting),
+            }
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+
+class RequestScheduler:
+    """
+    Sends provider requests through one Lane per (provider, endpoint), so every AI player in the
+    process shares the same quotas. Throttled requests are retried after the lane backs off
+    instead of falling back right away.
+
+    Parameters:
+        limits (dict): Lane settings per (provider, endpoint), see DEFAULT_LIMITS.
+        throttle_retries (int): How often a throttled request is sent again before its error is raised.
+    """
+
+    def __init__(self, limits=None, throttle_retries=5):
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.throttle_retries = throttle_retries
+        self._lanes = {}
+        self._lock = threading.Lock()
+
+    def configure(self, provider, endpoint, **settings):
+        """
+        Changes the settings of a lane. Takes effect for a lane that has not been used yet.
+        """
+        with self._lock:
+            key = (provider, endpoint)
+            self.limits[key] = {**self.limits.get(key, FALLBACK_LIMITS), **settings}
+            self._lanes.pop(key, None)
+
+    def lane(self, provider, endpoint):
+        key = (provider, endpoint)
+        with self._lock:
+            if key not in self._lanes:
+                self._lanes[key] = Lane(f"{provider}/{endpoint}", **self.limits.get(key, FALLBACK_LIMITS))
+            return self._lanes[key]
+
+    def call(self, provider, endpoint, fn, *args, **kwargs):
+        """
+        Calls fn(*args, **kwargs) once the lane admits it, at the priority set with request_priority.
+        Raises DeadlineExceeded, without calling fn, if the deadline set with deadline_scope passes first.
+        """
+        lane = self.lane(provider, endpoint)
+        priority = current_priority()
+        deadline = current_deadline()
+        for attempt in range(self.throttle_retries + 1):
+            lane.acquire(priority, deadline)
+            started = time.monotonic()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as exc:
+                throttled = is_throttled(exc)
+                lane.release(time.monotonic() - started, throttled=throttled)
+                if throttled and attempt < self.throttle_retries:
+                    continue
+                raise
+            lane.release(time.monotonic() - started)
+            return result
+
+    def stats(self):
+        with self._lock:
+            lanes = dict(self._lanes)
+        return {lane.name: lane.snapshot() for lane in lanes.values()}
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_request_scheduler():
+    """
+    Returns the process-wide RequestScheduler, creating it on first use.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RequestScheduler()
+        return _scheduler
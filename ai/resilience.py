@@ -0,0 +1,235 @@
+# ai/resilience.py
+import random
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# The deadline primitives live with the lanes, which drop requests still waiting when it passes;
+# they are imported from here by the game code
+from ai.rate_limiter import (DeadlineExceeded, current_deadline, deadline_scope, get_request_scheduler, is_throttled,
+                             remaining_time, request_priority, thread_priority)
+from utils.metrics import get_metrics
+
+# Errors of the provider libraries that a later attempt may not run into, by module. They are looked
+# up only once the module has been imported, which is the only way such an error can have been raised.
+TRANSIENT_ERRORS = {
+    "requests.exceptions": ("RequestException",),
+    "google.api_core.exceptions": ("ServiceUnavailable", "DeadlineExceeded", "TooManyRequests",
+                                   "ResourceExhausted", "InternalServerError", "BadGateway", "GatewayTimeout"),
+}
+
+
+def is_retriable(exc):
+    """
+    Whether a failed request may succeed when sent again: network errors, timeouts,
+    throttling and server errors are. Client errors (bad key, bad request) and errors in our own
+    code, such as a ValueError from parsing an answer, are not.
+    """
+    code = getattr(exc, "code", None)
+    if code is None:
+        code = getattr(getattr(exc, "response", None), "status_code", None)
+    if isinstance(code, int):
+        return code in (408, 429) or code >= 500
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    for module_name, names in TRANSIENT_ERRORS.items():
+        module = sys.modules.get(module_name)
+        if module is None:
+            continue
+        if isinstance(exc, tuple(getattr(module, name) for name in names if hasattr(module, name))):
+            return True
+    return False
+
+
+class LatencyTracker:
+    """
+    Keeps the latest latencies of successful requests to estimate a percentile.
+    """
+
+    def __init__(self, size=200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, latency):
+        with self._lock:
+            self._samples.append(latency)
+
+    def percentile(self, fraction, min_samples=20):
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Resilience:
+    """
+    Wraps provider requests with retries, hedging and deadlines to bound the tail latency of a round.
+
+    - Failed requests that may succeed later are retried with jittered exponential backoff. Throttled
+      requests (HTTP 429) are not retried here: the RequestScheduler already sent them again after
+      backing off, so a 429 that reaches this point means the quota is still exhausted.
+    - A request still running past the hedge_percentile of recent latencies for its endpoint gets
+      a duplicate; whichever answers first is used.
+    - Requests stop waiting once the deadline of the current phase (see deadline_scope) passes, and
+      those not sent yet are never sent.
+
+    Every request is still admitted by the RequestScheduler, so hedges and retries respect rate limits.
+
+    Parameters:
+        attempts (int): Maximum number of attempts per request.
+        base_delay (float): Backoff before the second attempt, doubled for each further attempt.
+        max_delay (float): Longest backoff between attempts.
+        hedge_percentile (float): Latency percentile after which a duplicate is sent. None disables hedging.
+        hedge_min_samples (int): Number of latencies needed before hedging starts.
+        max_workers (int): Threads per endpoint available to run hedged and deadline-bound requests.
+            Each endpoint has a pool of its own, so a slow provider cannot starve the others.
+    """
+
+    def __init__(self, attempts=3, base_delay=0.5, max_delay=8.0, hedge_percentile=0.95, hedge_min_samples=20,
+                 max_workers=64):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.max_workers = max_workers
+        self._pools = {}
+        self._latencies = {}
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def call(self, provider, endpoint, fn, args=(), kwargs=None, scheduler=None):
+        """
+        Calls fn(*args, **kwargs) through the scheduler with retries, hedging and the current deadline.
+        Raises the last error if every attempt fails, or DeadlineExceeded.
+        """
+        with get_metrics().span("request", provider=provider, endpoint=endpoint):
+            return self._call(provider, endpoint, fn, args, kwargs or {}, scheduler or get_request_scheduler())
+
+    def stats(self):
+        """
+        Returns how often each path was taken, per endpoint.
+        """
+        with self._lock:
+            return {key: dict(counts) for key, counts in self._metrics.items()}
+
+    def _call(self, provider, endpoint, fn, args, kwargs, scheduler):
+        key = f"{provider}/{endpoint}"
+        self._count(key, "calls")
+        for attempt in range(1, self.attempts + 1):
+            try:
+                result = self._attempt(key, scheduler, provider, endpoint, fn, args, kwargs)
+            except DeadlineExceeded:
+                self._count(key, "deadline_exceeded")
+                raise
+            except Exception as exc:
+                if attempt == self.attempts or not is_retriable(exc) or is_throttled(exc):
+                    self._count(key, "failed")
+                    raise
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+                remaining = remaining_time()
+                if remaining is not None and remaining <= delay:
+                    self._count(key, "deadline_exceeded")
+                    raise DeadlineExceeded(f"{key}: no time left to retry after {exc}") from exc
+                self._count(key, "retries")
+                time.sleep(delay)
+                continue
+            self._count(key, "first_try" if attempt == 1 else "retried_success")
+            return result
+
+    def _attempt(self, key, scheduler, provider, endpoint, fn, args, kwargs):
+        tracker = self._tracker(key)
+        hedge_after = None
+        if self.hedge_percentile is not None:
+            hedge_after = tracker.percentile(self.hedge_percentile, self.hedge_min_samples)
+        deadline = current_deadline()
+        priority = thread_priority()
+
+        def timed():
+            started = time.monotonic()
+            if deadline is not None and started >= deadline:
+                # Queued on the pool past the deadline; the caller has given up on it
+                raise DeadlineExceeded(f"{key}: phase deadline passed before the request was sent")
+            # Requests may run on pool threads, which must see the caller's deadline and priority
+            with deadline_scope(deadline), request_priority(priority):
+                result = scheduler.call(provider, endpoint, fn, *args, **kwargs)
+            tracker.add(time.monotonic() - started)
+            return result
+
+        if hedge_after is None and deadline is None:
+            return timed()
+
+        pool = self._pool(key)
+        started = time.monotonic()
+        primary = pool.submit(timed)
+        pending = {primary}
+        hedge = None
+        error = None
+        while pending:
+            now = time.monotonic()
+            timeouts = []
+            if deadline is not None:
+                timeouts.append(deadline - now)
+            if hedge is None and hedge_after is not None:
+                timeouts.append(started + hedge_after - now)
+            timeout = max(0.0, min(timeouts)) if timeouts else None
+
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    error = exc
+                    continue
+                if future is hedge:
+                    self._count(key, "hedge_wins")
+                return result
+
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                # A request already sent keeps its thread until it returns, but nobody waits for it;
+                # one still queued for the pool or its lane is dropped there without being sent
+                raise DeadlineExceeded(f"{key}: phase deadline passed")
+            if hedge is None and hedge_after is not None and now - started >= hedge_after and pending:
+                self._count(key, "hedges")
+                hedge = pool.submit(timed)
+                pending.add(hedge)
+        raise error
+
+    def _pool(self, key):
+        with self._lock:
+            if key not in self._pools:
+                self._pools[key] = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                      thread_name_prefix=f"resilience-{key.replace('/', '-')}")
+            return self._pools[key]
+
+    def _tracker(self, key):
+        with self._lock:
+            if key not in self._latencies:
+                self._latencies[key] = LatencyTracker()
+            return self._latencies[key]
+
+    def _count(self, key, name):
+        provider, endpoint = key.split("/", 1)
+        get_metrics().count("request_outcomes_total", provider=provider, endpoint=endpoint, reason=name)
+        with self._lock:
+            counts = self._metrics.setdefault(key, {})
+            counts[name] = counts.get(name, 0) + 1
+
+
+_resilience = None
+_resilience_lock = threading.Lock()
+
+
+def get_resilience():
+    """
+    Returns the process-wide Resilience, creating it on first use.
+    """
+    global _resilience
+    with _resilience_lock:
+        if _resilience is None:
+            _resilience = Resilience()
+        return _resilience
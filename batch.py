@@ -0,0 +1,208 @@
+# batch.py
+"""
+Plays many all-AI games without prompts, spread over a pool of processes.
+
+Examples:
+    python batch.py --games 100 --players 8 --rounds 5 --backend local --processes 4
+    python batch.py --config batch.json
+
+A config file is a JSON object with any of the options below (use underscores, e.g.
+"failure_rate"); options given on the command line override it. Each game writes its drawings,
+its history log and a summary to its own directory, <output>/game_<number>, and with
+--export-chains a contact sheet and animation of every chain to <output>/game_<number>/chains.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+DEFAULTS = {
+    "games": 1,
+    "players": 4,
+    "rounds": 3,
+    "backend": "local",
+    "seed": 0,
+    "pipelined": False,
+    "max_workers": None,
+    "timeout": None,
+    "latency": 0.0,
+    "failure_rate": 0.0,
+    "processes": None,
+    "output": "batch_output",
+    "metrics": False,
+    "batch_guesses": 0,
+    "export_chains": False,
+}
+
+
+def make_backend(spec, game_number):
+    """
+    Returns the AI backend named in the spec. Each game gets its own seed.
+    """
+    if spec["backend"] == "local":
+        from ai.backends import LocalBackend
+
+        latency = spec["latency"]
+        if isinstance(latency, list):
+            latency = tuple(latency)
+        backend = LocalBackend(seed=spec["seed"] + game_number, latency=latency, failure_rate=spec["failure_rate"])
+    elif spec["backend"] == "gemini":
+        from ai.backends import GeminiBackend
+
+        backend = GeminiBackend()
+    else:
+        raise ValueError(f"Unknown backend: {spec['backend']}")
+    if spec["batch_guesses"] > 1:
+        from ai.backends import BatchedGuesses
+
+        backend = BatchedGuesses(backend, batch_size=spec["batch_guesses"])
+    return backend
+
+
+def play_game(spec, game_number):
+    """
+    Plays one game in a worker process and returns its summary.
+    """
+    from game.ai_player import AIPlayer
+    from game.game import Game
+
+    from utils.metrics import get_metrics
+
+    game_dir = os.path.join(spec["output"], f"game_{game_number:05d}")
+    metrics = get_metrics()
+    if spec["metrics"]:
+        # Worker processes are reused across games, so each game starts from empty metrics
+        metrics.reset()
+        metrics.enable()
+    drawings_dir = os.path.join(game_dir, "drawings")
+    backend = make_backend(spec, game_number)
+    players = [
+        AIPlayer(f"AI Bot {i}", backend=backend, drawings_dir=drawings_dir)
+        for i in range(1, spec["players"] + 1)
+    ]
+    game = Game(
+        players,
+        max_workers=spec["max_workers"],
+        timeout=spec["timeout"],
+        pipelined=spec["pipelined"],
+        history_path=os.path.join(game_dir, "history.jsonl"),
+        seed=spec["seed"] + game_number,
+    )
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        game.start(rounds=spec["rounds"])
+    wall = time.perf_counter() - started
+
+    fallbacks = sum(
+        1
+        for round_data in game.history
+        for output in list(round_data["texts"].values()) + list(round_data["drawings"].values())
+        if output in ("No prompt", "No guess", "No drawing")
+    )
+    summary = {
+        "game": game_number,
+        "seed": spec["seed"] + game_number,
+        "players": spec["players"],
+        "rounds": game.round,
+        "actions": spec["players"] * game.round * 2,
+        "fallbacks": fallbacks,
+        "wall_s": round(wall, 6),
+    }
+    with open(os.path.join(game_dir, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=4)
+    if spec["export_chains"]:
+        from ui.chain_export import export_chains
+
+        # Games already run in parallel, so each renders its chains in its own process
+        export_chains(game.history, os.path.join(game_dir, "chains"), processes=0)
+    if spec["metrics"]:
+        metrics.export_trace(os.path.join(game_dir, "trace.json"))
+        metrics.export_prometheus(os.path.join(game_dir, "metrics.prom"))
+    return summary
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Play many all-AI games in parallel without prompts.")
+    parser.add_argument("--config", help="JSON file with the batch spec")
+    parser.add_argument("--games", type=int)
+    parser.add_argument("--players", type=int)
+    parser.add_argument("--rounds", type=int)
+    parser.add_argument("--backend", choices=["local", "gemini"])
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--pipelined", action="store_true", default=None)
+    parser.add_argument("--max-workers", type=int, help="Concurrent player calls per game")
+    parser.add_argument("--timeout", type=float, help="Seconds before a player call falls back")
+    parser.add_argument("--latency", type=float, help="Seconds per call of the local backend")
+    parser.add_argument("--failure-rate", type=float, help="Failure probability of the local backend")
+    parser.add_argument("--processes", type=int, help="Number of games played at once")
+    parser.add_argument("--output", help="Directory that receives one subdirectory per game")
+    parser.add_argument("--batch-guesses", type=int, help="Guess up to this many drawings per request")
+    parser.add_argument("--export-chains", action="store_true", default=None,
+                        help="Render every chain to a PNG contact sheet and animations")
+    parser.add_argument("--metrics", action="store_true", default=None,
+                        help="Write a JSON trace and Prometheus metrics for each game")
+    args = parser.parse_args(argv)
+
+    spec = dict(DEFAULTS)
+    if args.config:
+        with open(args.config) as f:
+            config = json.load(f)
+        unknown = set(config) - set(DEFAULTS)
+        if unknown:
+            parser.error(f"Unknown options in {args.config}: {', '.join(sorted(unknown))}")
+        spec.update(config)
+    spec.update({key: value for key, value in vars(args).items() if key in DEFAULTS and value is not None})
+
+    if spec["players"] < 3:
+        parser.error("The game requires at least 3 players to avoid self-assignment.")
+    if spec["games"] < 1 or spec["rounds"] < 1:
+        parser.error("The number of games and rounds must be positive.")
+    return spec
+
+
+def main(argv=None):
+    spec = parse_args(argv)
+    os.makedirs(spec["output"], exist_ok=True)
+
+    started = time.perf_counter()
+    summaries = []
+    failed = 0
+    with ProcessPoolExecutor(max_workers=spec["processes"]) as executor:
+        futures = {executor.submit(play_game, spec, number): number for number in range(1, spec["games"] + 1)}
+        for future in as_completed(futures):
+            try:
+                summaries.append(future.result())
+            except Exception as exc:
+                failed += 1
+                print(f"Game {futures[future]} failed: {exc}", file=sys.stderr)
+    wall = time.perf_counter() - started
+
+    actions = sum(summary["actions"] for summary in summaries)
+    aggregate = {
+        "games": len(summaries),
+        "failed_games": failed,
+        "actions": actions,
+        "fallbacks": sum(summary["fallbacks"] for summary in summaries),
+        "wall_s": round(wall, 3),
+        "games_per_s": round(len(summaries) / wall, 3) if wall else None,
+        "actions_per_s": round(actions / wall, 3) if wall else None,
+        "mean_game_s": round(sum(s["wall_s"] for s in summaries) / len(summaries), 3) if summaries else None,
+    }
+    with open(os.path.join(spec["output"], "batch_summary.json"), "w") as f:
+        json.dump({"spec": spec, "summary": aggregate}, f, indent=4)
+
+    print(
+        f"Played {aggregate['games']} games ({failed} failed) in {aggregate['wall_s']}s: "
+        f"{aggregate['games_per_s']} games/s, {aggregate['actions_per_s']} player-actions/s, "
+        f"{aggregate['fallbacks']} fallbacks"
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
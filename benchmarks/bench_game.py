@@ -0,0 +1,185 @@
+# benchmarks/bench_game.py
+"""
+Headless benchmark of full games against the offline LocalBackend.
+
+Run from the repository root:
+    python -m benchmarks.bench_game --players 3 10 50 --rounds 3 5 --output results.jsonl
+
+Every configuration runs in a fresh process, so peak RSS is measured per configuration.
+Results are written as JSON lines, one per configuration, with a fixed set of keys
+(see RESULT_SCHEMA) so runs from different releases can be compared.
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+RESULT_SCHEMA = 1
+
+DEFAULT_PLAYERS = [3, 10, 50, 100, 500]
+DEFAULT_ROUNDS = [3, 5]
+
+
+class ThreadSampler:
+    """
+    Samples the number of live threads in the background and keeps the peak.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            # The sampler thread itself is not part of the game
+            self.peak = max(self.peak, threading.active_count() - 1)
+            self._stop.wait(self.interval)
+
+
+def run_game(config):
+    """
+    Plays one headless game and returns its measurements. Runs in a worker process.
+    """
+    from ai.backends import LocalBackend
+    from game.ai_player import AIPlayer
+    from game.game import Game
+    from utils.metrics import get_metrics
+
+    backend = LocalBackend(seed=config["seed"], latency=config["latency"], failure_rate=config["failure_rate"])
+    players = [AIPlayer(f"AI Bot {i}", backend=backend) for i in range(1, config["players"] + 1)]
+    game = Game(players, max_workers=config["max_workers"], pipelined=config["mode"] == "pipelined",
+                seed=config["seed"])
+    # Phase times come from the provide_input spans, which both modes record
+    metrics = get_metrics()
+    metrics.reset()
+    metrics.enable()
+
+    # Drawings and logs go to a directory of their own, removed with everything in it after the game
+    with (
+        tempfile.TemporaryDirectory(prefix="gentic-bench-") as workdir,
+        contextlib.chdir(workdir),
+        ThreadSampler() as sampler,
+        contextlib.redirect_stdout(io.StringIO()),
+    ):
+        started = time.perf_counter()
+        game.start(rounds=config["rounds"])
+        wall = time.perf_counter() - started
+
+    actions = config["players"] * config["rounds"] * 2  # One text or guess and one drawing per player per round
+    return {
+        "schema": RESULT_SCHEMA,
+        **config,
+        "wall_s": round(wall, 6),
+        "phase_s": phase_seconds(metrics.spans("provide_input")),
+        "actions": actions,
+        "actions_per_s": round(actions / wall, 3) if wall else None,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "peak_threads": sampler.peak,
+        "backend_calls": dict(backend.calls),
+        "backend_failures": dict(backend.failures),
+        "python": platform.python_version(),
+    }
+
+
+def phase_seconds(spans):
+    """
+    Returns the wall time during which at least one turn of each phase was running, from the
+    provide_input spans. Round by round this is the time spent in the phase; in pipelined play the
+    phases overlap, so the times add up to more than the wall time of the game.
+    """
+    intervals = {}
+    for _, labels, started, duration in spans:
+        intervals.setdefault(labels["phase"], []).append((started, started + duration))
+    seconds = {}
+    for phase, phase_intervals in sorted(intervals.items()):
+        total = 0.0
+        end = None
+        for started, finished in sorted(phase_intervals):
+            if end is None or started > end:
+                total += finished - started
+                end = finished
+            elif finished > end:
+                total += finished - end
+                end = finished
+        seconds[phase] = round(total, 6)
+    return seconds
+
+
+def parse_latency(value):
+    """
+    Parses "0.05" as a fixed latency and "0.01:0.2" as a uniform range.
+    """
+    if ":" in value:
+        low, high = value.split(":")
+        return (float(low), float(high))
+    return float(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark headless games against the offline backend.")
+    parser.add_argument("--players", type=int, nargs="+", default=DEFAULT_PLAYERS)
+    parser.add_argument("--rounds", type=int, nargs="+", default=DEFAULT_ROUNDS)
+    parser.add_argument("--mode", choices=["rounds", "pipelined"], nargs="+", default=["rounds"])
+    parser.add_argument("--latency", type=parse_latency, default=0.0,
+                        help="Seconds per backend call, or low:high for a random range")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--max-workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="File to append JSON lines to (default: stdout)")
+    args = parser.parse_args(argv)
+
+    configs = [
+        {
+            "players": players,
+            "rounds": rounds,
+            "mode": mode,
+            "latency": args.latency,
+            "failure_rate": args.failure_rate,
+            "max_workers": args.max_workers,
+            "seed": args.seed,
+        }
+        for mode in args.mode
+        for rounds in args.rounds
+        for players in args.players
+    ]
+
+    output = open(args.output, "a") if args.output else sys.stdout
+    context = multiprocessing.get_context("spawn")
+    try:
+        for config in configs:
+            # A fresh process per configuration keeps peak RSS and thread counts independent
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(run_game, config).result()
+            output.write(json.dumps(result, sort_keys=True) + "\n")
+            output.flush()
+            print(
+                f"{result['mode']:>9} players={result['players']:<4} rounds={result['rounds']:<3} "
+                f"wall={result['wall_s']:.3f}s actions/s={result['actions_per_s']:.1f} "
+                f"rss={result['peak_rss_kb'] / 1024:.1f}MB threads={result['peak_threads']}",
+                file=sys.stderr,
+            )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# benchmarks/import_time.py
+"""
+Startup benchmark: how long importing the entry points takes, and which heavy dependencies
+they load before any code path needs them.
+
+Run from the repository root:
+    python -m benchmarks.import_time --budget 0.3
+
+Each module is imported in a fresh interpreter, --repeat times, and the fastest import counts.
+Prints one JSON line per module and exits with 1 if any import takes longer than the budget or
+loads one of HEAVY_MODULES, which should only be imported when a provider or a window is first used.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+DEFAULT_MODULES = ["main", "batch", "server.app", "game.game"]
+
+# Modules that take a noticeable part of a second to import, or need a display
+HEAVY_MODULES = ["google.generativeai", "pollinations", "requests", "tkinter", "PIL.ImageTk"]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+print(json.dumps({{"seconds": seconds, "heavy": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def measure(module, repeat):
+    """
+    Imports module in repeat fresh interpreters.
+
+    Returns:
+        dict: The fastest import in seconds and the heavy modules it loaded.
+    """
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    fastest = min(runs, key=lambda run: run["seconds"])
+    return {"seconds": round(fastest["seconds"], 4), "heavy": fastest["heavy"]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the import time of the entry points.")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=0.3, help="Seconds each import may take")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        result = measure(module, args.repeat)
+        within = result["seconds"] <= args.budget and not result["heavy"]
+        failed = failed or not within
+        print(json.dumps({"module": module, **result, "budget": args.budget, "ok": within}))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+# benchmarks/load_server.py
+"""
+Load test of the lobby server: starts a GameServer with the offline LocalBackend on localhost
+and drives many simulated human clients over HTTP and WebSocket.
+
+Run from the repository root:
+    python -m benchmarks.load_server --lobbies 100 --humans 3 --ai-players 1 --rounds 3
+
+Prints one JSON object with the time to finish every lobby, the latency from a turn being pushed
+to its answer being accepted, and the number of fallbacks and failed lobbies.
+"""
+import argparse
+import asyncio
+import base64
+import contextlib
+import io
+import json
+import random
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode
+
+from PIL import Image, ImageDraw
+
+from server.app import GameServer
+from server.websocket import ConnectionClosed, connect
+
+
+async def http(host, port, method, path, payload=None):
+    """
+    Sends one HTTP request and returns the status and decoded JSON body.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    writer.write(
+        (f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode("latin-1") + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, data = response.partition(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    return status, json.loads(data) if data else None
+
+
+def doodle(rng):
+    """
+    Returns a small random line drawing as base64 PNG, like a human's quick sketch.
+    """
+    image = Image.new("L", (400, 400), "white")
+    draw = ImageDraw.Draw(image)
+    draw.line([(rng.randrange(400), rng.randrange(400)) for _ in range(12)], fill="black", width=2)
+    byte_io = io.BytesIO()
+    image.save(byte_io, format="PNG")
+    return base64.b64encode(byte_io.getvalue()).decode("ascii")
+
+
+async def client(host, port, lobby_id, name, token, rng, think, doodles, stats):
+    """
+    Plays as one human over a WebSocket until the game is over.
+    """
+    socket = await connect(host, port, f"/lobbies/{lobby_id}/ws?{urlencode({'name': name, 'token': token})}")
+    pushed = {}
+    try:
+        while True:
+            message = json.loads(await socket.receive())
+            kind = message.get("type")
+            if kind == "turn":
+                if message["turn"] in pushed:
+                    continue  # Sent again because it was published while the client was connecting
+                pushed[message["turn"]] = time.perf_counter()
+                await asyncio.sleep(rng.uniform(*think))
+                answer = {"type": "submit", "turn": message["turn"]}
+                if message["phase"] == "draw":
+                    answer["image"] = rng.choice(doodles)
+                else:
+                    answer["text"] = f"A guess by {name} in round {message['round']}"
+                await socket.send(json.dumps(answer))
+            elif kind == "accepted":
+                stats["turn_latencies"].append(time.perf_counter() - pushed.pop(message["turn"]))
+            elif kind == "timeout":
+                stats["timeouts"] += 1
+            elif kind == "error":
+                stats["errors"] += 1
+            elif kind == "game_over":
+                return
+    except ConnectionClosed:
+        stats["disconnects"] += 1
+    finally:
+        await socket.close()
+
+
+async def lobby(host, port, args, number, doodles, stats):
+    """
+    Creates a lobby, joins every human seat and plays until the game is over.
+    """
+    started = time.perf_counter()
+    status, summary = await http(host, port, "POST", "/lobbies", {
+        "humans": args.humans, "ai_players": args.ai_players, "rounds": args.rounds, "seed": number,
+    })
+    if status != 201:
+        stats["failed_lobbies"] += 1
+        return
+    joined = []
+    for seat in range(args.humans):
+        status, seat_info = await http(host, port, "POST", f"/lobbies/{summary['id']}/join", {"name": f"Human {seat}"})
+        if status != 201:
+            stats["failed_lobbies"] += 1
+            return
+        joined.append(seat_info)
+    rng = random.Random(number)
+    await asyncio.gather(*(
+        client(host, port, summary["id"], seat_info["player"], seat_info["token"], rng, args.think, doodles, stats)
+        for seat_info in joined
+    ))
+    status, history = await http(host, port, "GET", f"/lobbies/{summary['id']}/history")
+    stats["fallbacks"] += sum(
+        1
+        for round_data in history
+        for output in list(round_data["texts"].values()) + list(round_data["drawings"].values())
+        if output in ("No prompt", "No guess", "No drawing")
+    )
+    stats["lobby_seconds"].append(time.perf_counter() - started)
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 4)
+
+
+async def run(args):
+    from ai.backends import LocalBackend
+
+    backend = LocalBackend(seed=args.seed, latency=args.latency)
+    with tempfile.TemporaryDirectory() as directory:
+        server = GameServer(backend=backend, directory=directory, max_lobbies=args.lobbies,
+                            turn_timeout=args.turn_timeout)
+        port = await server.start("127.0.0.1", 0)
+        stats = {"turn_latencies": [], "lobby_seconds": [], "timeouts": 0, "errors": 0, "disconnects": 0,
+                 "fallbacks": 0, "failed_lobbies": 0}
+        # Drawn up front so the clients, which share the event loop with the server, stay cheap
+        rng = random.Random(args.seed)
+        doodles = [doodle(rng) for _ in range(16)]
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            lobby("127.0.0.1", port, args, number, doodles, stats) for number in range(args.lobbies)
+        ))
+        wall = time.perf_counter() - started
+        await server.stop()
+
+    return {
+        "lobbies": args.lobbies,
+        "clients": args.lobbies * args.humans,
+        "ai_players": args.lobbies * args.ai_players,
+        "rounds": args.rounds,
+        "wall_s": round(wall, 3),
+        "lobby_p50_s": percentile(stats["lobby_seconds"], 0.5),
+        "lobby_max_s": percentile(stats["lobby_seconds"], 1.0),
+        "turns": len(stats["turn_latencies"]),
+        "turn_p50_s": percentile(stats["turn_latencies"], 0.5),
+        "turn_p99_s": percentile(stats["turn_latencies"], 0.99),
+        "timeouts": stats["timeouts"],
+        "errors": stats["errors"],
+        "disconnects": stats["disconnects"],
+        "fallbacks": stats["fallbacks"],
+        "failed_lobbies": stats["failed_lobbies"],
+    }
+
+
+def parse_range(value):
+    low, _, high = value.partition(":")
+    return (float(low), float(high or low))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive simulated clients against a local lobby server.")
+    parser.add_argument("--lobbies", type=int, default=100)
+    parser.add_argument("--humans", type=int, default=3, help="Simulated human clients per lobby")
+    parser.add_argument("--ai-players", type=int, default=1, help="AI players per lobby")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--think", type=parse_range, default=(0.0, 0.05),
+                        help="Seconds a client waits before answering, as low:high")
+    parser.add_argument("--latency", type=float, default=0.01, help="Seconds per call of the local backend")
+    parser.add_argument("--turn-timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    if args.humans + args.ai_players < 3:
+        parser.error("The game requires at least 3 players to avoid self-assignment.")
+
+    # The games print their progress; keep the output to the result
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = asyncio.run(run(args))
+    print(json.dumps(result))
+    return 1 if result["failed_lobbies"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,36 +1,42 @@
 # game/ai_player.py
 import os
 
-import google.generativeai as genai
-import pollinations
-
-from ai.ai_logic import generate_ai_drawing, generate_ai_guess, generate_ai_text
+from ai.backends import GeminiBackend
+from ai.rate_limiter import request_priority
 from game.player import Player
 from ui.console_ui import display_message
+from utils.metrics import get_metrics
+
+
+# Order of the phases within a round, for request priorities
+PHASE_ORDER = {'create_text': 0, 'guess_text': 0, 'draw': 1}
 
 
 class AIPlayer(Player):
-    def __init__(self, name):
+    concurrent_input = True
+
+    def __init__(self, name, backend=None, cache_drawings=True, drawings_dir=os.path.join("assets", "drawings")):
         Player.__init__(self, name)
-        genai.configure(api_key=os.environ["API_KEY"])
-        
-        self.model = genai.GenerativeModel("gemini-1.5-flash")
-        self.image_model = pollinations.image(
-            model = pollinations.flux,
-            width = 400,
-            height = 400,
-            enhance = False,
-            nologo = True,
-        )
+        self.drawings_dir = drawings_dir
+        # The AIBackend that writes, guesses and draws for this player. Defaults to Gemini and
+        # pollinations; drawings of a prompt seen before are reused unless cache_drawings is False.
+        self.backend = backend or GeminiBackend(cache_drawings=cache_drawings)
     
     def provide_input(self, previous_output, phase, round):
+        # Requests for earlier rounds hold up the game the longest, so they are sent first
+        with request_priority((round, PHASE_ORDER.get(phase, 0))):
+            return self.respond(previous_output, phase, round)
+
+    def respond(self, previous_output, phase, round):
         if phase == 'create_text':
-            ai_text = generate_ai_text(self.model)
+            with get_metrics().span("backend", kind="text"):
+                ai_text = self.backend.generate_text()
             display_message(f"{self.name} (AI) provided text")
             return ai_text
         elif phase == 'guess_text':
             if previous_output:
-                ai_guess = generate_ai_guess(previous_output, self.model)
+                with get_metrics().span("backend", kind="guess"):
+                    ai_guess = self.backend.generate_guess(previous_output)
                 display_message(f"{self.name} (AI) guessed")
                 return ai_guess
             else:
@@ -40,11 +46,12 @@ class AIPlayer(Player):
         elif phase == 'draw':
             if isinstance(previous_output, str) and previous_output not in ["No prompt", "No guess"]:
                 # Assuming previous_output is a text prompt or a guess
-                ai_drawing = generate_ai_drawing(previous_output, self.image_model)
-                drawings_dir = os.path.join("assets", "drawings")
-                os.makedirs(drawings_dir, exist_ok=True)
-                drawing_path = f"{drawings_dir}/{self.name}_drawing_{round}.png"
-                # Here, generate_ai_drawing should return image bytes
+                with get_metrics().span("backend", kind="drawing"):
+                    ai_drawing = self.backend.generate_drawing(previous_output)
+                get_metrics().count("drawing_bytes_total", len(ai_drawing), kind="saved")
+                os.makedirs(self.drawings_dir, exist_ok=True)
+                drawing_path = f"{self.drawings_dir}/{self.name}_drawing_{round}.png"
+                # Here, generate_drawing should return image bytes
                 try:
                     with open(drawing_path, 'wb') as f:
                         f.write(ai_drawing)
@@ -0,0 +1,103 @@
+# game/chains.py
+from collections import defaultdict
+
+
+class ChainIndex:
+    """
+    Indexes a game history by chain and round, so a chain can be followed without searching.
+
+    A chain is identified by the name of the player who wrote its text in round 1. Games record
+    the chain of every text and drawing in each round's "text_chains" and "drawing_chains";
+    for older histories without them, the chains are inferred from the assignments.
+
+    Parameters:
+        history (list): Round data dictionaries, as in Game.history.
+    """
+
+    def __init__(self, history):
+        self.history = history
+        self._entries = {}  # Maps (chain_id, round index) to {"text": (player, text), "drawing": (player, path)}
+        self._chain_ids = list(history[0].get("texts", {})) if history else []
+        previous_round = None
+        previous_drawing_chains = {}
+        for index, round_data in enumerate(history):
+            text_chains, drawing_chains = chains_of_round(round_data, previous_round, previous_drawing_chains)
+            for player_name, chain_id in text_chains.items():
+                entry = self._entries.setdefault((chain_id, index), {})
+                entry["text"] = (player_name, round_data["texts"][player_name])
+            for player_name, chain_id in drawing_chains.items():
+                entry = self._entries.setdefault((chain_id, index), {})
+                entry["drawing"] = (player_name, round_data.get("drawings", {}).get(player_name, "No drawing"))
+            previous_round = round_data
+            previous_drawing_chains = drawing_chains
+
+    def chain_ids(self):
+        """
+        Returns the chain ids in the order their texts were written in round 1.
+        """
+        return list(self._chain_ids)
+
+    def entry(self, chain_id, round_index):
+        """
+        Returns the entry of a chain in a round (0-based): a dictionary with the "text" and
+        "drawing" of that round as (player, content) tuples, or None if the chain has none.
+        """
+        return self._entries.get((chain_id, round_index))
+
+    def chain(self, chain_id):
+        """
+        Returns the steps of a chain in order, as dictionaries with 'player', 'action'
+        ('Text', 'Drawing' or 'Guess') and 'content'.
+        """
+        steps = []
+        for index in range(len(self.history)):
+            entry = self._entries.get((chain_id, index), {})
+            if "text" not in entry:
+                break
+            player_name, text = entry["text"]
+            steps.append({'player': player_name, 'action': 'Text' if index == 0 else 'Guess', 'content': text})
+            if "drawing" not in entry:
+                break
+            player_name, drawing = entry["drawing"]
+            steps.append({'player': player_name, 'action': 'Drawing', 'content': drawing})
+        return steps
+
+    def chains(self):
+        """
+        Returns a dictionary mapping every chain id to its steps.
+        """
+        return {chain_id: self.chain(chain_id) for chain_id in self._chain_ids}
+
+
+def chains_of_round(round_data, previous_round=None, previous_drawing_chains=None):
+    """
+    Returns which chain each text and each drawing of a round belongs to, as two dictionaries
+    mapping player names to chain ids. Uses the recorded chains when present and otherwise
+    infers them from the assignments and the previous round.
+    """
+    if "text_chains" in round_data:
+        return round_data["text_chains"], round_data.get("drawing_chains", {})
+
+    texts = round_data.get("texts", {})
+    if previous_round is None:
+        text_chains = {player_name: player_name for player_name in texts}
+    else:
+        # Each guess belongs to the chain of the drawing it was made from
+        previous_drawings = previous_round.get("drawings", {})
+        drawing_owners = defaultdict(list)
+        for drawer, chain_id in (previous_drawing_chains or {}).items():
+            drawing_owners[previous_drawings.get(drawer)].append(chain_id)
+        text_chains = {}
+        for player_name, drawing in round_data.get("guess_assignments", {}).items():
+            if drawing_owners.get(drawing) and player_name in texts:
+                text_chains[player_name] = drawing_owners[drawing].pop(0)
+
+    # Each drawing belongs to the chain of the text it was made from
+    text_owners = defaultdict(list)
+    for player_name, chain_id in text_chains.items():
+        text_owners[texts[player_name]].append(chain_id)
+    drawing_chains = {}
+    for player_name, text in round_data.get("draw_assignments", {}).items():
+        if text_owners.get(text):
+            drawing_chains[player_name] = text_owners[text].pop(0)
+    return text_chains, drawing_chains
@@ -0,0 +1,317 @@
+# game/drift.py
+"""
+Scores how far each chain drifted from its first prompt, over any number of stored games.
+
+Every text of a chain (the prompt and the guesses, in order) is embedded as a hashed character
+n-gram TF-IDF vector, and the drift between two texts is one minus their cosine similarity.
+Hashing, counting and the similarity matrices are done in NumPy for whole batches of texts and
+chains at once, and a DriftIndex keeps the vectors of the games it has seen, so adding new games
+only embeds and scores those.
+
+Run from the repository root on one or more history logs:
+    python -m game.drift batch_output/*/history.jsonl --index drift_index.npz --top 20
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+import numpy as np
+
+from game.chains import ChainIndex
+from game.history_log import load_history
+
+# Number of hash buckets of the text vectors; a power of two
+DIMENSIONS = 4096
+NGRAM_RANGE = (2, 4)
+# Texts recorded in place of a missing one; they are left out of the chains
+SENTINELS = {"No prompt", "No guess"}
+# Upper bound on the size of the dense vector block scored at once, in bytes
+BLOCK_BYTES = 64 * 1024 * 1024
+
+_PRIME = np.uint64(0x100000001B3)
+_MIX = np.uint64(0xBF58476D1CE4E5B9)
+
+
+def normalize_text(text):
+    """
+    Lowercases a text and collapses whitespace and punctuation, so "A cat." and "a cat" embed alike.
+    """
+    return re.sub(r"[\W_]+", " ", str(text).lower()).strip()
+
+
+def hash_ngrams(texts, ngram_range=NGRAM_RANGE, dimensions=DIMENSIONS):
+    """
+    Hashes the character n-grams of many texts at once.
+
+    All texts are joined into one byte array, with NUL separators, and the polynomial hash of every
+    window of each length in ngram_range is computed with array arithmetic; windows that cross a
+    separator are dropped.
+
+    Returns:
+        tuple: Two arrays of equal length, the index of the text each n-gram came from and its bucket.
+    """
+    data = b"\x00".join(f" {normalize_text(text)} ".encode("utf-8") for text in texts)
+    values = np.frombuffer(data, dtype=np.uint8).astype(np.uint64)
+    separators = np.concatenate(([0], np.cumsum(values == 0)))  # separators[i]: NULs before position i
+    docs, buckets = [], []
+    with np.errstate(over="ignore"):  # The hashes are meant to wrap around
+        for n in range(ngram_range[0], ngram_range[1] + 1):
+            count = len(values) - n + 1
+            if count <= 0:
+                continue
+            hashes = np.zeros(count, dtype=np.uint64)
+            for offset in range(n):
+                hashes = hashes * _PRIME + values[offset:offset + count]
+            hashes = (hashes ^ (hashes >> np.uint64(31))) * _MIX
+            hashes ^= hashes >> np.uint64(29)
+            within = separators[n:n + count] == separators[:count]
+            docs.append(separators[:count][within])
+            buckets.append((hashes[within] & np.uint64(dimensions - 1)).astype(np.int64))
+    if not docs:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(docs).astype(np.int64), np.concatenate(buckets)
+
+
+def term_frequencies(texts, ngram_range=NGRAM_RANGE, dimensions=DIMENSIONS):
+    """
+    Returns the sparse term frequencies of texts in CSR form: row pointers, buckets and
+    sublinear frequencies (1 + log count), one row per text.
+    """
+    docs, buckets = hash_ngrams(texts, ngram_range, dimensions)
+    keys, counts = np.unique(docs * dimensions + buckets, return_counts=True)
+    rows = keys // dimensions
+    indptr = np.zeros(len(texts) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(texts)), out=indptr[1:])
+    return indptr, (keys % dimensions).astype(np.int32), (1.0 + np.log(counts)).astype(np.float32)
+
+
+def chain_texts(history):
+    """
+    Returns (chain id, texts) for every chain of a game: its prompt and guesses in order,
+    without the fallback texts of missed turns.
+    """
+    index = ChainIndex(history)
+    chains = []
+    for chain_id in index.chain_ids():
+        texts = [step["content"] for step in index.chain(chain_id)
+                 if step["action"] != "Drawing" and step["content"] not in SENTINELS]
+        chains.append((chain_id, texts))
+    return chains
+
+
+class DriftIndex:
+    """
+    Text vectors and drift scores of the chains of many games.
+
+    The term frequencies of every text are kept in CSR arrays, with the document frequency of each
+    bucket, so IDF weights can be applied to any batch. add_games embeds and scores only the new
+    games, weighting them with the IDF of everything indexed so far; refresh() rescores all
+    chains with the current IDF.
+
+    Parameters:
+        dimensions (int): Number of hash buckets; a power of two.
+        ngram_range (tuple): Smallest and largest n-gram length.
+    """
+
+    def __init__(self, dimensions=DIMENSIONS, ngram_range=NGRAM_RANGE):
+        if dimensions & (dimensions - 1):
+            raise ValueError("dimensions must be a power of two")
+        self.dimensions = dimensions
+        self.ngram_range = tuple(ngram_range)
+        self.games = []  # Game ids, in the order they were added
+        self.chains = []  # (game index, chain id) of every chain
+        self.chain_starts = np.zeros(1, dtype=np.int64)  # Chain c holds text rows chain_starts[c]:chain_starts[c + 1]
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.data = np.zeros(0, dtype=np.float32)
+        self.document_frequency = np.zeros(dimensions, dtype=np.int64)
+        self.drift = np.zeros(0, dtype=np.float32)  # Drift from the first text to the last, per chain
+        self.texts = []  # The normalized texts, by row, for reports
+
+    def __len__(self):
+        return len(self.chains)
+
+    def add_game(self, history, game_id=None):
+        return self.add_games([(game_id if game_id is not None else len(self.games), history)])
+
+    def add_games(self, games):
+        """
+        Indexes and scores new games.
+
+        Parameters:
+            games (list): (game id, history) pairs; a history is Game.history or a list of round data.
+                Games whose id is already indexed are skipped.
+
+        Returns:
+            range: The indices of the chains added.
+        """
+        first_chain = len(self.chains)
+        known = set(self.games)
+        texts, lengths = [], []
+        for game_id, history in games:
+            if game_id in known:
+                continue
+            known.add(game_id)
+            self.games.append(game_id)
+            for chain_id, chain in chain_texts(history):
+                self.chains.append((len(self.games) - 1, chain_id))
+                texts.extend(chain)
+                lengths.append(len(chain))
+        if not lengths:
+            return range(first_chain, first_chain)
+
+        indptr, indices, data = term_frequencies(texts, self.ngram_range, self.dimensions)
+        self.document_frequency += np.bincount(indices, minlength=self.dimensions)
+        self.indptr = np.concatenate((self.indptr, indptr[1:] + self.indptr[-1]))
+        self.indices = np.concatenate((self.indices, indices))
+        self.data = np.concatenate((self.data, data))
+        self.chain_starts = np.concatenate((self.chain_starts, np.cumsum(lengths) + self.chain_starts[-1]))
+        self.texts.extend(normalize_text(text) for text in texts)
+
+        added = range(first_chain, len(self.chains))
+        self.drift = np.concatenate((self.drift, self.final_drift(np.arange(added.start, added.stop))))
+        return added
+
+    def refresh(self):
+        """
+        Rescores every chain with the IDF of all indexed texts.
+        """
+        self.drift = self.final_drift(np.arange(len(self.chains)))
+
+    def idf(self):
+        documents = len(self.indptr) - 1
+        return (np.log((1.0 + documents) / (1.0 + self.document_frequency)) + 1.0).astype(np.float32)
+
+    def vectors(self, chains):
+        """
+        Returns the L2-normalized TF-IDF vectors of the given chains as an array of shape
+        (chains, longest chain, dimensions), zero-padded, and the length of each chain.
+        """
+        starts = self.chain_starts[chains]
+        lengths = self.chain_starts[chains + 1] - starts
+        longest = int(lengths.max()) if len(lengths) else 0
+        block = np.zeros((len(chains), longest, self.dimensions), dtype=np.float32)
+        if longest == 0:
+            return block, lengths
+        # Every text row of the chains, with its chain and its position in the chain
+        chain_of_row = np.repeat(np.arange(len(chains)), lengths)
+        rows = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + np.repeat(starts, lengths)
+        position = rows - np.repeat(starts, lengths)
+        entries = self.indptr[rows + 1] - self.indptr[rows]
+        nonzero = np.repeat(self.indptr[rows], entries) + (
+            np.arange(entries.sum()) - np.repeat(np.cumsum(entries) - entries, entries))
+        block[np.repeat(chain_of_row, entries), np.repeat(position, entries), self.indices[nonzero]] = (
+            self.data[nonzero] * self.idf()[self.indices[nonzero]])
+        norms = np.linalg.norm(block, axis=2, keepdims=True)
+        np.divide(block, norms, out=block, where=norms > 0)
+        return block, lengths
+
+    def matrices(self, chains):
+        """
+        Returns the drift matrices of the given chain indices, as an array of shape
+        (chains, longest chain, longest chain) where entry [c, i, j] is the drift between texts i
+        and j of chain c, and the length of each chain. Entries past a chain's length are NaN.
+        """
+        chains = np.asarray(chains, dtype=np.int64)
+        results, all_lengths = [], []
+        longest = int((self.chain_starts[chains + 1] - self.chain_starts[chains]).max()) if len(chains) else 0
+        # Chains per block, so the dense vectors stay within BLOCK_BYTES
+        per_block = max(1, BLOCK_BYTES // max(1, longest * self.dimensions * 4))
+        for start in range(0, len(chains), per_block):
+            block, lengths = self.vectors(chains[start:start + per_block])
+            drift = 1.0 - np.einsum("cid,cjd->cij", block, block)
+            # Chains are padded to the longest of the block; pad the result to the longest overall
+            padded = np.full((len(lengths), longest, longest), np.nan, dtype=np.float32)
+            size = drift.shape[1]
+            padded[:, :size, :size] = drift
+            valid = np.arange(longest) < lengths[:, None]
+            padded[~(valid[:, :, None] & valid[:, None, :])] = np.nan
+            results.append(padded)
+            all_lengths.append(lengths)
+        if not results:
+            return np.zeros((0, 0, 0), dtype=np.float32), np.zeros(0, dtype=np.int64)
+        return np.concatenate(results), np.concatenate(all_lengths)
+
+    def final_drift(self, chains):
+        """
+        Returns the drift from the first text to the last of the given chain indices.
+        Chains with fewer than two texts have no drift (NaN).
+        """
+        matrices, lengths = self.matrices(chains)
+        if not len(lengths):
+            return np.zeros(0, dtype=np.float32)
+        last = np.maximum(lengths - 1, 0)
+        drift = matrices[np.arange(len(lengths)), 0, last]
+        return np.where(lengths >= 2, drift, np.nan).astype(np.float32)
+
+    def rank(self, top=None):
+        """
+        Returns the chains that drifted furthest first, as dictionaries with the game id, chain id,
+        drift, number of texts and the first and last text.
+        """
+        order = np.argsort(-np.nan_to_num(self.drift, nan=-1.0), kind="stable")
+        ranking = []
+        for chain in order:
+            game, chain_id = self.chains[chain]
+            start, end = self.chain_starts[chain], self.chain_starts[chain + 1]
+            if end - start < 2 or (top is not None and len(ranking) >= top):
+                break  # Chains without drift sort last
+            ranking.append({
+                "game": self.games[game],
+                "chain": chain_id,
+                "drift": round(float(self.drift[chain]), 4),
+                "texts": int(end - start),
+                "first": self.texts[start],
+                "last": self.texts[end - 1],
+            })
+        return ranking
+
+    def save(self, path):
+        """
+        Writes the index to a NumPy .npz file.
+        """
+        meta = {"dimensions": self.dimensions, "ngram_range": self.ngram_range, "games": self.games,
+                "chains": self.chains, "texts": self.texts}
+        np.savez_compressed(path, indptr=self.indptr, indices=self.indices, data=self.data,
+                            chain_starts=self.chain_starts, document_frequency=self.document_frequency,
+                            drift=self.drift, meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            meta = json.loads(arrays["meta"].tobytes().decode("utf-8"))
+            index = cls(dimensions=meta["dimensions"], ngram_range=meta["ngram_range"])
+            for name in ("indptr", "indices", "data", "chain_starts", "document_frequency", "drift"):
+                setattr(index, name, arrays[name])
+        index.games = meta["games"]
+        index.chains = [tuple(chain) for chain in meta["chains"]]
+        index.texts = meta["texts"]
+        return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank the chains of stored games by how far they drifted.")
+    parser.add_argument("histories", nargs="+", help="History logs (JSON lines) written by games")
+    parser.add_argument("--index", help="Index file to extend with the new games and write back")
+    parser.add_argument("--top", type=int, default=20, help="Number of chains to show")
+    parser.add_argument("--refresh", action="store_true", help="Rescore every chain with the current IDF")
+    args = parser.parse_args(argv)
+
+    index = DriftIndex.load(args.index) if args.index and os.path.exists(args.index) else DriftIndex()
+    known = set(index.games)
+    paths = [os.path.abspath(path) for path in args.histories]
+    added = index.add_games([(path, load_history(path, repair=False)) for path in paths if path not in known])
+    if args.refresh:
+        index.refresh()
+    if args.index:
+        index.save(args.index)
+    print(f"Indexed {len(added)} new chains, {len(index)} in total")
+    for entry in index.rank(args.top):
+        print(json.dumps(entry))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,25 +1,70 @@
 # game/game.py
 
 import json
-import os
-import tkinter as tk
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from tkinter import ttk
-from tkinter.scrolledtext import ScrolledText
-
-from PIL import Image, ImageTk
+import random
 
+from game.phase_executor import PhaseExecutor
+from game.history_log import HistoryLog, load_history
+from game.history_store import HistoryStore
+from game.pipeline import PipelinedScheduler
 from ui.console_ui import display_message
-from utils.derangement import derangement
+from utils.derangement import AssignmentSchedule, derangement
+from utils.metrics import get_metrics
+
+
+def follow_chains(sources, chains):
+    """
+    Returns the chain each player continues, given whose work they received (sources)
+    and the chain of each piece of work (chains).
+    """
+    return {player_name: chains[source] for player_name, source in (sources or {}).items() if source in chains}
 
 
 class Game:
-    def __init__(self, players):
+    def __init__(self, players, max_workers=None, timeout=None, pipelined=False, history_path=None,
+                 phase_budgets=None, seed=None, history_memory_rounds=None):
         self.players = players  # List of Player instances
         self.round = 0
-        self.history = []  # To track game history
+        # To track game history; with history_memory_rounds set, older rounds are spilled to disk
+        self.history = HistoryStore(memory_rounds=history_memory_rounds)
+        # Runs every phase concurrently; max_workers caps calls in flight, timeout bounds each call
+        # and phase_budgets bounds each phase as a whole, e.g. {'draw': 90}
+        self.executor = PhaseExecutor(max_workers=max_workers, timeout=timeout, budgets=phase_budgets)
+        # In pipelined mode each chain advances on its own instead of waiting for the whole round
+        self.pipelined = pipelined
+        # Every finished round is appended to this JSON lines file, if set
+        self.history_path = history_path
+        self.history_log = None
+        # Seeds who receives whose work. Every recorded round carries it, so a resumed game keeps its
+        # assignments; a seed given here must match the one of a resumed log.
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.seed_given = seed is not None
+        self.schedule = None
 
     def start(self, rounds=5):
+        # Covers the rounds already played too, so chains keep moving to players they have not visited
+        self.schedule = AssignmentSchedule([player.name for player in self.players], self.round + rounds,
+                                           seed=self.seed)
+        if self.history_path:
+            # A new game starts a new log; a resumed one keeps appending to it
+            self.history_log = HistoryLog(self.history_path, append=self.round > 0)
+        try:
+            with get_metrics().span("game", mode="pipelined" if self.pipelined else "lockstep", rounds=rounds):
+                if self.pipelined:
+                    self.start_pipelined(rounds)
+                else:
+                    self.play_rounds(rounds)
+        finally:
+            if self.history_log is not None:
+                self.history_log.close()
+                self.history_log = None
+            # Releases the spill file; spilled rounds are read back from it if the history is shown
+            self.history.close()
+
+    def play_rounds(self, rounds=5):
+        """
+        Play the rounds one at a time, with every phase finishing for all players before the next starts.
+        """
         for _ in range(rounds):
             self.round += 1
             display_message(f"\n--- Round {self.round} ---")
@@ -38,7 +83,9 @@ class Game:
                 "texts": {},
                 "draw_assignments": {},  # Assignments of texts to players for drawing
                 "guess_assignments": {},  # Assignments of drawings to players for guessing
-                "drawings": {}
+                "drawings": {},
+                "text_chains": {},  # Chain of each player's text, identified by its round 1 author
+                "drawing_chains": {}  # Chain of each player's drawing
             }
 
             if self.round == 1:
@@ -51,94 +98,115 @@ class Game:
             # Phase 1: Handle Text Creation or Guessing
             if text_phase == 'create_text':
                 # Round 1: Players create original texts
-                for player in self.players:
-                    input_text = player.provide_input(None, phase='create_text', round=self.round)
-                    round_data["texts"][player.name] = input_text
+                with get_metrics().span("phase", phase='create_text', round=self.round):
+                    round_data["texts"] = self.executor.run(self.players, 'create_text', self.round)
+                # Every player starts the chain named after them
+                round_data["text_chains"] = {player.name: player.name for player in self.players}
             elif text_phase == 'guess_text':
                 # Rounds 2+: Players guess texts based on previous drawings
                 # Distribute previous drawings among players without self-assignment
-                assigned_drawings = self.distribute_drawings(previous_drawings)
+                sources = self.assign_sources('guess_text')
+                assigned_drawings = self.distribute_drawings(previous_drawings, sources)
                 round_data["guess_assignments"] = assigned_drawings  # Record guess assignments
-                for player in self.players:
-                    drawing_path = assigned_drawings.get(player.name)
-                    input_guess = player.provide_input(drawing_path, phase='guess_text', round=self.round)
-                    round_data["texts"][player.name] = input_guess
+                # Each guess continues the chain of the drawing it was made from
+                round_data["text_chains"] = follow_chains(sources, self.history[-1].get("drawing_chains", {}))
+                with get_metrics().span("phase", phase='guess_text', round=self.round):
+                    round_data["texts"] = self.executor.run(
+                        self.players, 'guess_text', self.round, inputs=assigned_drawings
+                    )
 
             # Phase 2: Drawing Phase
             display_message("Phase 2: Drawing")
 
-            if text_phase == 'create_text':
-                # Assign texts to players for drawing without self-assignment
-                assigned_texts = self.distribute_texts(round_data["texts"])
-                round_data["draw_assignments"] = assigned_texts  # Record text assignments
-
-                # Run drawing tasks in parallel
-                with ThreadPoolExecutor() as executor:
-                    futures = {
-                        executor.submit(
-                            player.provide_input, assigned_texts.get(player.name), phase='draw', round=self.round
-                        ): player.name for player in self.players
-                    }
-                    for future in as_completed(futures):
-                        player_name = futures[future]
-                        try:
-                            input_drawing = future.result()
-                        except Exception as exc:
-                            print(f"{player_name} generated an exception: {exc}")
-                            input_drawing = "No drawing generated due to error."
-                        round_data["drawings"][player_name] = input_drawing
+            # Assign texts to players for drawing without self-assignment
+            # In rounds 2+, the texts to draw are the guesses themselves
+            sources = self.assign_sources('draw')
+            assigned_texts = self.distribute_texts(round_data["texts"], sources)
+            round_data["draw_assignments"] = assigned_texts  # Record text assignments
+            round_data["drawing_chains"] = follow_chains(sources, round_data["text_chains"])
 
-            elif text_phase == 'guess_text':
-                # Assign texts to players based on their guesses without self-assignment
-                # Here, the texts to draw are the guesses themselves
-                assigned_texts = self.distribute_texts(round_data["texts"])
-                round_data["draw_assignments"] = assigned_texts  # Record text assignments
-
-                # Run drawing tasks in parallel
-                with ThreadPoolExecutor() as executor:
-                    futures = {
-                        executor.submit(
-                            player.provide_input, assigned_texts.get(player.name), phase='draw', round=self.round
-                        ): player.name for player in self.players
-                    }
-                    for future in as_completed(futures):
-                        player_name = futures[future]
-                        try:
-                            input_drawing = future.result()
-                        except Exception as exc:
-                            print(f"{player_name} generated an exception: {exc}")
-                            input_drawing = "No drawing generated due to error."
-                        round_data["drawings"][player_name] = input_drawing
-
-            self.history.append(round_data)
+            # Run drawing tasks in parallel
+            with get_metrics().span("phase", phase='draw', round=self.round):
+                round_data["drawings"] = self.executor.run(self.players, 'draw', self.round, inputs=assigned_texts)
+
+            self.record_round(round_data)
             # print(self.history)
 
-        # Save history to a file
-        # self.save_history()
-        # display_message("\nGame history saved to 'game_history.json'")
+    def start_pipelined(self, rounds=5):
+        """
+        Play the rounds with the pipelined scheduler, where each chain moves on as soon as
+        its previous step is done. Records the same history as start().
+        """
+        previous_round = self.history[-1] if self.history else None
+        scheduler = PipelinedScheduler(self.players, self.executor, schedule=self.schedule)
+        scheduler.run(rounds, first_round=self.round + 1, previous_round=previous_round, on_round=self.record_round)
+
+    def record_round(self, round_data):
+        """
+        Add a finished round to the history and append it to the history log, if there is one.
+        """
+        round_data["seed"] = self.seed
+        self.history.append(round_data)
+        self.round = round_data["round"]
+        if self.history_log is not None:
+            self.history_log.append(round_data)
 
-    def distribute_drawings(self, previous_drawings):
+    def resume(self, history_path):
+        """
+        Continue a game from the last complete round in its history log.
+        The next call to start() plays further rounds and appends them to the same log, with the
+        assignments the seed recorded in the log gives.
+        """
+        history = load_history(history_path)
+        if history:
+            names = [player.name for player in self.players]
+            if set(history[-1]["drawings"]) != set(names):
+                raise ValueError("The history log was written by a different set of players.")
+            seed = history[-1].get("seed")
+            if seed is not None and self.seed_given and seed != self.seed:
+                raise ValueError(f"The history log was played with seed {seed}, not {self.seed}.")
+            if seed is not None:
+                self.seed = seed
+        self.history.close()
+        self.history = HistoryStore(memory_rounds=self.history.memory_rounds)
+        self.history.extend(history)
+        self.round = history[-1]["round"] if history else 0
+        self.history_path = history_path
+
+    def assign_sources(self, phase='draw'):
+        """
+        Decide whose work each player receives in the current round's phase ('guess_text' or 'draw').
+        Follows the schedule made in start(), so nobody receives their own work or a chain they
+        have already seen; outside a scheduled round a random derangement is used.
+        Returns a dictionary mapping each player name to the name of the player whose text or
+        drawing they receive, or None if no derangement is possible.
+        """
+        if self.schedule is not None and 1 <= self.round <= self.schedule.rounds:
+            return self.schedule.sources(self.round, phase)
+        names = [player.name for player in self.players]
+        deranged_names = derangement(names)
+        if deranged_names is None:
+            return None
+        return dict(zip(names, deranged_names))
+
+    def distribute_drawings(self, previous_drawings, sources=None):
         """
         Distribute previous round's drawings among players for guessing.
         Ensures each player gets exactly one drawing and no drawing is assigned to themselves.
-        Utilizes derangement to prevent self-assignment.
+        Uses the given sources (see assign_sources), or a new derangement if none are given.
         Returns a dictionary mapping player names to drawing paths.
         """
         if not previous_drawings:
             return {}
 
-        players = self.players.copy()
-        drawers = [player.name for player in self.players]
-        drawings = [previous_drawings[drawer] for drawer in drawers]
+        if sources is None:
+            sources = self.assign_sources('guess_text')
 
-        # Generate a derangement of the drawings
-        deranged_drawings = derangement(drawings)
-
-        if deranged_drawings is None:
+        if sources is None:
             display_message("Error: Unable to generate derangement for drawings.")
             return {player.name: None for player in self.players}
 
-        assigned_drawings = {player.name: drawing for player, drawing in zip(players, deranged_drawings)}
+        assigned_drawings = {player_name: previous_drawings[drawer] for player_name, drawer in sources.items()}
         for player_name, drawing in assigned_drawings.items():
             if drawing is None:
                 display_message(f"Warning: {player_name} has no drawing assigned for guessing.")
@@ -147,27 +215,24 @@ class Game:
 
         return assigned_drawings
 
-    def distribute_texts(self, texts):
+    def distribute_texts(self, texts, sources=None):
         """
         Distribute texts among players for drawing.
         Ensures each player draws exactly one text and no player draws their own text.
-        Utilizes derangement to prevent self-assignment.
+        Uses the given sources (see assign_sources), or a new derangement if none are given.
         Returns a dictionary mapping player names to texts they should draw.
         """
         if not texts:
             return {}
 
-        players = self.players.copy()
-        original_texts = [texts[player.name] for player in players]
-
-        # Generate a derangement of the texts
-        deranged_texts = derangement(original_texts)
+        if sources is None:
+            sources = self.assign_sources('draw')
 
-        if deranged_texts is None:
+        if sources is None:
             display_message("Error: Unable to generate derangement for texts.")
             return {player.name: "No prompt" for player in self.players}
 
-        assigned_texts = {player.name: text for player, text in zip(players, deranged_texts)}
+        assigned_texts = {player_name: texts[author] for player_name, author in sources.items()}
         for player_name, text in assigned_texts.items():
             if text == "No prompt":
                 display_message(f"Warning: {player_name} has no text assigned for drawing.")
@@ -181,127 +246,13 @@ class Game:
         Save the game history to a JSON file.
         """
         with open("game_history.json", "w") as f:
-            json.dump(self.history, f, indent=4)
+            json.dump(self.history.to_list(), f, indent=4)
 
     def display_history(self):
         """
         Display the game history as separate chats for each chain using Tkinter.
+        Tabs are filled when selected and drawings are decoded in the background.
         """
-        # Create the main Tkinter window
-        root = tk.Tk()
-        root.title("Game History")
-
-        # Use a notebook to organize chains in tabs
-        notebook = ttk.Notebook(root)
-        notebook.pack(expand=True, fill='both')
-
-        # Get the initial texts from Round 1
-        initial_texts = self.history[0]['texts']  # Round 1 texts
-
-        # For each initial text, reconstruct the chain
-        for starter_player, initial_text in initial_texts.items():
-            # Create a frame for each chain
-            frame = ttk.Frame(notebook)
-            notebook.add(frame, text=f"{starter_player}'s Chain")
-
-            # Create a scrolled text widget for the chat
-            chat_display = ScrolledText(frame, wrap='word', state='disabled')
-            chat_display.pack(expand=True, fill='both')
-
-            chain = []
-            chain.append({
-                'player': starter_player,
-                'action': 'Text',
-                'content': initial_text
-            })
-
-            current_content = initial_text
-
-            # Iterate over the rounds, starting from Round 1
-            for round_number in range(0, len(self.history)):
-                round_data = self.history[round_number]
-
-                # Identify who was assigned to draw the current content
-                draw_assignments = round_data.get('draw_assignments', {})
-                drawings = round_data.get('drawings', {})
-
-                # Find the player assigned to draw the current content
-                drawing_player = None
-                for player_name, text in draw_assignments.items():
-                    if text == current_content:
-                        drawing_player = player_name
-                        break
-
-                if drawing_player:
-                    # Add the drawing to the chain
-                    drawing = drawings.get(drawing_player, 'No drawing')
-                    chain.append({
-                        'player': drawing_player,
-                        'action': 'Drawing',
-                        'content': drawing
-                    })
-                else:
-                    break  # No drawing found; end of chain
-
-                # For rounds beyond Round 1, find the guess for this drawing
-                if round_number + 1 < len(self.history):
-                    next_round_data = self.history[round_number + 1]
-                    guess_assignments = next_round_data.get('guess_assignments', {})
-                    texts = next_round_data.get('texts', {})
-
-                    # Find the player who was assigned this drawing to guess
-                    guessing_player = None
-                    for player_name, drawing_assigned in guess_assignments.items():
-                        if drawing_assigned == drawing:
-                            guessing_player = player_name
-                            break
-
-                    if guessing_player:
-                        # Add the guess to the chain
-                        guess_text = texts.get(guessing_player, 'No guess')
-                        chain.append({
-                            'player': guessing_player,
-                            'action': 'Guess',
-                            'content': guess_text
-                        })
-                        # Update current content for the next round
-                        current_content = guess_text
-                    else:
-                        break  # No guess found; end of chain
-                else:
-                    break  # Last round reached; end of chain
-
-            # Inside the loop over entries in the chain
-            for entry in chain:
-                player = entry['player']
-                action = entry['action']
-                content = entry['content']
-
-                # Enable the text widget to insert content
-                chat_display.configure(state='normal')
-
-                if action == 'Drawing' and os.path.exists(content):
-                    # Display the image
-                    try:
-                        img = Image.open(content)
-                        img.thumbnail((400, 400))  # Resize image if necessary
-                        photo = ImageTk.PhotoImage(img)
-                        chat_display.insert(tk.END, f"\n{player} ({action}):\n")
-                        chat_display.image_create(tk.END, image=photo)
-                        chat_display.insert(tk.END, "\n\n")
-                        # Keep a reference to the image to prevent garbage collection
-                        if not hasattr(chat_display, 'images'):
-                            chat_display.images = []
-                        chat_display.images.append(photo)
-                    except Exception as e:
-                        chat_display.insert(tk.END, f"{player} ({action}): [Error displaying image]\n\n")
-                else:
-                    # Format the message
-                    message = f"{player} ({action}): {content}\n\n"
-                    chat_display.insert(tk.END, message)
-
-                # Disable the text widget to prevent user editing
-                chat_display.configure(state='disabled')
+        from ui.history_viewer import HistoryViewer  # Loads Tk, which only the viewer needs
 
-        # Start the Tkinter main loop
-        root.mainloop()
+        HistoryViewer(self.history).show()
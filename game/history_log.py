@@ -0,0 +1,82 @@
+# game/history_log.py
+import json
+import os
+import time
+
+
+class HistoryLog:
+    """
+    Append-only game history, one JSON line per finished round.
+    Writing a round costs only that round, and a crash loses at most the rounds since the last
+    fsync; a line cut short by a crash is dropped when the log is loaded.
+
+    Parameters:
+        path (str): The JSON lines file to write.
+        append (bool): Whether to continue an existing log instead of starting a new one.
+        fsync_every (int): Number of rounds written between fsyncs.
+        fsync_interval (float): Seconds after which the next round is fsynced regardless of fsync_every.
+    """
+
+    def __init__(self, path, append=False, fsync_every=1, fsync_interval=5.0):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a" if append else "w", encoding="utf-8")
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, round_data):
+        """
+        Writes one finished round.
+        """
+        self._file.write(json.dumps(round_data, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        if self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+
+def load_history(path, repair=True):
+    """
+    Loads the complete rounds of a history log.
+
+    Parameters:
+        path (str): The JSON lines file written by HistoryLog.
+        repair (bool): Whether to cut off a trailing partial line, so the log can be appended to.
+
+    Returns:
+        list: The round data dictionaries up to the last complete round.
+    """
+    history = []
+    valid_bytes = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # Cut short by a crash while writing
+            try:
+                round_data = json.loads(line)
+            except ValueError:
+                break
+            if history and round_data.get("round") != history[-1].get("round") + 1:
+                break
+            history.append(round_data)
+            valid_bytes += len(line)
+
+    if repair and os.path.getsize(path) > valid_bytes:
+        with open(path, "r+b") as f:
+            f.truncate(valid_bytes)
+    return history
@@ -0,0 +1,338 @@
+# game/history_store.py
+import json
+import mmap
+import os
+import sys
+import tempfile
+import threading
+import weakref
+from array import array
+from collections.abc import Mapping, Sequence
+
+# Fields whose values are the players' own texts and drawing paths
+CONTENT_FIELDS = ("texts", "drawings")
+# Fields whose values were handed over from another player: the text a player drew comes from this
+# round's texts, the drawing a player guessed from the previous round's drawings
+ASSIGNMENT_FIELDS = {"draw_assignments": ("texts", 0), "guess_assignments": ("drawings", -1)}
+# Fields whose values are chain ids, i.e. player names
+CHAIN_FIELDS = ("text_chains", "drawing_chains")
+FIELDS = ("texts", "draw_assignments", "guess_assignments", "drawings", "text_chains", "drawing_chains")
+
+# An assignment that could not be traced to its source; the value is kept in the record's extra
+UNRESOLVED = -1
+
+
+class RoundRecord:
+    """
+    One round of a HistoryStore. Every field holds the player ids it covers, in the order they were
+    recorded, as an array('i'), together with the values: a tuple of strings for texts and drawings,
+    and an array('i') of player ids for assignments (whose text or drawing it was) and chains.
+    A field the round was recorded without is None. Anything else in the round data is kept in extra.
+    """
+
+    __slots__ = ("round", "texts", "drawings", "draw_assignments", "guess_assignments", "text_chains",
+                 "drawing_chains", "extra")
+
+    def encode(self):
+        fields = []
+        for field in FIELDS:
+            if getattr(self, field) is None:
+                fields.append(None)
+                continue
+            ids, values = getattr(self, field)
+            fields.append([ids.tolist(), list(values) if field in CONTENT_FIELDS else values.tolist()])
+        return json.dumps([self.round, fields, self.extra], separators=(",", ":")).encode("utf-8")
+
+    @classmethod
+    def decode(cls, data):
+        record = cls()
+        record.round, fields, record.extra = json.loads(data)
+        for field, entries in zip(FIELDS, fields):
+            if entries is None:
+                setattr(record, field, None)
+                continue
+            ids, values = entries
+            values = tuple(values) if field in CONTENT_FIELDS else array("i", values)
+            setattr(record, field, (array("i", ids), values))
+        return record
+
+
+class HistoryStore(Sequence):
+    """
+    Game history kept compactly for very long games. Player names are stored once and referred to
+    by id, each round is a RoundRecord with array-backed fields, and an assignment is stored as the
+    id of the player whose text or drawing it was instead of another copy of it.
+
+    Reads return read-only RoundViews that behave like the round data dictionaries the game records,
+    so ChainIndex, the history viewer and JSON export work on the store as on a list of rounds.
+
+    With memory_rounds set, only the latest rounds stay in memory; older ones are written to a
+    spill file and read back through a memory map when asked for. close() releases the file and
+    the map; both are opened again if a spilled round is read or another round spills afterwards.
+
+    Parameters:
+        memory_rounds (int): Number of latest rounds kept in memory. None keeps every round.
+        spill_path (str): File for rounds moved out of memory. Defaults to a temporary file that is
+            removed when the store is garbage collected or the interpreter exits.
+    """
+
+    def __init__(self, memory_rounds=None, spill_path=None):
+        self.memory_rounds = memory_rounds
+        self.spill_path = spill_path
+        self.names = []  # Player names by id
+        self._ids = {}  # Maps player names to ids
+        self._records = []  # RoundRecords in memory, or None for spilled rounds
+        self._offsets = array("q")  # Start of each spilled round in the spill file, then its end
+        self._spilled = 0  # Number of leading rounds in the spill file
+        self._path = None  # The spill file, once a round has been spilled
+        self._file = None
+        self._map = None
+        self._lock = threading.RLock()
+
+    def append(self, round_data):
+        """
+        Adds a finished round, given as a round data dictionary.
+        """
+        with self._lock:
+            previous = self._record(len(self._records) - 1) if self._records else None
+            record = RoundRecord()
+            record.round = round_data.get("round")
+            record.extra = {key: value for key, value in round_data.items() if key not in FIELDS and key != "round"}
+            for field in FIELDS:
+                setattr(record, field, None)
+            for field in CONTENT_FIELDS:
+                if field not in round_data:
+                    continue
+                entries = round_data[field]
+                record_field = (self._id_array(entries), tuple(map(_intern_short, entries.values())))
+                setattr(record, field, record_field)
+            for field, (source_field, age) in ASSIGNMENT_FIELDS.items():
+                if field not in round_data:
+                    continue
+                source = record if age == 0 else previous
+                owners = {}
+                if source is not None and getattr(source, source_field) is not None:
+                    # The first player with a given text or drawing; any of them gives the same value
+                    for player_id, value in zip(*getattr(source, source_field)):
+                        owners.setdefault(value, player_id)
+                sources = array("i")
+                for player_name, value in round_data[field].items():
+                    owner = owners.get(value, UNRESOLVED)
+                    if owner == UNRESOLVED:
+                        record.extra.setdefault(field, {})[player_name] = value
+                    sources.append(owner)
+                setattr(record, field, (self._id_array(round_data[field]), sources))
+            for field in CHAIN_FIELDS:
+                if field not in round_data:
+                    continue
+                entries = round_data[field]
+                chains = array("i", (UNRESOLVED if chain_id is None else self._intern(chain_id)
+                                     for chain_id in entries.values()))
+                setattr(record, field, (self._id_array(entries), chains))
+            self._records.append(record)
+            if self.memory_rounds is not None:
+                while len(self._records) - self._spilled > self.memory_rounds:
+                    self._spill()
+
+    def extend(self, rounds):
+        for round_data in rounds:
+            self.append(round_data)
+
+    def __len__(self):
+        return len(self._records)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("round index out of range")
+        return RoundView(self, index)
+
+    def to_list(self):
+        """
+        Returns the history as a list of plain round data dictionaries, e.g. for JSON export.
+        """
+        return [view.to_dict() for view in self]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rounds": len(self._records),
+                "players": len(self.names),
+                "in_memory": len(self._records) - self._spilled,
+                "spilled": self._spilled,
+                "spill_bytes": self._offsets[-1] if self._offsets else 0,
+            }
+
+    def close(self):
+        """
+        Closes the spill file and its memory map. Spilled rounds stay readable; the file is opened
+        again when one is asked for.
+        """
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _intern(self, name):
+        player_id = self._ids.get(name)
+        if player_id is None:
+            player_id = self._ids[name] = len(self.names)
+            self.names.append(sys.intern(name))
+        return player_id
+
+    def _id_array(self, entries):
+        return array("i", map(self._intern, entries))
+
+    def _record(self, index):
+        with self._lock:
+            record = self._records[index]
+            if record is not None:
+                return record
+            start, end = self._offsets[index], self._offsets[index + 1]
+            self._open()
+            if self._map is None or len(self._map) < end:
+                # The file grew since it was mapped
+                if self._map is not None:
+                    self._map.close()
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            return RoundRecord.decode(self._map[start:end])
+
+    def _open(self):
+        if self._file is not None:
+            return
+        if self._path is None:
+            if self.spill_path:
+                self._path = self.spill_path
+                self._file = open(self._path, "w+b")
+            else:
+                descriptor, self._path = tempfile.mkstemp(prefix="history-", suffix=".spill")
+                self._file = os.fdopen(descriptor, "w+b")
+                weakref.finalize(self, _remove_file, self._path)
+            self._offsets.append(0)
+        else:
+            self._file = open(self._path, "r+b")
+
+    def _spill(self):
+        self._open()
+        data = self._records[self._spilled].encode()
+        self._file.seek(self._offsets[-1])
+        self._file.write(data)
+        self._file.flush()
+        self._offsets.append(self._offsets[-1] + len(data))
+        self._records[self._spilled] = None
+        self._spilled += 1
+
+
+class RoundView(Mapping):
+    """
+    Read-only view of one round of a HistoryStore with the keys of a round data dictionary:
+    "round", "texts", "draw_assignments", "guess_assignments", "drawings", "text_chains",
+    "drawing_chains", and any other keys the round was recorded with.
+    """
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+        self._record = store._record(index)
+        self._maps = {}
+
+    def __getitem__(self, key):
+        record = self._record
+        if key == "round":
+            return record.round
+        if key in FIELDS:
+            if getattr(record, key) is None:
+                raise KeyError(key)
+            if key not in self._maps:
+                self._maps[key] = PlayerMap(self, key)
+            return self._maps[key]
+        if key in ASSIGNMENT_FIELDS:
+            raise KeyError(key)  # extra holds only the unresolved assignments under these keys
+        return record.extra[key]
+
+    def __iter__(self):
+        yield "round"
+        yield from (field for field in FIELDS if getattr(self._record, field) is not None)
+        yield from (key for key in self._record.extra if key not in ASSIGNMENT_FIELDS)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def to_dict(self):
+        return {key: (dict(value) if isinstance(value, PlayerMap) else value) for key, value in self.items()}
+
+    def __repr__(self):
+        return f"RoundView({self.to_dict()!r})"
+
+
+class PlayerMap(Mapping):
+    """
+    Read-only view of one field of a round, mapping player names to values.
+    """
+
+    def __init__(self, view, field):
+        self._view = view
+        self._field = field
+        self._ids, self._values = getattr(view._record, field)
+        self._positions = None
+        self._source = None  # Positions and values of the field assignments were taken from
+
+    def __getitem__(self, name):
+        if self._positions is None:
+            self._positions = {player_id: position for position, player_id in enumerate(self._ids)}
+        player_id = self._view._store._ids.get(name)
+        if player_id is None or player_id not in self._positions:
+            raise KeyError(name)
+        return self._value(self._positions[player_id], name)
+
+    def __iter__(self):
+        names = self._view._store.names
+        return (names[player_id] for player_id in self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def items(self):
+        names = self._view._store.names
+        return [(names[player_id], self._value(position, names[player_id]))
+                for position, player_id in enumerate(self._ids)]
+
+    def values(self):
+        return [value for _, value in self.items()]
+
+    def _value(self, position, name):
+        value = self._values[position]
+        if self._field in CONTENT_FIELDS:
+            return value
+        if self._field in CHAIN_FIELDS:
+            return None if value == UNRESOLVED else self._view._store.names[value]
+        if value == UNRESOLVED:
+            return self._view._record.extra[self._field][name]
+        if self._source is None:
+            source_field, age = ASSIGNMENT_FIELDS[self._field]
+            record = self._view._record if age == 0 else self._view._store._record(self._view._index + age)
+            source_ids, source_values = getattr(record, source_field)
+            self._source = ({player_id: position for position, player_id in enumerate(source_ids)}, source_values)
+        positions, source_values = self._source
+        return source_values[positions[value]]
+
+    def __repr__(self):
+        return f"PlayerMap({dict(self.items())!r})"
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _intern_short(value):
+    # The fallbacks and other short values repeat across rounds; one copy of each is enough
+    return sys.intern(value) if isinstance(value, str) and len(value) <= 32 else value
@@ -1,23 +1,62 @@
 # game/human_player.py
 
 import os
+import time
 
+from ai.resilience import remaining_time
+from game.phase_executor import PHASE_FALLBACKS
 from game.player import Player
-from ui.console_ui import display_message, get_user_input
+from ui.console_ui import countdown, display_message, get_user_input
 from ui.drawing_interface import display_drawing, save_drawing
 
+# Seconds a human has for a turn in each phase
+HUMAN_TIME_LIMITS = {
+    'create_text': 120.0,
+    'guess_text': 90.0,
+    'draw': 180.0,
+}
+
 
 class HumanPlayer(Player):
+    """
+    A player at this computer, typing in the console and drawing in a Tk window.
+
+    Each turn runs against a countdown, so the game's executor can run the AI players' turns at
+    the same time and a round takes as long as the slower of the human and the AIs. When time
+    runs out the turn is submitted as it stands: a text turn with nothing entered gives the phase
+    fallback ("No prompt" or "No guess"), and a drawing turn saves whatever has been drawn so far,
+    or gives "No drawing" if the canvas is empty. A late line typed into the console goes to the
+    next prompt.
+
+    Parameters:
+        name (str): The player's name.
+        time_limits (dict): Seconds per turn for each phase ('create_text', 'guess_text', 'draw'),
+            merged over HUMAN_TIME_LIMITS. A phase mapped to None has no limit. A phase budget of the
+            game that ends sooner takes precedence.
+    """
+
+    def __init__(self, name, time_limits=None):
+        Player.__init__(self, name)
+        self.time_limits = dict(HUMAN_TIME_LIMITS, **(time_limits or {}))
+
+    def deadline(self, phase):
+        """
+        Returns the time.monotonic() by which the turn in this phase must be submitted, or None.
+        """
+        limit = remaining_time(self.time_limits.get(phase))
+        return None if limit is None else time.monotonic() + limit
+
     def provide_input(self, previous_output, phase, round):
+        deadline = self.deadline(phase)
         if phase == 'create_text':
-            user_input = get_user_input(f"{self.name}, enter your text prompt: ")
-            return user_input
+            user_input = self.ask(f"{self.name}, enter your text prompt", deadline)
+            return user_input if user_input else PHASE_FALLBACKS['create_text']
         elif phase == 'guess_text':
             if previous_output and os.path.exists(previous_output):
                 display_message(f"{self.name}, guess the text based on the drawing:")
-                display_drawing(previous_output)
-                user_input = get_user_input("Your guess: ")
-                return user_input
+                display_drawing(previous_output, timeout=self.left(deadline))
+                user_input = self.ask("Your guess", deadline)
+                return user_input if user_input else PHASE_FALLBACKS['guess_text']
             else:
                 display_message(f"{self.name}, no drawing available to guess.")
                 return "No guess"
@@ -25,12 +64,28 @@ class HumanPlayer(Player):
             if isinstance(previous_output, str) and previous_output not in ["No prompt", "No guess"]:
                 # Assuming previous_output is a text prompt or a guess
                 display_message(f"{self.name}, please draw based on the prompt: {previous_output}")
-                drawing_path = save_drawing(self.name, round)
-                return drawing_path
+                drawing_path = save_drawing(self.name, round, timeout=self.left(deadline))
+                return drawing_path or "No drawing"
             else:
                 display_message(f"{self.name}, no valid prompt provided for drawing.")
                 return "No drawing"
 
+    def ask(self, prompt, deadline):
+        """
+        Reads a line from the console, showing the seconds left. Returns None if time ran out.
+        """
+        if deadline is None:
+            return get_user_input(f"{prompt}: ").strip()
+        user_input = get_user_input(f"{prompt} ({countdown(deadline)}s left): ", timeout=self.left(deadline))
+        if user_input is None:
+            display_message(f"{self.name}, time is up.")
+            return None
+        return user_input.strip()
+
+    @staticmethod
+    def left(deadline):
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
+
     def receive_output(self, output, phase):
         if phase in ['create_text', 'guess_text']:
             display_message(f"{self.name} received text: {output}")
@@ -0,0 +1,190 @@
+# game/phase_executor.py
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from ai.resilience import deadline_scope
+from ui.console_ui import display_message
+from utils.metrics import get_metrics
+
+# Output recorded for a player whose call raised an exception or ran past the timeout.
+PHASE_FALLBACKS = {
+    'create_text': "No prompt",
+    'guess_text': "No guess",
+    'draw': "No drawing",
+}
+
+
+def provide_input(player, previous_output, phase, round):
+    """
+    Calls player.provide_input inside a span labelled with the player, phase and round.
+    """
+    metrics = get_metrics()
+    with metrics.span("provide_input", player=player.name, phase=phase, round=round):
+        output = player.provide_input(previous_output, phase=phase, round=round)
+    if output == PHASE_FALLBACKS.get(phase):
+        metrics.count("fallbacks_total", phase=phase, reason="player")
+    return output
+
+
+class CallTracker:
+    """
+    Submits calls to a thread pool and reports which ones finished, ran past the timeout
+    or passed their deadline. Each call is identified by a key chosen by the caller.
+
+    Parameters:
+        max_workers (int): Maximum number of calls in flight. None uses the ThreadPoolExecutor default.
+        timeout (float): Seconds a call may run once started. None never expires a call.
+    """
+
+    def __init__(self, max_workers=None, timeout=None):
+        self.timeout = timeout
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.keys = {}  # Maps pending futures to their keys
+        self.started = {}  # Maps keys to the time their call started running
+        self.deadlines = {}  # Maps keys to the time.monotonic() by which their call must finish
+        self.lock = threading.Lock()
+
+    def submit(self, key, fn, *args, deadline=None, **kwargs):
+        """
+        Runs fn(*args, **kwargs) in the pool. Provider requests made by the call see the earlier of
+        the deadline and the call's own timeout (see ai.resilience.deadline_scope).
+        """
+        def call():
+            started = time.monotonic()
+            with self.lock:
+                self.started[key] = started
+            limits = [limit for limit in (deadline, started + self.timeout if self.timeout else None) if limit]
+            with deadline_scope(min(limits) if limits else None):
+                return fn(*args, **kwargs)
+
+        if deadline is not None:
+            self.deadlines[key] = deadline
+        self.keys[self.pool.submit(call)] = key
+
+    def pending(self):
+        return bool(self.keys)
+
+    def poll(self):
+        """
+        Waits until at least one call finishes or passes its deadline.
+
+        Returns:
+            tuple: A list of (key, future) pairs for finished calls and a list of keys for expired calls.
+        """
+        done, _ = wait(set(self.keys), timeout=self._wait_timeout(), return_when=FIRST_COMPLETED)
+        finished = [(self.keys.pop(future), future) for future in done]
+        expired = []
+        now = time.monotonic()
+        with self.lock:
+            for future, key in list(self.keys.items()):
+                timed_out = (self.timeout is not None and key in self.started
+                             and now - self.started[key] >= self.timeout)
+                if timed_out or self.deadlines.get(key, now + 1) <= now:
+                    # Calls that have not started yet are dropped; running ones are abandoned
+                    future.cancel()
+                    del self.keys[future]
+                    expired.append(key)
+        return finished, expired
+
+    def shutdown(self):
+        # Calls that timed out keep their thread until they return; nobody waits for them.
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def _wait_timeout(self):
+        """
+        Returns how long to wait before the next pending call may pass its timeout or deadline.
+        """
+        limits = []
+        with self.lock:
+            if self.timeout is not None:
+                starts = [self.started[key] for key in self.keys.values() if key in self.started]
+                # If nothing has started yet, check again after one timeout period
+                limits.append(min(starts) + self.timeout if starts else time.monotonic() + self.timeout)
+            limits.extend(self.deadlines[key] for key in self.keys.values() if key in self.deadlines)
+        if not limits:
+            return None
+        return max(0.0, min(limits) - time.monotonic())
+
+
+class PhaseExecutor:
+    """
+    Runs one phase of a round (text creation, guessing or drawing) for all players concurrently,
+    so a phase takes as long as its slowest player instead of the sum of all players.
+
+    Parameters:
+        max_workers (int): Maximum number of provide_input calls in flight at once.
+            None uses the ThreadPoolExecutor default.
+        timeout (float): Seconds a single provide_input call may run before the player
+            is given the phase fallback. None waits for every call to finish.
+        budgets (dict): Seconds each phase ('create_text', 'guess_text', 'draw') may take as a whole.
+            Players still working when it runs out get the phase fallback.
+    """
+
+    def __init__(self, max_workers=None, timeout=None, budgets=None):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.budgets = budgets or {}
+        self.expired = {}  # Number of calls given the fallback for running too long, per phase
+
+    def tracker(self):
+        """
+        Returns a new CallTracker with this executor's limits.
+        """
+        return CallTracker(max_workers=self.max_workers, timeout=self.timeout)
+
+    def deadline(self, phase):
+        """
+        Returns the deadline of a phase starting now, or None if the phase has no budget.
+        """
+        budget = self.budgets.get(phase)
+        return None if budget is None else time.monotonic() + budget
+
+    def run(self, players, phase, round, inputs=None):
+        """
+        Calls provide_input for every player and collects the results.
+
+        Parameters:
+            players (list): The Player instances taking part in the phase.
+            phase (str): 'create_text', 'guess_text' or 'draw'.
+            round (int): The current round number.
+            inputs (dict): Maps player names to their previous_output. Missing names get None.
+
+        Returns:
+            dict: Maps player names to their outputs, in the order of players.
+        """
+        inputs = inputs or {}
+        results = {}
+        tracker = self.tracker()
+        deadline = self.deadline(phase)
+        try:
+            for player in players:
+                tracker.submit(player.name, provide_input, player, inputs.get(player.name), phase, round,
+                               deadline=deadline)
+            while tracker.pending():
+                finished, expired = tracker.poll()
+                for player_name, future in finished:
+                    results[player_name] = self.result(future, player_name, phase)
+                for player_name in expired:
+                    results[player_name] = self.timed_out(player_name, phase)
+        finally:
+            tracker.shutdown()
+
+        return {player.name: results[player.name] for player in players}
+
+    def result(self, future, player_name, phase):
+        """
+        Returns the output of a finished call, or the phase fallback if it raised.
+        """
+        try:
+            return future.result()
+        except Exception as exc:
+            get_metrics().count("fallbacks_total", phase=phase, reason="exception")
+            print(f"{player_name} generated an exception: {exc}")
+            return PHASE_FALLBACKS.get(phase)
+
+    def timed_out(self, player_name, phase):
+        self.expired[phase] = self.expired.get(phase, 0) + 1
+        get_metrics().count("fallbacks_total", phase=phase, reason="timeout")
+        display_message(f"{player_name} timed out during {phase}")
+        return PHASE_FALLBACKS.get(phase)
@@ -0,0 +1,159 @@
+# game/pipeline.py
+from collections import deque
+
+from game.phase_executor import provide_input
+from ui.console_ui import display_message
+from utils.derangement import derangement
+
+
+class PipelinedScheduler:
+    """
+    Plays rounds chain by chain instead of waiting for every player at the end of each phase.
+    A chain's guess starts as soon as its drawing lands, and its drawing starts as soon as its
+    text or guess lands, so one slow drawing only holds up its own chain.
+
+    Who receives what is fixed up front, from the same AssignmentSchedule used by
+    Game.distribute_texts and Game.distribute_drawings, so nobody is handed their own work,
+    and the rounds are recorded in the same history format.
+
+    Parameters:
+        players (list): The Player instances in the game.
+        executor (PhaseExecutor): Provides the concurrency limit and per-call timeout.
+        schedule (AssignmentSchedule): The game's assignments. None uses a random derangement per phase.
+    """
+
+    def __init__(self, players, executor, schedule=None):
+        self.players = players
+        self.executor = executor
+        self.schedule = schedule
+
+    def assignment_order(self, round, phase):
+        """
+        Returns a list where entry i is the index of the player whose work player i receives.
+        """
+        if self.schedule is not None:
+            return self.schedule.source_indices(round, phase)
+        return derangement(list(range(len(self.players))))
+
+    def run(self, rounds, first_round=1, previous_round=None, on_round=None):
+        """
+        Plays the given number of rounds and returns their round data.
+
+        Parameters:
+            rounds (int): The number of rounds to play.
+            first_round (int): The number of the first round played.
+            previous_round (dict): Round data of the round before first_round, if any.
+            on_round (callable): Called with each round's data as soon as all of its drawings are
+                in, in round order.
+
+        Returns:
+            list: One round data dictionary per round, in the format of Game.history.
+        """
+        last_round = first_round + rounds - 1
+        # receivers[phase][round][i] is the player who receives player i's work in that round
+        receivers = {'guess_text': {}, 'draw': {}}
+        for round in range(first_round, last_round + 1):
+            for phase in receivers:
+                if phase == 'guess_text' and round == 1:
+                    continue  # Nothing to guess before the first drawings
+                order = self.assignment_order(round, phase)
+                if order is None:
+                    display_message("Error: Unable to generate derangement for pipelined rounds.")
+                    return []
+                inverse = [0] * len(order)
+                for receiver, source in enumerate(order):
+                    inverse[source] = receiver
+                receivers[phase][round] = inverse
+
+        history = {
+            round: {
+                "round": round,
+                "texts": {},
+                "draw_assignments": {},
+                "guess_assignments": {},
+                "drawings": {},
+                "text_chains": {},  # Chain of each player's text, identified by its round 1 author
+                "drawing_chains": {}  # Chain of each player's drawing
+            }
+            for round in range(first_round, last_round + 1)
+        }
+
+        next_round = [first_round]  # The next round to hand to on_round
+
+        def report_finished_rounds():
+            while next_round[0] <= last_round and len(history[next_round[0]]["drawings"]) == len(self.players):
+                round_data = self._in_player_order(history[next_round[0]])
+                if on_round is not None:
+                    on_round(round_data)
+                next_round[0] += 1
+
+        tracker = self.executor.tracker()
+        busy = set()  # Indices of players with a call in flight
+        queued = {index: deque() for index in range(len(self.players))}
+
+        def submit(index, previous_output, phase, round, chain_id):
+            player = self.players[index]
+            if index in busy and not player.concurrent_input:
+                queued[index].append((previous_output, phase, round, chain_id))
+                return
+            busy.add(index)
+            # In pipelined play a phase budget applies to each chain's step on its own
+            tracker.submit((index, phase, round, chain_id), provide_input, player, previous_output, phase, round,
+                           deadline=self.executor.deadline(phase))
+
+        def finish(index, phase, round, chain_id, output):
+            busy.discard(index)
+            player = self.players[index]
+            round_data = history[round]
+            if phase in ('create_text', 'guess_text'):
+                round_data["texts"][player.name] = output
+                round_data["text_chains"][player.name] = chain_id
+                drawer = receivers['draw'][round][index]
+                round_data["draw_assignments"][self.players[drawer].name] = output
+                submit(drawer, output, 'draw', round, chain_id)
+            elif phase == 'draw':
+                round_data["drawings"][player.name] = output
+                round_data["drawing_chains"][player.name] = chain_id
+                report_finished_rounds()
+                if round < last_round:
+                    guesser = receivers['guess_text'][round + 1][index]
+                    history[round + 1]["guess_assignments"][self.players[guesser].name] = output
+                    submit(guesser, output, 'guess_text', round + 1, chain_id)
+            if queued[index]:
+                submit(index, *queued[index].popleft())
+
+        display_message(f"\n--- Rounds {first_round}-{last_round} (pipelined) ---")
+        try:
+            for index, player in enumerate(self.players):
+                if previous_round is None:
+                    # Every player starts the chain named after them
+                    submit(index, None, 'create_text', first_round, player.name)
+                else:
+                    guesser = receivers['guess_text'][first_round][index]
+                    drawing = previous_round["drawings"].get(player.name)
+                    chain_id = previous_round.get("drawing_chains", {}).get(player.name)
+                    history[first_round]["guess_assignments"][self.players[guesser].name] = drawing
+                    submit(guesser, drawing, 'guess_text', first_round, chain_id)
+
+            while tracker.pending():
+                finished, expired = tracker.poll()
+                for (index, phase, round, chain_id), future in finished:
+                    output = self.executor.result(future, self.players[index].name, phase)
+                    finish(index, phase, round, chain_id, output)
+                for index, phase, round, chain_id in expired:
+                    output = self.executor.timed_out(self.players[index].name, phase)
+                    finish(index, phase, round, chain_id, output)
+        finally:
+            tracker.shutdown()
+
+        return [self._in_player_order(history[round]) for round in range(first_round, last_round + 1)]
+
+    def _in_player_order(self, round_data):
+        """
+        Orders each mapping in round_data by player, like the round-by-round mode does.
+        """
+        names = [player.name for player in self.players]
+        for key in ("texts", "draw_assignments", "guess_assignments", "drawings", "text_chains", "drawing_chains"):
+            entries = round_data[key]
+            round_data[key] = {name: entries[name] for name in names if name in entries}
+        return round_data
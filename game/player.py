@@ -3,6 +3,9 @@ from abc import ABC, abstractmethod
 
 
 class Player(ABC):
+    # Whether provide_input may run again before an earlier call has returned
+    concurrent_input = False
+
     def __init__(self, name):
         self.name = name
 
@@ -1,8 +1,17 @@
 # main.py
+import os
+
+from ai.clients import close_registry
+from ai.image_pipeline import close_image_pipeline, get_image_pipeline
+from ai.prompt_pool import get_prompt_pool
 from game.ai_player import AIPlayer
 from game.game import Game
 from game.human_player import HumanPlayer
 from ui.console_ui import display_message, get_user_input
+from utils.metrics import get_metrics
+
+# Every finished round is appended here; the next run can continue the game
+HISTORY_PATH = "game_history.jsonl"
 
 
 def initialize_players():
@@ -59,6 +68,11 @@ def initialize_players():
 def main():
     display_message("Welcome to Gentic Phone!")
 
+    # Timings and counters are recorded only when they are going to be written somewhere
+    metrics_dir = os.environ.get("METRICS_DIR")
+    if metrics_dir:
+        get_metrics().enable()
+
     players = initialize_players()
 
     display_message("\nPlayers in the game:")
@@ -66,8 +80,22 @@ def main():
         player_type = "Human" if isinstance(player, HumanPlayer) else "AI"
         display_message(f"- {player.name} ({player_type})")
 
-    # Initialize and start the game
-    game = Game(players)
+    # Encode the image used for failed AI drawings and fetch the first prompts now, while the
+    # number of rounds is being entered, rather than during the first round
+    if any(isinstance(player, AIPlayer) for player in players):
+        get_image_pipeline().fallback()
+        get_prompt_pool().prefetch()
+
+    # Initialize and start the game; each finished round is appended to the history log
+    game = Game(players, history_path=HISTORY_PATH)
+    if os.path.exists(HISTORY_PATH):
+        resume = get_user_input(f"Continue the game saved in '{HISTORY_PATH}'? (yes/no): ").strip().lower()
+        if resume in ['yes', 'y']:
+            try:
+                game.resume(HISTORY_PATH)
+                display_message(f"Continuing after round {game.round}.")
+            except ValueError as exc:
+                display_message(f"Cannot continue that game: {exc} Starting a new one.")
     while True:
         try:
             rounds = int(get_user_input("\nEnter the number of rounds you want to play: ").strip())
@@ -79,11 +107,19 @@ def main():
             display_message("Please enter a valid integer for the number of rounds.")
 
     game.start(rounds=rounds)
+    display_message(f"\nGame history saved to '{HISTORY_PATH}'")
+    if metrics_dir:
+        os.makedirs(metrics_dir, exist_ok=True)
+        get_metrics().export_trace(os.path.join(metrics_dir, "trace.json"))
+        get_metrics().export_prometheus(os.path.join(metrics_dir, "metrics.prom"))
+        display_message(f"Trace and metrics saved to '{metrics_dir}'")
 
     # Display game history
     game.display_history()
 
     display_message("\nGame Over!")
+    close_registry()
+    close_image_pipeline()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,60 @@
+# server/__main__.py
+"""
+Hosts game lobbies for remote human players and shared AI players.
+
+Run from the repository root:
+    python -m server --port 8765 --backend local
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+
+from server.app import GameServer
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Host Gentic Phone lobbies over HTTP and WebSocket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--backend", choices=["gemini", "local"], default="gemini")
+    parser.add_argument("--max-lobbies", type=int, default=500)
+    parser.add_argument("--turn-timeout", type=float, default=120.0, help="Seconds a human has for a turn")
+    parser.add_argument("--output", default="server_output", help="Directory that receives one subdirectory per lobby")
+    parser.add_argument("--verbose", action="store_true", help="Print the progress messages of every game")
+    return parser.parse_args(argv)
+
+
+async def serve(args):
+    if args.backend == "local":
+        from ai.backends import LocalBackend
+
+        backend = LocalBackend()
+    else:
+        backend = None
+    server = GameServer(backend=backend, directory=args.output, max_lobbies=args.max_lobbies,
+                        turn_timeout=args.turn_timeout)
+    port = await server.start(args.host, args.port)
+    # On stderr, so it shows even when the games' output on stdout is discarded
+    print(f"Serving lobbies on http://{args.host}:{port}/lobbies", file=sys.stderr, flush=True)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.stop()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Every game prints its progress; with many lobbies that is only noise
+    with contextlib.ExitStack() as stack:
+        if not args.verbose:
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+        try:
+            asyncio.run(serve(args))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+# server/app.py
+import asyncio
+import json
+import os
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from server.lobby import TURN_TIMEOUT, Lobby
+from server.websocket import ConnectionClosed, WebSocket, accept_key
+
+# Largest HTTP request body accepted
+MAX_BODY = 8 * 1024 * 1024
+
+STATUS_TEXT = {200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 403: "Forbidden",
+               404: "Not Found", 405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+               503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class GameServer:
+    """
+    Hosts many lobbies on one asyncio event loop. Humans play over HTTP or a WebSocket;
+    AI players of every lobby share one backend and therefore one set of provider clients,
+    rate limits and caches.
+
+    HTTP API (JSON bodies and responses):
+        POST /lobbies                            {"humans", "ai_players", "rounds", "seed"} -> lobby summary
+        GET  /lobbies                            -> list of lobby summaries
+        GET  /lobbies/<id>                       -> lobby summary
+        POST /lobbies/<id>/join                  {"name"} -> {"player", "token"}
+        GET  /lobbies/<id>/history               -> the game history so far
+        GET  /lobbies/<id>/drawings/<file>       -> a PNG drawing
+        GET  /lobbies/<id>/turn?name=&token=     -> the open turn, or 204
+        POST /lobbies/<id>/turn?name=&token=     {"turn", "text"} or {"turn", "image"} (base64 PNG)
+        GET  /lobbies/<id>/ws?name=&token=       WebSocket; the server pushes turn, timeout, started and
+                                                 game_over messages and accepts submit messages
+                                                 {"type": "submit", "turn", "text"/"image"}
+
+    Parameters:
+        backend (AIBackend): The backend of all AI players. Defaults to GeminiBackend.
+        directory (str): Where each lobby gets a subdirectory for its drawings and history.
+        max_lobbies (int): Number of lobbies that may exist at once; finished lobbies are
+            removed to make room for new ones.
+        turn_timeout (float): Seconds a human has for each turn.
+    """
+
+    def __init__(self, backend=None, directory="server_output", max_lobbies=500, turn_timeout=TURN_TIMEOUT):
+        if backend is None:
+            from ai.backends import GeminiBackend
+
+            backend = GeminiBackend()
+        self.backend = backend
+        self.directory = directory
+        self.max_lobbies = max_lobbies
+        self.turn_timeout = turn_timeout
+        self.lobbies = {}
+        # Every running game holds a thread for its whole length
+        self.games = ThreadPoolExecutor(max_workers=max_lobbies, thread_name_prefix="lobby")
+        self.loop = None
+        self._server = None
+
+    async def start(self, host="127.0.0.1", port=8765):
+        """
+        Starts listening and returns the port, which is chosen by the system if port is 0.
+        """
+        self.loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self.handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self.games.shutdown(wait=False, cancel_futures=True)
+
+    async def handle(self, reader, writer):
+        """
+        Serves one connection: a single HTTP request, or a WebSocket session.
+        """
+        try:
+            method, target, headers, body = await self.read_request(reader)
+            url = urlsplit(target)
+            parts = [part for part in url.path.split("/") if part]
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            if headers.get("upgrade", "").lower() == "websocket":
+                await self.websocket(reader, writer, parts, query, headers)
+                return
+            status, payload, content_type = await self.route(method, parts, query, body)
+        except HTTPError as e:
+            status, payload, content_type = e.status, {"error": str(e)}, "application/json"
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+        await self.respond(writer, status, payload, content_type)
+
+    async def read_request(self, reader):
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0) or 0)
+        except ValueError:
+            raise HTTPError(400, "Malformed Content-Length")
+        if length > MAX_BODY:
+            raise HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method, target, headers, body
+
+    async def respond(self, writer, status, payload, content_type="application/json"):
+        if content_type == "application/json":
+            data = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        else:
+            data = payload
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        try:
+            writer.write(head.encode("latin-1") + data)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def route(self, method, parts, query, body):
+        """
+        Handles a plain HTTP request and returns (status, payload, content type).
+        """
+        if not parts or parts[0] != "lobbies":
+            raise HTTPError(404, "Not found")
+        if len(parts) == 1:
+            if method == "GET":
+                return 200, [lobby.summary() for lobby in self.lobbies.values()], "application/json"
+            if method == "POST":
+                return 201, self.create_lobby(_json(body)).summary(), "application/json"
+            raise HTTPError(405, "Use GET or POST")
+
+        lobby = self.lobbies.get(parts[1])
+        if lobby is None:
+            raise HTTPError(404, "No such lobby")
+        action = parts[2] if len(parts) > 2 else None
+        if action is None and method == "GET":
+            return 200, lobby.summary(), "application/json"
+        if action == "join" and method == "POST":
+            try:
+                player = lobby.join(str(_json(body).get("name", "")).strip())
+            except ValueError as e:
+                raise HTTPError(409, str(e))
+            self.start_if_ready(lobby)
+            return 201, {"player": player.name, "token": player.token}, "application/json"
+        if action == "history" and method == "GET":
+            return 200, lobby.history(), "application/json"
+        if action == "drawings" and method == "GET" and len(parts) == 4:
+            path = os.path.join(lobby.directory, "drawings", os.path.basename(parts[3]))
+            if not os.path.isfile(path):
+                raise HTTPError(404, "No such drawing")
+            with open(path, "rb") as f:
+                return 200, f.read(), "image/png"
+        if action == "turn":
+            player = self.authenticate(lobby, query)
+            if method == "GET":
+                message = player.pending_message()
+                return (204, None, "application/json") if message is None else (200, message, "application/json")
+            if method == "POST":
+                answer = _json(body)
+                error = await asyncio.to_thread(
+                    player.submit, answer.get("turn"), text=answer.get("text"), image=answer.get("image")
+                )
+                if error:
+                    raise HTTPError(409, error)
+                return 200, {"accepted": answer.get("turn")}, "application/json"
+        raise HTTPError(404, "Not found")
+
+    def create_lobby(self, spec):
+        try:
+            humans = int(spec.get("humans", 1))
+            ai_players = int(spec.get("ai_players", 2))
+            rounds = int(spec.get("rounds", 3))
+        except (TypeError, ValueError):
+            raise HTTPError(400, "humans, ai_players and rounds must be integers")
+        if humans < 0 or ai_players < 0 or rounds < 1 or humans + ai_players < 3:
+            raise HTTPError(400, "The game requires at least 3 players and 1 round")
+        if len(self.lobbies) >= self.max_lobbies:
+            # Make room by forgetting finished lobbies, oldest first
+            done = sorted((lobby for lobby in self.lobbies.values() if lobby.finished), key=lambda l: l.finished)
+            for lobby in done[:len(self.lobbies) - self.max_lobbies + 1]:
+                del self.lobbies[lobby.id]
+            if len(self.lobbies) >= self.max_lobbies:
+                raise HTTPError(503, "Too many lobbies")
+
+        lobby_id = secrets.token_hex(4)
+        while lobby_id in self.lobbies:
+            lobby_id = secrets.token_hex(4)
+        lobby = Lobby(lobby_id, self.loop, os.path.join(self.directory, f"lobby_{lobby_id}"), humans, ai_players,
+                      self.backend, rounds=rounds, turn_timeout=self.turn_timeout, seed=spec.get("seed"))
+        self.lobbies[lobby_id] = lobby
+        self.start_if_ready(lobby)
+        return lobby
+
+    def start_if_ready(self, lobby):
+        if lobby.ready():
+            lobby.state = "starting"
+            self.games.submit(lobby.play)
+
+    def authenticate(self, lobby, query):
+        player = lobby.remote.get(query.get("name"))
+        if player is None or not secrets.compare_digest(player.token, query.get("token", "")):
+            raise HTTPError(403, "Unknown player or wrong token")
+        return player
+
+    async def websocket(self, reader, writer, parts, query, headers):
+        """
+        Runs a player's WebSocket session until it closes.
+        """
+        lobby = self.lobbies.get(parts[1]) if len(parts) == 3 and parts[0] == "lobbies" and parts[2] == "ws" else None
+        if lobby is None:
+            raise HTTPError(404, "No such lobby")
+        player = self.authenticate(lobby, query)
+        key = headers.get("sec-websocket-key")
+        if not key:
+            raise HTTPError(400, "Missing Sec-WebSocket-Key")
+        writer.write(
+            (
+                "HTTP/1.1 101 Switching Protocols\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n"
+            ).encode("ascii")
+        )
+        await writer.drain()
+
+        socket = WebSocket(reader, writer)
+        previous, player.socket = player.socket, socket
+        if previous is not None:
+            await previous.close()
+        await socket.send(json.dumps({"type": "welcome", "lobby": lobby.id, "player": player.name,
+                                      "state": lobby.state}))
+        # A turn that was published before the player connected
+        pending = player.pending_message()
+        if pending is not None:
+            await socket.send(json.dumps(pending))
+        try:
+            while True:
+                try:
+                    message = json.loads(await socket.receive())
+                except (ValueError, UnicodeDecodeError):
+                    await socket.send(json.dumps({"type": "error", "message": "Messages must be JSON"}))
+                    continue
+                if not isinstance(message, dict) or message.get("type") != "submit":
+                    await socket.send(json.dumps({"type": "error", "message": "Unknown message"}))
+                    continue
+                # Decoding and normalizing a drawing is CPU work; keep it off the event loop
+                error = await asyncio.to_thread(
+                    player.submit, message.get("turn"), text=message.get("text"), image=message.get("image")
+                )
+                reply = {"type": "error", "message": error} if error else {"type": "accepted", "turn": message.get("turn")}
+                await socket.send(json.dumps(reply))
+        except ConnectionClosed:
+            pass
+        finally:
+            if player.socket is socket:
+                player.socket = None
+            await socket.close()
+
+
+def _json(body):
+    try:
+        value = json.loads(body or b"{}")
+    except ValueError:
+        raise HTTPError(400, "The body must be JSON")
+    if not isinstance(value, dict):
+        raise HTTPError(400, "The body must be a JSON object")
+    return value
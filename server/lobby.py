@@ -0,0 +1,255 @@
+# server/lobby.py
+import asyncio
+import base64
+import itertools
+import json
+import os
+import secrets
+import threading
+import time
+
+from ai.image_pipeline import get_image_pipeline
+from game.ai_player import AIPlayer
+from game.game import Game
+from game.phase_executor import PHASE_FALLBACKS
+from game.player import Player
+
+# Seconds a connected human has for a turn before the phase fallback is used
+TURN_TIMEOUT = 120.0
+
+
+class Turn:
+    """
+    One request for input from a remote player, answered by submit().
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, phase, round, text=None, image=None):
+        self.id = next(self._ids)
+        self.phase = phase
+        self.round = round
+        self.text = text
+        self.image = image  # base64 PNG of the drawing to guess
+        self.output = None
+        self.done = threading.Event()
+
+    def message(self, deadline_s):
+        return {
+            "type": "turn",
+            "turn": self.id,
+            "phase": self.phase,
+            "round": self.round,
+            "text": self.text,
+            "image": self.image,
+            "deadline_s": deadline_s,
+        }
+
+
+class RemotePlayer(Player):
+    """
+    A human playing through the server. provide_input runs on a game thread: it publishes a Turn,
+    pushes it to the player's WebSocket if one is open, and waits until the answer arrives by
+    WebSocket or HTTP, or until turn_timeout passes.
+
+    Parameters:
+        name (str): The player's name.
+        lobby (Lobby): The lobby the player joined.
+        turn_timeout (float): Seconds to wait for an answer before the phase fallback is used.
+    """
+
+    def __init__(self, name, lobby, turn_timeout=TURN_TIMEOUT):
+        Player.__init__(self, name)
+        self.lobby = lobby
+        self.turn_timeout = turn_timeout
+        self.token = secrets.token_urlsafe(16)
+        self.socket = None  # The open WebSocket, if any
+        self.turn = None  # The Turn waiting for an answer, if any
+        self._lock = threading.Lock()
+
+    def provide_input(self, previous_output, phase, round):
+        if phase == 'guess_text':
+            if not previous_output or not os.path.exists(previous_output):
+                return "No guess"
+            with open(previous_output, "rb") as f:
+                turn = Turn(phase, round, image=base64.b64encode(f.read()).decode("ascii"))
+        elif phase == 'draw':
+            if not isinstance(previous_output, str) or previous_output in ["No prompt", "No guess"]:
+                return "No drawing"
+            turn = Turn(phase, round, text=previous_output)
+        else:
+            turn = Turn(phase, round)
+
+        with self._lock:
+            self.turn = turn
+        self.lobby.push(self, turn.message(self.turn_timeout))
+        answered = turn.done.wait(self.turn_timeout)
+        with self._lock:
+            self.turn = None
+        if not answered:
+            self.lobby.push(self, {"type": "timeout", "turn": turn.id})
+            return PHASE_FALLBACKS.get(phase)
+        return turn.output
+
+    def submit(self, turn_id, text=None, image=None):
+        """
+        Answers the open turn. The server calls it in a worker thread (asyncio.to_thread), since a
+        drawing is decoded and normalized here, while the game thread may be closing the same turn;
+        both sides hold the player's lock.
+
+        Returns:
+            str: None on success, otherwise why the answer was rejected.
+        """
+        with self._lock:
+            turn = self.turn
+            if turn is None or turn.id != turn_id or turn.done.is_set():
+                return "No such turn is open"
+            if turn.phase == 'draw':
+                if not image:
+                    return "A drawing turn needs an image"
+                try:
+                    # Normalized in the pipeline's worker processes, away from the event loop's GIL
+                    drawing = get_image_pipeline().normalize(base64.b64decode(image, validate=True))
+                except ValueError as e:
+                    return str(e)
+                turn.output = self.lobby.save_drawing(self.name, turn.round, drawing)
+            else:
+                if not isinstance(text, str) or not text.strip():
+                    return "A text turn needs text"
+                turn.output = text.strip()[:500]
+            turn.done.set()
+        return None
+
+    def pending_message(self):
+        with self._lock:
+            if self.turn is None or self.turn.done.is_set():
+                return None
+            return self.turn.message(self.turn_timeout)
+
+    def receive_output(self, output, phase):
+        pass
+
+
+class Lobby:
+    """
+    One game hosted by the server, isolated from the others: its own players, Game, history
+    log and drawings directory. The game runs on a thread from the server's game pool and
+    starts once every human seat is taken.
+
+    Parameters:
+        lobby_id (str): The lobby's identifier.
+        loop (asyncio.AbstractEventLoop): The server's event loop, which owns the WebSockets.
+        directory (str): Where the lobby keeps its drawings and history.
+        humans (int): Number of seats for remote human players.
+        ai_players (int): Number of AI players.
+        backend (AIBackend): Shared by the AI players of every lobby.
+        rounds (int): Number of rounds to play.
+        turn_timeout (float): Seconds a human has for each turn.
+        seed: Seed of the game's assignment schedule.
+    """
+
+    def __init__(self, lobby_id, loop, directory, humans, ai_players, backend, rounds=3,
+                 turn_timeout=TURN_TIMEOUT, seed=None):
+        self.id = lobby_id
+        self.loop = loop
+        self.directory = directory
+        self.humans = humans
+        self.rounds = rounds
+        self.turn_timeout = turn_timeout
+        self.state = "waiting"  # Then "starting", "playing", and "finished" or "failed"
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.remote = {}  # Maps names to RemotePlayers
+        self.ai = [
+            AIPlayer(f"AI Bot {i}", backend=backend, drawings_dir=os.path.join(directory, "drawings"))
+            for i in range(1, ai_players + 1)
+        ]
+        self.seed = seed
+        self.game = None
+        self._lock = threading.Lock()
+
+    def join(self, name):
+        """
+        Takes a seat for a human player.
+
+        Returns:
+            RemotePlayer: The new player.
+
+        Raises:
+            ValueError: If the lobby is full or has started, or the name is taken.
+        """
+        with self._lock:
+            if self.state != "waiting" or len(self.remote) >= self.humans:
+                raise ValueError("The lobby is not open")
+            if not name or name in self.remote or any(player.name == name for player in self.ai):
+                raise ValueError("The name is empty or taken")
+            player = RemotePlayer(name, self, turn_timeout=self.turn_timeout)
+            self.remote[name] = player
+            return player
+
+    def ready(self):
+        with self._lock:
+            return self.state == "waiting" and len(self.remote) == self.humans
+
+    def play(self):
+        """
+        Plays the whole game. Runs on a game thread.
+        """
+        with self._lock:
+            self.state = "playing"
+            players = list(self.remote.values()) + self.ai
+        self.broadcast({"type": "started", "players": [player.name for player in players]})
+        try:
+            self.game = Game(players, history_path=os.path.join(self.directory, "history.jsonl"), seed=self.seed)
+            self.game.start(rounds=self.rounds)
+            self.state = "finished"
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+        self.finished = time.time()
+        self.broadcast({"type": "game_over", "state": self.state, "history": f"/lobbies/{self.id}/history"})
+
+    def save_drawing(self, player_name, round, data):
+        """
+        Stores a human's drawing and returns its path.
+        """
+        drawings_dir = os.path.join(self.directory, "drawings")
+        os.makedirs(drawings_dir, exist_ok=True)
+        path = os.path.join(drawings_dir, f"{player_name}_drawing_{round}.png")
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def push(self, player, message):
+        """
+        Sends a message to a remote player's WebSocket, if it is open. Safe to call from any thread.
+        """
+        socket = player.socket
+        if socket is None or socket.closed:
+            return
+        text = json.dumps(message)
+        try:
+            asyncio.run_coroutine_threadsafe(socket.send(text), self.loop)
+        except RuntimeError:
+            pass  # The event loop is shutting down
+
+    def broadcast(self, message):
+        for player in list(self.remote.values()):
+            self.push(player, message)
+
+    def summary(self):
+        with self._lock:
+            return {
+                "id": self.id,
+                "state": self.state,
+                "humans": self.humans,
+                "joined": sorted(self.remote),
+                "ai_players": len(self.ai),
+                "rounds": self.rounds,
+                "round": self.game.round if self.game else 0,
+                "error": self.error,
+            }
+
+    def history(self):
+        return self.game.history.to_list() if self.game else []
@@ -0,0 +1,178 @@
+# server/websocket.py
+"""
+The parts of the WebSocket protocol (RFC 6455) the game server and its load test need:
+the opening handshake and text, close and ping/pong frames on asyncio streams.
+"""
+import asyncio
+import base64
+import hashlib
+import os
+import struct
+
+# Appended to the client's key to compute Sec-WebSocket-Accept
+GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+# Largest message accepted; a drawing sent as base64 PNG is well below this
+MAX_MESSAGE = 8 * 1024 * 1024
+
+
+class ConnectionClosed(Exception):
+    """
+    Raised when the other side closed the connection.
+    """
+    pass
+
+
+def accept_key(key):
+    """
+    Returns the Sec-WebSocket-Accept value answering the client's Sec-WebSocket-Key.
+    """
+    digest = hashlib.sha1((key + GUID).encode("ascii")).digest()
+    return base64.b64encode(digest).decode("ascii")
+
+
+class WebSocket:
+    """
+    A WebSocket connection over an asyncio stream pair.
+
+    Parameters:
+        reader (asyncio.StreamReader): The connection's input.
+        writer (asyncio.StreamWriter): The connection's output.
+        client (bool): Whether this is the client side, which must mask the frames it sends.
+    """
+
+    def __init__(self, reader, writer, client=False):
+        self.reader = reader
+        self.writer = writer
+        self.client = client
+        self.closed = False
+        self._send_lock = asyncio.Lock()
+
+    async def send(self, text):
+        await self._send_frame(OP_TEXT, text.encode("utf-8"))
+
+    async def receive(self):
+        """
+        Returns the next text message. Answers pings on the way.
+        Raises ConnectionClosed once the connection is closed.
+        """
+        parts = []
+        while True:
+            opcode, fin, payload = await self._read_frame()
+            if opcode == OP_PING:
+                await self._send_frame(OP_PONG, payload)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                if not self.closed:
+                    await self.close()
+                raise ConnectionClosed()
+            parts.append(payload)
+            if sum(len(part) for part in parts) > MAX_MESSAGE:
+                await self.close(1009)
+                raise ConnectionClosed()
+            if fin:
+                return b"".join(parts).decode("utf-8")
+
+    async def close(self, code=1000):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            await self._send_frame(OP_CLOSE, struct.pack("!H", code))
+        except (ConnectionError, RuntimeError):
+            pass
+        self.writer.close()
+
+    async def _read_frame(self):
+        try:
+            head = await self.reader.readexactly(2)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            self.closed = True
+            raise ConnectionClosed()
+        fin = bool(head[0] & 0x80)
+        opcode = head[0] & 0x0F
+        masked = bool(head[1] & 0x80)
+        if masked == self.client:
+            # Clients must mask every frame and servers must not; either side closes on a frame
+            # that breaks this with a protocol error (RFC 6455, section 5.1)
+            await self.close(1002)
+            raise ConnectionClosed()
+        length = head[1] & 0x7F
+        try:
+            if length == 126:
+                length = struct.unpack("!H", await self.reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack("!Q", await self.reader.readexactly(8))[0]
+            if length > MAX_MESSAGE:
+                raise ConnectionClosed()
+            mask = await self.reader.readexactly(4) if masked else None
+            payload = await self.reader.readexactly(length)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            self.closed = True
+            raise ConnectionClosed()
+        if mask:
+            payload = _apply_mask(payload, mask)
+        return opcode, fin, payload
+
+    async def _send_frame(self, opcode, payload):
+        header = bytearray([0x80 | opcode])
+        mask_bit = 0x80 if self.client else 0
+        if len(payload) < 126:
+            header.append(mask_bit | len(payload))
+        elif len(payload) < 1 << 16:
+            header.append(mask_bit | 126)
+            header += struct.pack("!H", len(payload))
+        else:
+            header.append(mask_bit | 127)
+            header += struct.pack("!Q", len(payload))
+        if self.client:
+            mask = os.urandom(4)
+            header += mask
+            payload = _apply_mask(payload, mask)
+        async with self._send_lock:
+            self.writer.write(bytes(header) + payload)
+            await self.writer.drain()
+
+
+def _apply_mask(payload, mask):
+    # XOR with the repeated 4-byte mask, done on one big integer instead of byte by byte
+    repeated = (mask * (len(payload) // 4 + 1))[:len(payload)]
+    value = int.from_bytes(payload, "little") ^ int.from_bytes(repeated, "little")
+    return value.to_bytes(len(payload), "little")
+
+
+async def connect(host, port, path):
+    """
+    Opens a client WebSocket connection to ws://host:port/path.
+
+    Raises:
+        ConnectionError: If the server does not accept the upgrade.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    key = base64.b64encode(os.urandom(16)).decode("ascii")
+    writer.write(
+        (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {host}:{port}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n\r\n"
+        ).encode("ascii")
+    )
+    await writer.drain()
+    response = await reader.readuntil(b"\r\n\r\n")
+    status = response.split(b"\r\n", 1)[0]
+    if b" 101 " not in status or accept_key(key).encode("ascii") not in response:
+        writer.close()
+        raise ConnectionError(f"WebSocket upgrade refused: {status.decode('latin-1')}")
+    return WebSocket(reader, writer, client=True)
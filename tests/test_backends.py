@@ -0,0 +1,41 @@
+# tests/test_backends.py
+import io
+
+import pytest
+from PIL import Image
+
+from ai.backends import LocalBackend, LocalBackendError, with_article
+
+
+def test_with_article():
+    assert with_article("owl at night") == "An owl at night"
+    assert with_article("cat") == "A cat"
+
+
+def test_local_backend_is_deterministic(tmp_path):
+    first, second = LocalBackend(seed=5), LocalBackend(seed=5)
+    assert [first.generate_text() for _ in range(3)] == [second.generate_text() for _ in range(3)]
+    assert first.generate_drawing("A cat.") == second.generate_drawing("A cat.")
+    assert LocalBackend(seed=6).generate_text() != LocalBackend(seed=5).generate_text()
+
+
+def test_guess_reads_the_prompt_back_with_one_change(tmp_path):
+    backend = LocalBackend(seed=1, size=(64, 64))
+    prompt = "A robot reading a book in a kitchen."
+    data = backend.generate_drawing(prompt)
+    with Image.open(io.BytesIO(data)) as image:
+        assert image.size == (64, 64)
+        assert image.info["prompt"] == prompt
+    path = tmp_path / "drawing.png"
+    path.write_bytes(data)
+    guess = backend.generate_guess(str(path))
+    assert guess.startswith(("A ", "An ")) and guess != prompt
+    assert backend.calls == {"text": 0, "guess": 1, "draw": 1}
+
+
+def test_injected_failures():
+    backend = LocalBackend(seed=0, failure_rate=1.0)
+    with pytest.raises(LocalBackendError) as failure:
+        backend.generate_text()
+    assert failure.value.code is None
+    assert backend.failures["text"] == 1
@@ -0,0 +1,51 @@
+# tests/test_batch.py
+import json
+
+import pytest
+
+import batch
+from ai.backends import LocalBackend
+
+
+def test_command_line_overrides_config(tmp_path):
+    config = tmp_path / "batch.json"
+    config.write_text(json.dumps({"games": 5, "players": 6, "failure_rate": 0.1}))
+    spec = batch.parse_args(["--config", str(config), "--players", "4", "--pipelined"])
+    assert spec["games"] == 5 and spec["players"] == 4 and spec["failure_rate"] == 0.1
+    assert spec["pipelined"] is True and spec["rounds"] == batch.DEFAULTS["rounds"]
+
+
+@pytest.mark.parametrize("argv", [["--players", "2"], ["--rounds", "0"]])
+def test_invalid_specs_are_rejected(argv):
+    with pytest.raises(SystemExit):
+        batch.parse_args(argv)
+
+
+def test_unknown_config_options_are_rejected(tmp_path):
+    config = tmp_path / "batch.json"
+    config.write_text(json.dumps({"player": 4}))
+    with pytest.raises(SystemExit):
+        batch.parse_args(["--config", str(config)])
+
+
+def test_make_backend():
+    spec = dict(batch.DEFAULTS, latency=[0.0, 0.01])
+    backend = batch.make_backend(spec, 3)
+    assert isinstance(backend, LocalBackend) and backend.seed == 3 and backend.latency == (0.0, 0.01)
+
+
+def test_play_game_writes_its_directory(tmp_path):
+    spec = dict(batch.DEFAULTS, output=str(tmp_path), players=3, rounds=2)
+    summary = batch.play_game(spec, 7)
+    game_dir = tmp_path / "game_00007"
+    assert summary["rounds"] == 2 and summary["actions"] == 12 and summary["fallbacks"] == 0
+    assert json.loads((game_dir / "summary.json").read_text()) == summary
+    assert len((game_dir / "history.jsonl").read_text().splitlines()) == 2
+    assert len(list((game_dir / "drawings").iterdir())) == 6
+
+
+def test_main_plays_every_game(tmp_path):
+    assert batch.main(["--games", "2", "--players", "3", "--rounds", "1", "--processes", "1",
+                       "--output", str(tmp_path)]) == 0
+    summary = json.loads((tmp_path / "batch_summary.json").read_text())["summary"]
+    assert summary["games"] == 2 and summary["failed_games"] == 0
@@ -0,0 +1,114 @@
+# tests/test_batched_guesses.py
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import batch
+from ai.ai_logic import generate_ai_guesses, parse_batch_guesses
+from ai.backends import BatchedGuesses, LocalBackend
+from ai.rate_limiter import RequestScheduler
+
+
+def test_parse_batch_guesses_in_drawing_order():
+    text = '[{"drawing": 2, "guess": "A dog"}, {"drawing": 1, "guess": " A cat "}]'
+    assert parse_batch_guesses(text, 2) == ["A cat", "A dog"]
+
+
+def test_parse_batch_guesses_strips_a_code_fence():
+    text = '```json\n[{"drawing": 1, "guess": "A cat"}]\n```'
+    assert parse_batch_guesses(text, 1) == ["A cat"]
+
+
+def test_parse_batch_guesses_leaves_gaps_for_unusable_answers():
+    text = ('[{"guess": "A cat"}, "not an object", {"drawing": 9, "guess": "A fish"},'
+            ' {"drawing": 3, "guess": "  "}, {"drawing": 4, "guess": 7}]')
+    # Without a drawing number an answer counts for its position
+    assert parse_batch_guesses(text, 4) == ["A cat", None, None, None]
+
+
+@pytest.mark.parametrize("text", ['{"drawing": 1, "guess": "A cat"}', "A cat", ""])
+def test_parse_batch_guesses_rejects_other_answers(text):
+    with pytest.raises(ValueError):
+        parse_batch_guesses(text, 1)
+
+
+class FakeSubmitter:
+    def parts(self, drawing_paths):
+        return [{"mime_type": "image/png", "data": drawing_path.encode()} for drawing_path in drawing_paths]
+
+
+class FakeModel:
+    def __init__(self, text):
+        self.text = text
+        self.requests = []
+
+    def generate_content(self, parts, generation_config=None):
+        self.requests.append(parts)
+        return SimpleNamespace(text=self.text)
+
+
+def test_generate_ai_guesses_sends_one_request():
+    model = FakeModel('[{"drawing": 1, "guess": "A cat"}, {"drawing": 2, "guess": "A dog"}]')
+    scheduler = RequestScheduler(limits={("gemini", "generate_content"): {"rate": 1000.0, "burst": 1000,
+                                                                          "initial_concurrency": 4}})
+    guesses = generate_ai_guesses(["a.png", "b.png"], model, submitter=FakeSubmitter(), scheduler=scheduler)
+    assert guesses == ["A cat", "A dog"]
+    assert len(model.requests) == 1
+    assert {"mime_type": "image/png", "data": b"b.png"} in model.requests[0]
+
+
+def test_batch_runner_wraps_the_backend():
+    assert isinstance(batch.make_backend(dict(batch.DEFAULTS, batch_guesses=4), 1), BatchedGuesses)
+    assert isinstance(batch.make_backend(dict(batch.DEFAULTS, batch_guesses=1), 1), LocalBackend)
+
+
+class RecordingBackend(LocalBackend):
+    def __init__(self, fail_batches=False):
+        super().__init__(seed=0)
+        self.batch_sizes = []
+        self.fail_batches = fail_batches
+
+    def generate_guess(self, drawing_path):
+        return f"single {drawing_path}"
+
+    def generate_guesses(self, drawing_paths):
+        self.batch_sizes.append(len(drawing_paths))
+        if self.fail_batches:
+            raise RuntimeError("batch failed")
+        return [f"batched {drawing_path}" for drawing_path in drawing_paths]
+
+
+def guess_all(backend, paths):
+    results = {}
+    threads = [threading.Thread(target=lambda p=p: results.__setitem__(p, backend.generate_guess(p)))
+               for p in paths]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_batched_guesses_share_one_request():
+    backend = RecordingBackend()
+    batched = BatchedGuesses(backend, batch_size=4, max_wait=1.0)
+    results = guess_all(batched, [f"d{i}" for i in range(4)])
+    assert results == {f"d{i}": f"batched d{i}" for i in range(4)}
+    assert backend.batch_sizes == [4]
+    assert batched.batches == 1 and batched.batched == 4
+
+
+def test_lone_guess_is_sent_alone_after_max_wait():
+    backend = RecordingBackend()
+    batched = BatchedGuesses(backend, batch_size=4, max_wait=0.05)
+    assert batched.generate_guess("d0") == "single d0"
+    assert backend.batch_sizes == [] and batched.singles == 1
+
+
+def test_failed_batch_falls_back_to_single_guesses():
+    backend = RecordingBackend(fail_batches=True)
+    batched = BatchedGuesses(backend, batch_size=3, max_wait=1.0)
+    results = guess_all(batched, ["a", "b", "c"])
+    assert results == {"a": "single a", "b": "single b", "c": "single c"}
+    assert batched.singles == 3
@@ -0,0 +1,44 @@
+# tests/test_bench_game.py
+import os
+import tempfile
+
+import pytest
+
+from benchmarks.bench_game import RESULT_SCHEMA, parse_latency, phase_seconds, run_game
+from utils.metrics import get_metrics
+
+
+def test_parse_latency():
+    assert parse_latency("0.05") == 0.05
+    assert parse_latency("0.01:0.2") == (0.01, 0.2)
+
+
+def span(phase, started, duration):
+    return ("provide_input", {"phase": phase}, started, duration)
+
+
+def test_phase_seconds_covers_overlapping_turns_once():
+    spans = [span("draw", 0.0, 1.0), span("draw", 0.5, 1.0), span("draw", 3.0, 0.5), span("guess_text", 1.0, 0.25)]
+    assert phase_seconds(spans) == {"draw": 2.0, "guess_text": 0.25}
+
+
+@pytest.fixture
+def metrics(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))  # Where run_game makes its work directory
+    yield get_metrics()
+    get_metrics().disable()
+    get_metrics().reset()
+
+
+@pytest.mark.parametrize("mode", ["rounds", "pipelined"])
+def test_run_game_reports_every_phase(metrics, mode):
+    config = {"players": 3, "rounds": 2, "mode": mode, "latency": 0.0, "failure_rate": 0.0, "max_workers": None,
+              "seed": 0}
+    result = run_game(config)
+    # The work directory and the drawings in it are gone, and the caller's directory is restored
+    assert os.getcwd() == tempfile.gettempdir() and os.listdir() == []
+    assert result["schema"] == RESULT_SCHEMA
+    assert result["actions"] == 12
+    assert set(result["phase_s"]) == {"create_text", "guess_text", "draw"}
+    assert result["backend_calls"] == {"text": 3, "guess": 3, "draw": 6}
@@ -0,0 +1,83 @@
+# tests/test_chain_export.py
+import pytest
+from PIL import Image, features
+
+from ai.backends import LocalBackend
+from game.ai_player import AIPlayer
+from game.game import Game
+from ui.chain_export import CAPTION_HEIGHT, TILE_SIZE, ImageCache, _file_name, _file_names, export_chains, main
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    backend = LocalBackend(seed=8, size=(300, 200))
+    game = Game([AIPlayer(f"AI {i}", backend=backend) for i in range(3)], seed=8, history_path="game.jsonl")
+    game.start(rounds=2)
+    return game.history.to_list()
+
+
+def test_every_chain_gets_a_sheet_and_animations(history, tmp_path):
+    results = export_chains(history, str(tmp_path / "chains"), processes=0)
+    assert set(results) == {"AI 0", "AI 1", "AI 2"}
+    sheet, gif = results["AI 0"][:2]
+    with Image.open(sheet) as image:
+        # Two rounds of a text and a drawing, two tiles per row
+        assert image.size[1] > 2 * (TILE_SIZE + CAPTION_HEIGHT)
+    with Image.open(gif) as image:
+        assert image.n_frames == 4
+    assert len(results["AI 0"]) == (3 if features.check("webp") else 2)
+
+
+def test_missing_drawings_become_a_note(tmp_path):
+    history = [{"round": 1, "texts": {"ann": "A cat", "bob": "A dog", "cid": "A fish"},
+                "draw_assignments": {"ann": "A dog", "bob": "A fish", "cid": "A cat"},
+                "drawings": {"ann": "No drawing", "bob": "gone.png", "cid": "No drawing"}}]
+    results = export_chains(history, str(tmp_path), processes=0, formats=("gif",))
+    assert all(len(paths) == 1 for paths in results.values())
+
+
+def test_worker_processes_render_the_same_files(history, tmp_path):
+    in_process = export_chains(history, str(tmp_path / "here"), processes=0, formats=("sheet",))
+    in_pool = export_chains(history, str(tmp_path / "pool"), processes=2, formats=("sheet",))
+    for chain_id in in_process:
+        with Image.open(in_process[chain_id][0]) as first, Image.open(in_pool[chain_id][0]) as second:
+            assert first.tobytes() == second.tobytes()
+
+
+def test_image_cache_reuses_decoded_drawings(tmp_path):
+    path = tmp_path / "drawing.png"
+    Image.new("RGB", (1000, 500), "red").save(path)
+    cache = ImageCache(size=100, max_items=1)
+    image = cache.get(str(path))
+    assert image.size == (100, 50) and image.mode == "L"
+    assert cache.get(str(path)) is image
+    assert cache.get(str(tmp_path / "missing.png")) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_file_names_are_safe():
+    assert _file_name("AI Bot 1") == "AI_Bot_1"
+    assert _file_name("../../etc") == ".._.._etc"
+    assert _file_name("///") == "chain"
+
+
+def test_chains_with_the_same_file_name_keep_their_own_files(tmp_path):
+    names = _file_names(["a b", "a_b", "AI 0", "///", "???"])
+    assert names["AI 0"] == "AI_0"
+    assert len(set(names.values())) == 5
+    assert names["a b"].startswith("a_b-") and names["///"].startswith("chain-")
+    history = [{"round": 1, "texts": {"a b": "A cat", "a_b": "A dog", "///": "A fish"},
+                "draw_assignments": {"a b": "A dog", "a_b": "A fish", "///": "A cat"},
+                "drawings": {"a b": "No drawing", "a_b": "No drawing", "///": "No drawing"}}]
+    for processes in (0, 2):
+        directory = tmp_path / str(processes)
+        results = export_chains(history, str(directory), processes=processes, formats=("sheet",))
+        assert len({paths[0] for paths in results.values()}) == 3
+        assert len(list(directory.iterdir())) == 3
+
+
+def test_command_line(history, tmp_path, capsys):
+    assert main(["game.jsonl", "--output", str(tmp_path / "cli"), "--processes", "0", "--formats", "sheet"]) == 0
+    assert "Exported 3 chains" in capsys.readouterr().out
+    assert len(list((tmp_path / "cli").iterdir())) == 3
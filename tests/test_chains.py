@@ -0,0 +1,63 @@
+# tests/test_chains.py
+from game.chains import ChainIndex, chains_of_round
+
+HISTORY = [
+    {
+        "round": 1,
+        "texts": {"ann": "A cat", "bob": "A dog"},
+        "draw_assignments": {"ann": "A dog", "bob": "A cat"},
+        "guess_assignments": {},
+        "drawings": {"ann": "ann_1.png", "bob": "bob_1.png"},
+        "text_chains": {"ann": "ann", "bob": "bob"},
+        "drawing_chains": {"ann": "bob", "bob": "ann"},
+    },
+    {
+        "round": 2,
+        "texts": {"ann": "A kitten", "bob": "A wolf"},
+        "draw_assignments": {"ann": "A wolf", "bob": "A kitten"},
+        "guess_assignments": {"ann": "bob_1.png", "bob": "ann_1.png"},
+        "drawings": {"ann": "ann_2.png", "bob": "bob_2.png"},
+        "text_chains": {"ann": "ann", "bob": "bob"},
+        "drawing_chains": {"ann": "bob", "bob": "ann"},
+    },
+]
+
+ANN_CHAIN = [
+    {"player": "ann", "action": "Text", "content": "A cat"},
+    {"player": "bob", "action": "Drawing", "content": "bob_1.png"},
+    {"player": "ann", "action": "Guess", "content": "A kitten"},
+    {"player": "bob", "action": "Drawing", "content": "bob_2.png"},
+]
+
+
+def without_chains(history):
+    return [{key: value for key, value in round_data.items() if not key.endswith("_chains")}
+            for round_data in history]
+
+
+def test_chain_follows_recorded_chains():
+    index = ChainIndex(HISTORY)
+    assert index.chain_ids() == ["ann", "bob"]
+    assert index.chain("ann") == ANN_CHAIN
+    assert index.entry("bob", 1) == {"text": ("bob", "A wolf"), "drawing": ("ann", "ann_2.png")}
+    assert index.entry("carol", 0) is None
+
+
+def test_chains_are_inferred_for_older_histories():
+    assert ChainIndex(without_chains(HISTORY)).chains() == ChainIndex(HISTORY).chains()
+
+
+def test_duplicate_texts_go_to_different_chains():
+    round_data = {
+        "texts": {"ann": "No prompt", "bob": "No prompt", "cid": "A fish"},
+        "draw_assignments": {"ann": "No prompt", "bob": "A fish", "cid": "No prompt"},
+    }
+    text_chains, drawing_chains = chains_of_round(round_data)
+    assert text_chains == {"ann": "ann", "bob": "bob", "cid": "cid"}
+    assert drawing_chains["bob"] == "cid"
+    assert {drawing_chains["ann"], drawing_chains["cid"]} == {"ann", "bob"}
+
+
+def test_empty_history():
+    index = ChainIndex([])
+    assert index.chain_ids() == [] and index.chains() == {}
@@ -0,0 +1,74 @@
+# tests/test_clients.py
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ai.clients import ClientRegistry, close_registry, get_registry
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keeps connections alive
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_session_is_shared_and_reuses_connections(local_server):
+    registry = ClientRegistry()
+    session = registry.session()
+    assert registry.session() is session
+    for _ in range(3):
+        assert session.get(local_server, timeout=5).text == "ok"
+    stats = registry.stats()
+    assert stats["hits"]["session"] == 1 and stats["misses"]["session"] == 1
+    assert stats["connections"] == {"requests": 3, "opened": 1, "reused": 2}
+    registry.close()
+    assert registry.session() is not session
+
+
+def test_text_model_needs_an_api_key(monkeypatch):
+    monkeypatch.delenv("API_KEY", raising=False)
+    with pytest.raises(RuntimeError, match="API_KEY"):
+        ClientRegistry().text_model()
+
+
+def test_text_models_are_shared_per_name(monkeypatch):
+    monkeypatch.setenv("API_KEY", "test-key")
+    registry = ClientRegistry()
+    model = registry.text_model()
+    assert registry.text_model() is model
+    assert registry.text_model("gemini-1.5-pro") is not model
+    assert registry.stats()["hits"]["text_model"] == 1
+
+
+def test_image_models_are_shared_per_parameters():
+    registry = ClientRegistry()
+    model = registry.image_model()
+    assert registry.image_model() is model
+    assert registry.image_model(width=200) is not model
+
+
+def test_process_wide_registry():
+    registry = get_registry()
+    assert get_registry() is registry
+    close_registry()
+    assert get_registry() is not registry
+    close_registry()
@@ -0,0 +1,100 @@
+# tests/test_derangement.py
+import random
+from collections import Counter
+
+import pytest
+
+from utils.derangement import AssignmentSchedule, derangement
+
+
+@pytest.mark.parametrize("n", [2, 3, 5, 50])
+def test_derangement_moves_every_element(n):
+    rng = random.Random(n)
+    items = list(range(n))
+    for _ in range(50):
+        result = derangement(items, rng)
+        assert sorted(result) == items
+        assert all(value != position for position, value in enumerate(result))
+
+
+@pytest.mark.parametrize("items", [[], ["only"]])
+def test_derangement_of_fewer_than_two_is_impossible(items):
+    assert derangement(items) is None
+
+
+def test_derangement_is_uniform():
+    # The two derangements of three elements come up about equally often
+    rng = random.Random(0)
+    counts = Counter(tuple(derangement([0, 1, 2], rng)) for _ in range(3000))
+    assert set(counts) == {(1, 2, 0), (2, 0, 1)}
+    assert abs(counts[(1, 2, 0)] - counts[(2, 0, 1)]) < 300
+
+
+def phases(rounds):
+    for round in range(1, rounds + 1):
+        if round > 1:
+            yield round, 'guess_text'
+        yield round, 'draw'
+
+
+@pytest.mark.parametrize("players, rounds", [(3, 5), (4, 2), (7, 3), (10, 8), (101, 20)])
+def test_nobody_receives_their_own_work(players, rounds):
+    schedule = AssignmentSchedule([f"p{i}" for i in range(players)], rounds, seed=players)
+    for round, phase in phases(rounds):
+        sources = schedule.source_indices(round, phase)
+        assert sorted(sources) == list(range(players))
+        assert all(source != index for index, source in enumerate(sources))
+
+
+@pytest.mark.parametrize("players, rounds", [(4, 2), (6, 3), (9, 10), (40, 12)])
+def test_no_chain_visits_a_player_twice_within_repeat_free_rounds(players, rounds):
+    schedule = AssignmentSchedule([f"p{i}" for i in range(players)], rounds, seed=1)
+    repeat_free = schedule.repeat_free_rounds
+    assert repeat_free == min(rounds, players // 2)
+    for chain in range(players):
+        holders = [schedule.holder(chain, 1, 'create_text')]
+        holders += [schedule.holder(chain, round, phase) for round, phase in phases(repeat_free)]
+        assert holders[0] == chain
+        assert len(set(holders)) == len(holders)
+
+
+def test_holders_match_the_sources():
+    schedule = AssignmentSchedule([f"p{i}" for i in range(6)], 4, seed=3)
+    previous = {chain: schedule.holder(chain, 1, 'create_text') for chain in range(6)}
+    for round, phase in phases(4):
+        sources = schedule.source_indices(round, phase)
+        for chain in range(6):
+            holder = schedule.holder(chain, round, phase)
+            assert sources[holder] == previous[chain]
+            previous[chain] = holder
+
+
+def test_schedule_is_reproducible_from_its_seed():
+    names = ["ann", "bob", "cid", "dee"]
+    first, second = AssignmentSchedule(names, 3, seed=9), AssignmentSchedule(names, 3, seed=9)
+    assert [first.sources(round, phase) for round, phase in phases(3)] == \
+        [second.sources(round, phase) for round, phase in phases(3)]
+
+
+def test_rounds_outside_the_schedule_are_rejected():
+    schedule = AssignmentSchedule(["ann", "bob", "cid"], 2)
+    with pytest.raises(ValueError):
+        schedule.source_indices(3, 'draw')
+    with pytest.raises(ValueError):
+        schedule.source_indices(1, 'guess_text')
+    with pytest.raises(ValueError):
+        schedule.step(1, 'create_text')
+
+
+def test_one_player_gets_no_assignments():
+    assert AssignmentSchedule(["solo"], 2).sources(1, 'draw') is None
+
+
+def test_longer_schedules_begin_with_the_same_steps():
+    names = [f"p{i}" for i in range(40)]
+    short = AssignmentSchedule(names, 3, seed=0)
+    long = AssignmentSchedule(names, 30, seed=0)
+    for round in (1, 2, 3):
+        for phase in ('guess_text', 'draw'):
+            if (round, phase) != (1, 'guess_text'):
+                assert short.sources(round, phase) == long.sources(round, phase)
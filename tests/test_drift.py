@@ -0,0 +1,143 @@
+# tests/test_drift.py
+import json
+
+import numpy as np
+import pytest
+
+from ai.backends import LocalBackend
+from game.ai_player import AIPlayer
+from game.drift import DriftIndex, chain_texts, hash_ngrams, main, normalize_text
+
+
+def round_data(number, texts, chains):
+    return {"round": number, "texts": texts, "draw_assignments": {}, "guess_assignments": {},
+            "drawings": {name: "No drawing" for name in texts}, "text_chains": chains,
+            "drawing_chains": chains}
+
+
+def game(first, last):
+    """
+    A game of two chains: ann's keeps its text, bob's drifts from first to last.
+    """
+    chains = {"ann": "ann", "bob": "bob"}
+    return [round_data(1, {"ann": "a red house", "bob": first}, chains),
+            round_data(2, {"ann": "a red house", "bob": last}, chains)]
+
+
+def naive_drift(index, chain):
+    """
+    Drift from the first text to the last of a chain, from its TF-IDF vectors one text at a time.
+    """
+    idf = index.idf()
+    start, end = index.chain_starts[chain], index.chain_starts[chain + 1]
+    vectors = []
+    for row in (start, end - 1):
+        vector = np.zeros(index.dimensions)
+        entries = slice(index.indptr[row], index.indptr[row + 1])
+        vector[index.indices[entries]] = index.data[entries] * idf[index.indices[entries]]
+        vectors.append(vector / np.linalg.norm(vector))
+    return 1.0 - float(vectors[0] @ vectors[1])
+
+
+def test_normalize_text():
+    assert normalize_text("  A  Cat.\n") == "a cat"
+    assert normalize_text("Snake_case, really?!") == "snake case really"
+
+
+def test_hash_ngrams_stay_within_their_text():
+    docs, buckets = hash_ngrams(["ab", "", "abc"], ngram_range=(2, 2), dimensions=64)
+    # " ab " has 3 bigrams, " " 1 and " abc " 4; none span two texts
+    assert list(docs) == [0, 0, 0, 1, 2, 2, 2, 2]
+    assert buckets.min() >= 0 and buckets.max() < 64
+    # The same n-grams hash to the same buckets whichever text they are in
+    assert list(buckets[:2]) == list(buckets[4:6])
+
+
+def test_chain_texts_drop_missing_turns():
+    history = game("No prompt", "a boat")
+    assert dict(chain_texts(history)) == {"ann": ["a red house", "a red house"], "bob": ["a boat"]}
+
+
+def test_dimensions_must_be_a_power_of_two():
+    with pytest.raises(ValueError):
+        DriftIndex(dimensions=1000)
+
+
+def test_final_drift_matches_the_cosine_of_the_vectors():
+    index = DriftIndex(dimensions=256)
+    added = index.add_games([("one", game("a cat on a mat", "a dog in a fog")), ("two", game("tea", "a teapot"))])
+    assert list(added) == [0, 1, 2, 3]
+    drift = index.final_drift(np.arange(len(index)))
+    assert drift[0] == pytest.approx(0.0, abs=1e-5)  # Unchanged text
+    for chain in range(len(index)):
+        assert drift[chain] == pytest.approx(naive_drift(index, chain), abs=1e-5)
+    matrices, lengths = index.matrices([1])
+    assert list(lengths) == [2]
+    assert np.allclose(np.diagonal(matrices[0]), 0.0, atol=1e-5)
+    assert matrices[0, 0, 1] == pytest.approx(matrices[0, 1, 0])
+
+
+def test_short_chains_have_no_drift():
+    index = DriftIndex()
+    index.add_game(game("No guess", "a boat"), game_id="g")
+    assert np.isnan(index.drift[1])
+    assert [entry["chain"] for entry in index.rank()] == ["ann"]
+
+
+def test_adding_games_one_by_one_matches_a_single_batch():
+    games = [(f"game {i}", game(f"prompt number {i}", f"guess {i * i}")) for i in range(5)]
+    incremental = DriftIndex(dimensions=512)
+    for game_id, history in games:
+        incremental.add_games([(game_id, history)])
+    incremental.add_games(games[:2])  # Already indexed; skipped
+    incremental.refresh()
+    batch = DriftIndex(dimensions=512)
+    batch.add_games(games)
+    assert len(incremental) == len(batch) == 10
+    assert incremental.chains == batch.chains
+    assert np.array_equal(incremental.document_frequency, batch.document_frequency)
+    assert np.allclose(incremental.drift, batch.drift, atol=1e-6)
+
+
+def test_rank_orders_by_drift():
+    index = DriftIndex()
+    index.add_games([("close", game("a big red ball", "a big red balloon")),
+                     ("far", game("a sunny beach", "quantum physics"))])
+    ranking = index.rank()
+    assert [entry["drift"] for entry in ranking] == sorted((entry["drift"] for entry in ranking), reverse=True)
+    assert ranking[0]["game"] == "far" and ranking[0]["chain"] == "bob"
+    assert ranking[0]["first"] == "a sunny beach" and ranking[0]["last"] == "quantum physics"
+    assert ranking[-1]["chain"] == "ann"
+    assert len(index.rank(top=1)) == 1
+
+
+def test_save_and_load(tmp_path):
+    index = DriftIndex(dimensions=128, ngram_range=(3, 3))
+    index.add_game(game("a cat", "a hat"), game_id="g")
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    loaded = DriftIndex.load(path)
+    assert (loaded.dimensions, loaded.ngram_range) == (128, (3, 3))
+    assert loaded.chains == index.chains and loaded.texts == index.texts
+    assert np.array_equal(loaded.drift, index.drift)
+    assert loaded.rank() == index.rank()
+    # A loaded index keeps growing like the original
+    loaded.add_game(game("a fish", "a dish"), game_id="h")
+    assert len(loaded) == 4
+
+
+def test_command_line(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    from game.game import Game
+
+    backend = LocalBackend(seed=3, size=(64, 64))
+    Game([AIPlayer(f"AI {i}", backend=backend) for i in range(3)], seed=3,
+         history_path="game.jsonl").start(rounds=3)
+    capsys.readouterr()
+    assert main(["game.jsonl", "--index", "index.npz", "--top", "2"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == "Indexed 3 new chains, 3 in total"
+    assert len(lines) == 3 and json.loads(lines[1])["texts"] == 3
+    # Known games are not indexed again
+    assert main(["game.jsonl", "--index", "index.npz", "--refresh"]) == 0
+    assert capsys.readouterr().out.startswith("Indexed 0 new chains, 3 in total")
@@ -0,0 +1,104 @@
+# tests/test_history_log.py
+import json
+
+import pytest
+
+from ai.backends import LocalBackend
+from game.ai_player import AIPlayer
+from game.game import Game
+from game.history_log import HistoryLog, load_history
+
+ROUNDS = [{"round": number, "texts": {"ann": f"text {number}"}} for number in (1, 2, 3)]
+
+
+def write_log(path, rounds):
+    log = HistoryLog(str(path))
+    for round_data in rounds:
+        log.append(round_data)
+    log.close()
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "logs" / "history.jsonl"
+    write_log(path, ROUNDS)
+    assert load_history(str(path)) == ROUNDS
+    assert len(path.read_text().splitlines()) == 3
+
+
+def test_append_continues_an_existing_log(tmp_path):
+    path = tmp_path / "history.jsonl"
+    write_log(path, ROUNDS[:2])
+    log = HistoryLog(str(path), append=True)
+    log.append(ROUNDS[2])
+    log.close()
+    assert load_history(str(path)) == ROUNDS
+
+
+def test_partial_tail_is_truncated(tmp_path):
+    path = tmp_path / "history.jsonl"
+    write_log(path, ROUNDS[:2])
+    complete = path.read_bytes()
+    with open(path, "ab") as f:
+        f.write(json.dumps(ROUNDS[2]).encode()[:15])  # Cut short by a crash
+    assert load_history(str(path), repair=False) == ROUNDS[:2]
+    assert path.read_bytes() != complete
+    assert load_history(str(path)) == ROUNDS[:2]
+    assert path.read_bytes() == complete
+
+
+@pytest.mark.parametrize("tail", [b"not json\n", b'{"round": 5}\n'])
+def test_invalid_or_out_of_order_lines_end_the_history(tmp_path, tail):
+    path = tmp_path / "history.jsonl"
+    write_log(path, ROUNDS[:2])
+    with open(path, "ab") as f:
+        f.write(tail)
+    assert load_history(str(path)) == ROUNDS[:2]
+
+
+def test_game_resumes_from_its_log(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    backend = LocalBackend(seed=2)
+    players = [AIPlayer(f"AI {i}", backend=backend) for i in range(3)]
+    Game(players, history_path="game.jsonl").start(rounds=2)
+    with open("game.jsonl", "ab") as f:
+        f.write(b'{"round": 3, "texts"')
+    game = Game(players)
+    game.resume("game.jsonl")
+    assert game.round == 2
+    game.start(rounds=1)
+    assert [round_data["round"] for round_data in load_history("game.jsonl")] == [1, 2, 3]
+
+
+def test_resume_rejects_other_players(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    backend = LocalBackend()
+    Game([AIPlayer(f"AI {i}", backend=backend) for i in range(3)], history_path="game.jsonl").start(rounds=1)
+    with pytest.raises(ValueError):
+        Game([AIPlayer(f"Other {i}", backend=backend) for i in range(3)]).resume("game.jsonl")
+
+
+def test_resumed_game_keeps_the_seed_of_its_log(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    backend = LocalBackend(seed=4)
+    players = [AIPlayer(f"AI {i}", backend=backend) for i in range(6)]
+    first = Game(players, history_path="game.jsonl")
+    first.start(rounds=2)
+    game = Game(players)
+    game.resume("game.jsonl")
+    assert game.seed == first.seed
+    game.start(rounds=1)
+    history = load_history("game.jsonl")
+    assert {round_data["seed"] for round_data in history} == {first.seed}
+    # Six players go three rounds without seeing a chain twice, across the resume too
+    for player in players:
+        chains = [round_data["drawing_chains"][player.name] for round_data in history]
+        assert len(set(chains)) == len(chains)
+
+
+def test_resume_rejects_another_seed(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    players = [AIPlayer(f"AI {i}", backend=LocalBackend()) for i in range(3)]
+    Game(players, history_path="game.jsonl", seed=1).start(rounds=1)
+    with pytest.raises(ValueError, match="seed 1"):
+        Game(players, seed=2).resume("game.jsonl")
+    Game(players, seed=1).resume("game.jsonl")
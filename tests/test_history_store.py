@@ -0,0 +1,105 @@
+# tests/test_history_store.py
+import gc
+import json
+import os
+
+import pytest
+
+from ai.backends import LocalBackend
+from game.ai_player import AIPlayer
+from game.chains import ChainIndex
+from game.game import Game
+from game.history_store import HistoryStore
+
+ROUNDS = [
+    {
+        "round": 1,
+        "texts": {"ann": "A cat", "bob": "A dog", "cid": "No prompt"},
+        "draw_assignments": {"ann": "A dog", "bob": "No prompt", "cid": "A cat"},
+        "guess_assignments": {},
+        "drawings": {"ann": "ann_1.png", "bob": "No drawing", "cid": "cid_1.png"},
+        "text_chains": {"ann": "ann", "bob": "bob", "cid": "cid"},
+        "drawing_chains": {"ann": "bob", "bob": "cid", "cid": "ann"},
+    },
+    {
+        "round": 2,
+        "texts": {"ann": "A kitten", "bob": "A wolf", "cid": "No guess"},
+        "draw_assignments": {"ann": "A wolf", "bob": "No guess", "cid": "A kitten"},
+        "guess_assignments": {"ann": "cid_1.png", "bob": "ann_1.png", "cid": "elsewhere.png"},
+        "drawings": {"ann": "ann_2.png", "bob": "bob_2.png", "cid": "cid_2.png"},
+        "text_chains": {"ann": "ann", "bob": "bob", "cid": None},
+        "drawing_chains": {"ann": "bob", "bob": None, "cid": "ann"},
+        "notes": {"anything": ["else"]},
+    },
+]
+
+
+@pytest.mark.parametrize("memory_rounds", [None, 0, 1])
+def test_rounds_read_back_as_recorded(memory_rounds):
+    store = HistoryStore(memory_rounds=memory_rounds)
+    store.extend(ROUNDS)
+    assert store.to_list() == ROUNDS
+    assert json.loads(json.dumps(store.to_list())) == ROUNDS
+    assert store[-1]["guess_assignments"]["cid"] == "elsewhere.png"  # Not any drawing of round 1
+    assert store[0]["texts"]["ann"] == "A cat"
+    assert dict(store[1]["text_chains"]) == ROUNDS[1]["text_chains"]
+    assert [view["round"] for view in store[0:2]] == [1, 2]
+    store.close()
+
+
+def test_views_behave_like_dictionaries():
+    store = HistoryStore()
+    store.extend(ROUNDS)
+    view = store[1]
+    assert list(view) == ["round", "texts", "draw_assignments", "guess_assignments", "drawings", "text_chains",
+                          "drawing_chains", "notes"]
+    assert view.get("missing") is None and "texts" in view
+    with pytest.raises(KeyError):
+        view["texts"]["nobody"]
+    with pytest.raises(IndexError):
+        store[2]
+    assert ChainIndex(store).chains() == ChainIndex(ROUNDS).chains()
+
+
+def test_spilled_rounds_stay_readable_after_close():
+    store = HistoryStore(memory_rounds=1)
+    store.extend(ROUNDS * 3)
+    assert store.stats()["spilled"] == 5 and store.stats()["in_memory"] == 1
+    store.close()
+    assert store.to_list() == ROUNDS * 3
+    store.close()
+    store.append(ROUNDS[0])
+    assert store[-2].to_dict() == ROUNDS[1] and store[-1].to_dict() == ROUNDS[0]
+    store.close()
+
+
+def test_spill_file(tmp_path):
+    path = tmp_path / "history.spill"
+    store = HistoryStore(memory_rounds=0, spill_path=str(path))
+    store.extend(ROUNDS)
+    assert path.stat().st_size == store.stats()["spill_bytes"] > 0
+    store.close()
+    assert store.to_list() == ROUNDS
+
+
+def test_temporary_spill_file_is_removed_with_the_store():
+    store = HistoryStore(memory_rounds=0)
+    store.extend(ROUNDS)
+    path = store._path
+    assert os.path.exists(path)
+    store.close()
+    del store
+    gc.collect()
+    assert not os.path.exists(path)
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_game_history_matches_its_log_and_closes_the_spill_file(tmp_path, monkeypatch, pipelined):
+    monkeypatch.chdir(tmp_path)
+    backend = LocalBackend(seed=5)
+    game = Game([AIPlayer(f"AI {i}", backend=backend) for i in range(4)], pipelined=pipelined, seed=5,
+                history_path="game.jsonl", history_memory_rounds=1)
+    game.start(rounds=4)
+    assert game.history._file is None
+    with open("game.jsonl") as f:
+        assert game.history.to_list() == [json.loads(line) for line in f]
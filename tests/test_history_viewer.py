@@ -0,0 +1,72 @@
+# tests/test_history_viewer.py
+import os
+import time
+
+import pytest
+from PIL import Image
+
+from ui.history_viewer import ThumbnailCache
+
+
+@pytest.fixture
+def drawings(tmp_path):
+    directory = tmp_path / "drawings"
+    directory.mkdir()
+    paths = []
+    for shade in range(4):
+        path = directory / f"{shade}.png"
+        Image.new("L", (800, 600), shade * 60).save(path)
+        paths.append(str(path))
+    return paths
+
+
+def thumbnail_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".png"))
+
+
+def test_thumbnails_fit_the_size_and_are_written_to_disk(tmp_path, drawings):
+    cache = ThumbnailCache(str(tmp_path / "cache"), size=(100, 100))
+    thumbnail = cache.get(drawings[0])
+    assert thumbnail.size == (100, 75)
+    assert cache.get(drawings[0]) is thumbnail
+    assert os.listdir(tmp_path / "cache") == thumbnail_files(tmp_path / "cache")  # No temporary files left
+    # Another cache, e.g. after reopening the game, reads the file instead of the drawing
+    assert ThumbnailCache(str(tmp_path / "cache"), size=(100, 100)).get(drawings[0]).size == (100, 75)
+
+
+def test_memory_is_bounded(tmp_path, drawings):
+    cache = ThumbnailCache(str(tmp_path / "cache"), size=(50, 50), max_memory=2)
+    for path in drawings:
+        cache.get(path)
+    assert cache.stats()["in_memory"] == 2
+
+
+def test_disk_is_capped_by_files(tmp_path, drawings):
+    cache = ThumbnailCache(str(tmp_path / "cache"), size=(50, 50), max_files=2)
+    for path in drawings:
+        cache.get(path)
+    assert len(thumbnail_files(tmp_path / "cache")) == 2
+    assert cache.stats()["evictions"] == 2
+
+
+def test_disk_is_capped_by_bytes(tmp_path, drawings):
+    cache = ThumbnailCache(str(tmp_path / "cache"), size=(50, 50))
+    cache.get(drawings[0])
+    size = cache.stats()["bytes"]
+    capped = ThumbnailCache(str(tmp_path / "capped"), size=(50, 50), max_bytes=2 * size + size // 2)
+    for path in drawings:
+        capped.get(path)
+    assert capped.stats()["files"] == 2
+    assert capped.stats()["bytes"] <= 2 * size + size // 2
+
+
+def test_least_recently_used_file_is_evicted_on_restart(tmp_path, drawings):
+    directory = tmp_path / "cache"
+    cache = ThumbnailCache(str(directory), size=(50, 50))
+    for path in drawings[:2]:
+        cache.get(path)
+    first = sorted(thumbnail_files(directory), key=lambda name: os.path.getmtime(directory / name))
+    later = time.time() + 10
+    os.utime(directory / first[0], (later, later))
+    ThumbnailCache(str(directory), size=(50, 50), max_files=1)
+    assert thumbnail_files(directory) == [first[0]]
@@ -0,0 +1,112 @@
+# tests/test_human_player.py
+import os
+import sys
+import time
+
+import pytest
+
+import game.human_player as human_player
+from ai.backends import LocalBackend
+from ai.resilience import deadline_scope
+from game.ai_player import AIPlayer
+from game.human_player import HumanPlayer
+from game.phase_executor import PhaseExecutor
+from ui.console_ui import _ConsoleReader, countdown
+
+
+@pytest.fixture
+def stdin(monkeypatch):
+    """
+    Replaces stdin with a pipe and returns a function that types a line into it.
+    """
+    read_end, write_end = os.pipe()
+    monkeypatch.setattr(sys, "stdin", os.fdopen(read_end))
+    writer = os.fdopen(write_end, "w")
+
+    def type_line(line):
+        writer.write(line + "\n")
+        writer.flush()
+
+    yield type_line
+    writer.close()
+
+
+def test_reader_returns_none_on_timeout_and_keeps_a_late_line(stdin):
+    reader = _ConsoleReader()
+    assert reader.read("First: ", 0.05) is None
+    stdin("late answer")
+    assert reader.read("Second: ", 2) == "late answer"
+
+
+def test_reader_waits_without_timeout(stdin):
+    reader = _ConsoleReader()
+    stdin("hello")
+    assert reader.read("Prompt: ", None) == "hello"
+
+
+def test_countdown():
+    assert countdown(time.monotonic() + 10.2) == 10
+    assert countdown(time.monotonic() - 5) == 0
+
+
+class Console:
+    """
+    Stands in for the console: answers prompts from a list, None meaning the time ran out.
+    """
+
+    def __init__(self, answers, delay=0.0):
+        self.answers = list(answers)
+        self.delay = delay
+        self.timeouts = []
+
+    def __call__(self, prompt, timeout=None):
+        self.timeouts.append(timeout)
+        time.sleep(self.delay)
+        return self.answers.pop(0)
+
+
+def test_text_turns(monkeypatch):
+    console = Console(["  A cat on a mat  ", None])
+    monkeypatch.setattr(human_player, "get_user_input", console)
+    player = HumanPlayer("ann")
+    assert player.provide_input(None, 'create_text', 1) == "A cat on a mat"
+    assert player.provide_input(None, 'create_text', 2) == "No prompt"
+    assert 0 < console.timeouts[0] <= 120
+
+
+def test_guess_turn_without_drawing():
+    assert HumanPlayer("ann").provide_input("missing.png", 'guess_text', 2) == "No guess"
+
+
+def test_draw_turn_saves_what_was_drawn(monkeypatch):
+    saved = []
+
+    def save_drawing(player_name, round, timeout=None):
+        saved.append(timeout)
+        return None if len(saved) > 1 else "assets/drawings/ann_drawing_1.png"
+
+    monkeypatch.setattr(human_player, "save_drawing", save_drawing)
+    player = HumanPlayer("ann", time_limits={'draw': 30.0})
+    assert player.provide_input("A cat", 'draw', 1) == "assets/drawings/ann_drawing_1.png"
+    assert player.provide_input("A cat", 'draw', 2) == "No drawing"
+    assert player.provide_input("No prompt", 'draw', 3) == "No drawing"
+    assert 0 < saved[0] <= 30
+
+
+def test_limits_and_phase_deadline():
+    player = HumanPlayer("ann", time_limits={'guess_text': None})
+    assert player.deadline('guess_text') is None
+    with deadline_scope(time.monotonic() + 5):
+        assert player.deadline('create_text') - time.monotonic() <= 5
+    assert player.deadline('create_text') - time.monotonic() > 100
+
+
+def test_human_turn_runs_alongside_the_ai_players(monkeypatch, tmp_path):
+    monkeypatch.setattr(human_player, "get_user_input", Console(["A dragon in space"], delay=0.3))
+    backend = LocalBackend(seed=1, latency=0.3)
+    players = [HumanPlayer("ann")] + [AIPlayer(f"AI {i}", backend=backend, drawings_dir=str(tmp_path))
+                                      for i in range(2)]
+    started = time.monotonic()
+    texts = PhaseExecutor().run(players, 'create_text', 1)
+    assert time.monotonic() - started < 0.55
+    assert texts["ann"] == "A dragon in space"
@@ -0,0 +1,74 @@
+# tests/test_image_cache.py
+import os
+import time
+
+from ai.image_cache import ImageCache, normalize_prompt
+
+
+def test_normalize_prompt():
+    assert normalize_prompt("  A Cat   on a MAT!  ") == "a cat on a mat"
+    assert normalize_prompt("A cat on a mat.") == normalize_prompt("a cat on a mat")
+
+
+def test_key_depends_on_prompt_and_model_parameters(tmp_path):
+    cache = ImageCache(str(tmp_path))
+    key = cache.key("A cat.", "flux", 400, 400)
+    assert cache.key("a  cat", "flux", 400, 400) == key
+    assert cache.key("A cat.", "flux", 200, 400) != key
+    assert cache.key("A cat.", "turbo", 400, 400) != key
+
+
+def test_put_and_get(tmp_path):
+    cache = ImageCache(str(tmp_path))
+    assert cache.get("missing") is None
+    cache.put("key", b"image")
+    assert cache.get("key") == b"image"
+    assert cache.stats() == {"entries": 1, "bytes": 5, "hits": 1, "misses": 1, "evictions": 0}
+    # No temporary files are left behind
+    assert os.listdir(tmp_path) == ["key.img"]
+
+
+def test_evicts_least_recently_used_over_entry_cap(tmp_path):
+    cache = ImageCache(str(tmp_path), max_entries=2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    cache.get("a")
+    cache.put("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1" and cache.get("c") == b"3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_evicts_over_byte_cap(tmp_path):
+    cache = ImageCache(str(tmp_path), max_bytes=10)
+    cache.put("a", b"x" * 6)
+    cache.put("b", b"x" * 6)
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 6
+
+
+def test_recency_survives_restart(tmp_path):
+    cache = ImageCache(str(tmp_path))
+    cache.put("old", b"1")
+    cache.put("new", b"2")
+    # Make "old" the most recently used through its modification time
+    later = time.time() + 10
+    os.utime(tmp_path / "old.img", (later, later))
+    reopened = ImageCache(str(tmp_path), max_entries=1)
+    assert reopened.get("new") is None
+    assert reopened.get("old") == b"1"
+
+
+def test_missing_file_is_a_miss(tmp_path):
+    cache = ImageCache(str(tmp_path))
+    cache.put("key", b"image")
+    os.remove(tmp_path / "key.img")
+    assert cache.get("key") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_clear(tmp_path):
+    cache = ImageCache(str(tmp_path))
+    cache.put("a", b"1")
+    cache.clear()
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,69 @@
+# tests/test_image_pipeline.py
+import io
+
+import pytest
+from PIL import Image
+
+from ai.image_pipeline import ImagePipeline, normalize_image
+
+
+def encode(image, format):
+    byte_io = io.BytesIO()
+    image.save(byte_io, format=format)
+    return byte_io.getvalue()
+
+
+def decode(data):
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    return image
+
+
+def test_large_color_jpeg_becomes_small_grayscale_png():
+    data = encode(Image.new("RGB", (1024, 768), (200, 30, 30)), "JPEG")
+    image = decode(normalize_image(data))
+    assert image.format == "PNG"
+    assert image.size == (400, 300)
+    assert image.mode in ("P", "L")
+
+
+def test_small_images_are_not_scaled_up():
+    assert decode(normalize_image(encode(Image.new("L", (100, 50), 128), "PNG"), colors=None)).size == (100, 50)
+
+
+def test_transparency_becomes_white_paper():
+    image = Image.new("RGBA", (10, 10), (0, 0, 0, 0))
+    result = decode(normalize_image(encode(image, "PNG"), colors=None))
+    assert result.convert("L").getpixel((5, 5)) == 255
+
+
+@pytest.mark.parametrize("data", [b"", b"<html>rate limited</html>", encode(Image.new("L", (8, 8)), "BMP")])
+def test_non_images_and_unexpected_formats_are_rejected(data):
+    with pytest.raises(ValueError):
+        normalize_image(data)
+
+
+def test_pipeline_in_this_thread_counts_bytes():
+    pipeline = ImagePipeline(processes=0)
+    data = encode(Image.new("RGB", (800, 800), "white"), "PNG")
+    result = pipeline.normalize(data)
+    with pytest.raises(ValueError):
+        pipeline.normalize(b"not an image")
+    assert pipeline.stats() == {"bytes_in": len(data), "bytes_out": len(result), "rejected": 1}
+
+
+def test_fallback_is_encoded_once(tmp_path):
+    path = tmp_path / "fallback.jpg"
+    Image.new("RGB", (600, 600), "gray").save(path)
+    pipeline = ImagePipeline(processes=0, fallback_path=str(path))
+    assert pipeline.fallback() is pipeline.fallback()
+    assert decode(pipeline.fallback()).size == (400, 400)
+
+
+def test_pipeline_in_a_worker_process():
+    pipeline = ImagePipeline(processes=1)
+    try:
+        data = encode(Image.new("RGB", (800, 400), "black"), "JPEG")
+        assert pipeline.normalize(data) == normalize_image(data)
+    finally:
+        pipeline.close()
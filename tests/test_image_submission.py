@@ -0,0 +1,81 @@
+# tests/test_image_submission.py
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import google.generativeai as genai
+import pytest
+
+from ai.image_submission import ImageSubmitter, image_mime_type
+
+
+@pytest.mark.parametrize("data, mime_type", [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff\xe0", "image/jpeg"),
+    (b"GIF89a...", "image/gif"),
+    (b"RIFF\x00\x00\x00\x00WEBPVP8 ", "image/webp"),
+    (b"unknown", "image/png"),
+])
+def test_image_mime_type(data, mime_type):
+    assert image_mime_type(data) == mime_type
+
+
+def test_small_drawings_are_sent_inline(tmp_path):
+    path = tmp_path / "drawing.png"
+    path.write_bytes(b"\xff\xd8 jpeg data under a png name")
+    submitter = ImageSubmitter()
+    assert submitter.part(str(path)) == {"mime_type": "image/jpeg", "data": path.read_bytes()}
+    assert submitter.stats()["inline"] == 1
+
+
+@pytest.fixture
+def uploads(monkeypatch):
+    calls = []
+
+    def upload_file(path, mime_type):
+        calls.append(path)
+        return SimpleNamespace(name=f"files/{len(calls)}", expiration_time=expiry[0])
+
+    expiry = [datetime.now(timezone.utc) + timedelta(hours=1)]
+    monkeypatch.setattr(genai, "upload_file", upload_file)
+    return calls, expiry
+
+
+def test_large_drawings_are_uploaded_once_per_content(tmp_path, uploads):
+    calls, _ = uploads
+    first, second, other = tmp_path / "a.png", tmp_path / "b.png", tmp_path / "c.png"
+    first.write_bytes(b"\x89PNG" + b"x" * 100)
+    second.write_bytes(first.read_bytes())
+    other.write_bytes(b"\x89PNG" + b"y" * 100)
+    submitter = ImageSubmitter(inline_limit=10)
+    handle = submitter.part(str(first))
+    assert submitter.part(str(second)) is handle
+    assert submitter.part(str(other)) is not handle
+    assert len(calls) == 2
+    assert submitter.stats() == {"inline": 0, "upload_hits": 1, "uploads": 2, "cached_handles": 2}
+
+
+def test_handles_close_to_expiry_are_uploaded_again(tmp_path, uploads):
+    calls, expiry = uploads
+    expiry[0] = datetime.now(timezone.utc) + timedelta(minutes=1)
+    path = tmp_path / "a.png"
+    path.write_bytes(b"\x89PNG" + b"x" * 100)
+    submitter = ImageSubmitter(inline_limit=10, expiry_margin=timedelta(minutes=5))
+    submitter.part(str(path))
+    submitter.part(str(path))
+    assert len(calls) == 2
+
+
+def test_a_request_sends_inline_only_up_to_the_limit(tmp_path, uploads):
+    calls, _ = uploads
+    paths = []
+    for name in "abcd":
+        path = tmp_path / f"{name}.png"
+        path.write_bytes(b"\x89PNG" + name.encode() * 36)
+        paths.append(str(path))
+    submitter = ImageSubmitter(inline_limit=100)
+    parts = submitter.parts(paths)
+    # Two 40 byte drawings fit the request's 100 bytes; the others are uploaded
+    assert [isinstance(part, dict) for part in parts] == [True, True, False, False]
+    assert calls == paths[2:]
+    # Each request has a limit of its own
+    assert isinstance(submitter.part(paths[3]), dict)
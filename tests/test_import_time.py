@@ -0,0 +1,14 @@
+# tests/test_import_time.py
+import pytest
+
+from benchmarks.import_time import DEFAULT_MODULES, main, measure
+
+
+@pytest.mark.parametrize("module", DEFAULT_MODULES)
+def test_entry_points_load_no_heavy_modules(module):
+    assert measure(module, repeat=1)["heavy"] == []
+
+
+def test_heavy_import_fails_the_budget(capsys):
+    assert main(["--modules", "requests", "--repeat", "1", "--budget", "60"]) == 1
+    assert '"heavy": ["requests"]' in capsys.readouterr().out
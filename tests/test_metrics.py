@@ -0,0 +1,86 @@
+# tests/test_metrics.py
+import json
+import threading
+
+import pytest
+
+from utils.metrics import NULL_SPAN, Metrics
+
+
+@pytest.fixture
+def metrics():
+    metrics = Metrics()
+    metrics.enable()
+    return metrics
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics()
+    assert metrics.span("phase", phase="draw") is NULL_SPAN
+    with metrics.span("phase"):
+        pass
+    metrics.count("fallbacks_total")
+    metrics.observe("latency_seconds", 1.0)
+    assert metrics.spans() == [] and metrics.prometheus_text() == "\n"
+
+
+def test_spans_inherit_labels_of_enclosing_spans(metrics):
+    with metrics.span("provide_input", player="ann", phase="draw", round=1):
+        assert metrics.labels() == {"player": "ann", "phase": "draw", "round": 1}
+        with metrics.span("backend", kind="drawing") as span:
+            span.set(bytes=10)
+    (inner_name, inner, _, _), (outer_name, _, _, _) = metrics.spans()
+    assert (inner_name, outer_name) == ("backend", "provide_input")
+    assert inner == {"player": "ann", "phase": "draw", "round": 1, "kind": "drawing", "bytes": 10}
+    assert [name for name, *_ in metrics.spans("backend")] == ["backend"]
+
+
+def test_labels_do_not_leak_between_threads(metrics):
+    seen = []
+    with metrics.span("phase", phase="draw"):
+        thread = threading.Thread(target=lambda: seen.append(metrics.labels()))
+        thread.start()
+        thread.join()
+    assert seen == [{}]
+
+
+def test_errors_are_labelled_and_counted(metrics):
+    with pytest.raises(KeyError):
+        with metrics.span("request", provider="gemini"):
+            raise KeyError("text")
+    assert metrics.spans()[0][1]["error"] == "KeyError"
+    assert 'gentic_phone_request_errors_total{provider="gemini"} 1' in metrics.prometheus_text()
+
+
+def test_prometheus_text(metrics):
+    metrics.count("fallbacks_total", phase="draw", reason="timeout", player="ann")
+    metrics.count("fallbacks_total", 2, phase="draw", reason="timeout", player="bob")
+    metrics.observe("request_seconds", 0.03, endpoint="image")
+    metrics.observe("request_seconds", 200.0, endpoint="image")
+    lines = metrics.prometheus_text().splitlines()
+    # Player is not a metric label, so both counts add up in one series
+    assert 'gentic_phone_fallbacks_total{phase="draw",reason="timeout"} 3' in lines
+    assert "# TYPE gentic_phone_request_seconds histogram" in lines
+    assert 'gentic_phone_request_seconds_bucket{endpoint="image",le="0.05"} 1' in lines
+    assert 'gentic_phone_request_seconds_bucket{endpoint="image",le="+Inf"} 2' in lines
+    assert 'gentic_phone_request_seconds_count{endpoint="image"} 2' in lines
+
+
+def test_export_trace(metrics, tmp_path):
+    with metrics.span("game", mode="lockstep"):
+        pass
+    path = tmp_path / "trace.json"
+    metrics.export_trace(str(path))
+    event, = json.loads(path.read_text())["traceEvents"]
+    assert event["name"] == "game" and event["ph"] == "X" and event["args"] == {"mode": "lockstep"}
+
+
+def test_max_spans_keeps_the_latest():
+    metrics = Metrics(max_spans=2)
+    metrics.enable()
+    for number in range(3):
+        with metrics.span("turn", round=number):
+            pass
+    assert [labels["round"] for _, labels, _, _ in metrics.spans()] == [1, 2]
+    metrics.reset()
+    assert metrics.spans() == []
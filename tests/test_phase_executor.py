@@ -0,0 +1,106 @@
+# tests/test_phase_executor.py
+import threading
+import time
+
+from ai.backends import LocalBackend
+from game.ai_player import AIPlayer
+from game.phase_executor import PHASE_FALLBACKS, PhaseExecutor
+from game.player import Player
+
+
+class ScriptedPlayer(Player):
+    """
+    Returns its name after sleeping, or raises if told to.
+    """
+
+    concurrent_input = True
+
+    def __init__(self, name, delay=0.0, error=None):
+        Player.__init__(self, name)
+        self.delay = delay
+        self.error = error
+        self.calls = []
+
+    def provide_input(self, previous_output, phase, round):
+        self.calls.append((previous_output, phase, round))
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return f"{self.name} {phase}"
+
+    def receive_output(self, output, phase):
+        pass
+
+
+def test_run_returns_outputs_in_player_order():
+    players = [ScriptedPlayer(name, delay=delay) for name, delay in [("a", 0.05), ("b", 0.0), ("c", 0.02)]]
+    results = PhaseExecutor().run(players, 'create_text', 1, inputs={"a": "from c"})
+    assert list(results) == ["a", "b", "c"]
+    assert results["b"] == "b create_text"
+    assert players[0].calls == [("from c", 'create_text', 1)]
+    assert players[1].calls == [(None, 'create_text', 1)]
+
+
+def test_players_run_concurrently():
+    players = [ScriptedPlayer(str(i), delay=0.2) for i in range(5)]
+    started = time.monotonic()
+    PhaseExecutor(max_workers=5).run(players, 'guess_text', 1)
+    assert time.monotonic() - started < 0.6
+
+
+def test_exception_gives_fallback():
+    players = [ScriptedPlayer("ok"), ScriptedPlayer("broken", error=RuntimeError("boom"))]
+    results = PhaseExecutor().run(players, 'draw', 2)
+    assert results == {"ok": "ok draw", "broken": PHASE_FALLBACKS['draw']}
+
+
+def test_timeout_gives_fallback_without_waiting():
+    players = [ScriptedPlayer("fast"), ScriptedPlayer("slow", delay=1.0)]
+    executor = PhaseExecutor(timeout=0.1)
+    started = time.monotonic()
+    results = executor.run(players, 'guess_text', 1)
+    assert time.monotonic() - started < 0.8
+    assert results == {"fast": "fast guess_text", "slow": PHASE_FALLBACKS['guess_text']}
+    assert executor.expired == {'guess_text': 1}
+
+
+def test_phase_budget_bounds_the_whole_phase():
+    # With one worker the calls queue up; the budget cuts off the ones still waiting
+    players = [ScriptedPlayer(str(i), delay=0.1) for i in range(10)]
+    executor = PhaseExecutor(max_workers=1, budgets={'create_text': 0.25})
+    started = time.monotonic()
+    results = executor.run(players, 'create_text', 1)
+    assert time.monotonic() - started < 0.6
+    fallbacks = [name for name, output in results.items() if output == PHASE_FALLBACKS['create_text']]
+    assert 5 <= len(fallbacks) < 10
+    assert executor.expired['create_text'] == len(fallbacks)
+
+
+def test_max_workers_limits_calls_in_flight():
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    class CountingPlayer(ScriptedPlayer):
+        def provide_input(self, previous_output, phase, round):
+            with lock:
+                in_flight.append(self.name)
+                peak.append(len(in_flight))
+            time.sleep(0.02)
+            with lock:
+                in_flight.remove(self.name)
+            return self.name
+
+    PhaseExecutor(max_workers=2).run([CountingPlayer(str(i)) for i in range(8)], 'create_text', 1)
+    assert max(peak) <= 2
+
+
+def test_ai_players_with_local_backend(tmp_path):
+    backend = LocalBackend(seed=3)
+    players = [AIPlayer(f"AI {i}", backend=backend, drawings_dir=str(tmp_path)) for i in range(4)]
+    executor = PhaseExecutor(max_workers=4)
+    texts = executor.run(players, 'create_text', 1)
+    assert all(text.startswith(("A ", "An ")) for text in texts.values())
+    drawings = executor.run(players, 'draw', 1, inputs=texts)
+    assert all((tmp_path / f"{name}_drawing_1.png").exists() for name in drawings)
+    assert backend.calls == {"text": 4, "guess": 0, "draw": 4}
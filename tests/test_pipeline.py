@@ -0,0 +1,93 @@
+# tests/test_pipeline.py
+import time
+
+import pytest
+
+from ai.backends import LocalBackend
+from game.ai_player import AIPlayer
+from game.game import Game
+from game.history_log import load_history
+from game.phase_executor import PhaseExecutor
+from game.pipeline import PipelinedScheduler
+from game.player import Player
+
+
+def play(tmp_path, monkeypatch, pipelined, players=4, rounds=3, seed=7):
+    monkeypatch.chdir(tmp_path)
+    backend = LocalBackend(seed=seed)
+    game = Game([AIPlayer(f"AI {i}", backend=backend) for i in range(players)], pipelined=pipelined, seed=seed,
+                history_path="game.jsonl")
+    game.start(rounds=rounds)
+    return load_history("game.jsonl")
+
+
+def owner(mapping, value):
+    return next(name for name, entry in mapping.items() if entry == value)
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_rounds_are_complete_and_chains_follow_the_work(tmp_path, monkeypatch, pipelined):
+    history = play(tmp_path, monkeypatch, pipelined)
+    names = [f"AI {i}" for i in range(4)]
+    assert [round_data["round"] for round_data in history] == [1, 2, 3]
+    previous = None
+    for round_data in history:
+        for field in ("texts", "draw_assignments", "drawings", "text_chains", "drawing_chains"):
+            assert list(round_data[field]) == names
+        for player, text in round_data["draw_assignments"].items():
+            source = owner(round_data["texts"], text)
+            assert source != player
+            assert round_data["drawing_chains"][player] == round_data["text_chains"][source]
+        if previous is None:
+            assert round_data["text_chains"] == {name: name for name in names}
+        else:
+            for player, drawing in round_data["guess_assignments"].items():
+                source = owner(previous["drawings"], drawing)
+                assert source != player
+                assert round_data["text_chains"][player] == previous["drawing_chains"][source]
+        previous = round_data
+
+
+def test_pipelined_resume_continues_the_chains(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    backend = LocalBackend(seed=1)
+    players = [AIPlayer(f"AI {i}", backend=backend) for i in range(3)]
+    Game(players, pipelined=True, seed=1, history_path="log.jsonl").start(rounds=2)
+    game = Game(players, pipelined=True, seed=1)
+    game.resume("log.jsonl")
+    game.start(rounds=1)
+    history = load_history("log.jsonl")
+    assert [round_data["round"] for round_data in history] == [1, 2, 3]
+    assert sorted(history[2]["text_chains"].values()) == sorted(history[1]["drawing_chains"].values())
+
+
+class SlowDrawer(Player):
+    """
+    Writes and guesses at once; draws slowly if it is the slow player.
+    """
+
+    concurrent_input = True
+
+    def __init__(self, name, draw_delay):
+        Player.__init__(self, name)
+        self.draw_delay = draw_delay
+        self.finished = {}
+
+    def provide_input(self, previous_output, phase, round):
+        if phase == 'draw':
+            time.sleep(self.draw_delay)
+        self.finished[(phase, round)] = time.monotonic()
+        return f"{self.name} {phase} {round}"
+
+    def receive_output(self, output, phase):
+        pass
+
+
+def test_slow_chain_does_not_hold_up_the_others():
+    players = [SlowDrawer("slow", 0.5)] + [SlowDrawer(f"fast {i}", 0.01) for i in range(3)]
+    started = time.monotonic()
+    rounds = PipelinedScheduler(players, PhaseExecutor()).run(2)
+    # Some round 2 guesses start before the slow drawing of round 1 is in
+    guessed = [player.finished[('guess_text', 2)] - started for player in players]
+    assert min(guessed) < 0.4
+    assert [round_data["round"] for round_data in rounds] == [1, 2]
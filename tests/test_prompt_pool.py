@@ -0,0 +1,103 @@
+# tests/test_prompt_pool.py
+import threading
+import time
+
+import pytest
+
+from ai.backends import LocalBackend
+from ai.prompt_pool import PromptPool
+
+
+class Fetcher:
+    """
+    Returns the prepared batches in turn, then empty batches; raises a batch that is an exception.
+    """
+
+    def __init__(self, *batches):
+        self.batches = list(batches)
+        self.counts = []
+
+    def __call__(self, count):
+        self.counts.append(count)
+        batch = self.batches.pop(0) if self.batches else []
+        if isinstance(batch, Exception):
+            raise batch
+        return batch
+
+
+def test_duplicates_and_near_duplicates_are_dropped():
+    pool = PromptPool(Fetcher(), similarity=0.85)
+    added = pool.add(["A cat on a mat.", "a  cat on a MAT", "A cat on the mat", "A dragon in space", ""])
+    assert added == 2
+    assert pool.stats() == {"stock": 2, "fetches": 0, "duplicates": 3}
+
+
+def test_prompts_handed_out_are_remembered():
+    pool = PromptPool(Fetcher(), low_water=0)
+    pool.add(["A cat on a mat"])
+    assert pool.take(timeout=1) == "A cat on a mat"
+    assert pool.add(["A cat on a mat!"]) == 0
+
+
+def test_take_waits_for_the_first_fetch():
+    fetch = Fetcher(["A robot flying a kite", "A wizard in a castle"])
+    pool = PromptPool(fetch, batch=5, low_water=0)
+    assert pool.take(timeout=2) == "A robot flying a kite"
+    assert fetch.counts == [5]
+
+
+def test_refill_starts_at_low_water():
+    fetch = Fetcher(["A cat", "A dog", "A fish"], ["An owl"])
+    pool = PromptPool(fetch, low_water=2)
+    pool.prefetch()
+    assert pool.take(timeout=2) == "A cat"
+    deadline = time.monotonic() + 2
+    while pool.stats()["fetches"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert pool.stats() == {"stock": 3, "fetches": 2, "duplicates": 0}
+
+
+def test_take_fetches_again_after_a_batch_of_duplicates():
+    fetch = Fetcher(["A cat"], ["A cat", "a cat."], ["A dog"])
+    pool = PromptPool(fetch, low_water=0, attempts=3)
+    assert pool.take(timeout=2) == "A cat"
+    assert pool.take(timeout=2) == "A dog"
+    # The second take needed two fetches; the empty stock may already have started another one
+    assert len(fetch.counts) >= 3
+
+
+@pytest.mark.parametrize("batches", [[RuntimeError("quota")], [[], [], []]])
+def test_take_gives_up_after_failures_or_empty_fetches(batches):
+    pool = PromptPool(Fetcher(*batches), low_water=0, attempts=3)
+    with pytest.raises(LookupError):
+        pool.take(timeout=2)
+
+
+def test_take_times_out_on_a_slow_fetch():
+    release = threading.Event()
+    pool = PromptPool(lambda count: release.wait(5) and [], low_water=0)
+    started = time.monotonic()
+    with pytest.raises(LookupError):
+        pool.take(timeout=0.1)
+    assert time.monotonic() - started < 1
+    release.set()
+
+
+def test_concurrent_takes_get_distinct_prompts():
+    backend = LocalBackend(seed=11)
+    pool = PromptPool(lambda count: [backend.generate_text() for _ in range(count)], batch=40, low_water=10,
+                      similarity=0.95)
+    taken = []
+    lock = threading.Lock()
+
+    def take():
+        prompt = pool.take(timeout=5)
+        with lock:
+            taken.append(prompt)
+
+    threads = [threading.Thread(target=take) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(taken) == 20 and len(set(taken)) == 20
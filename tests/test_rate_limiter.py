@@ -0,0 +1,199 @@
+# tests/test_rate_limiter.py
+import threading
+import time
+
+import pytest
+
+from ai.backends import LocalBackend, LocalBackendError
+from ai.rate_limiter import DeadlineExceeded, Lane, RequestScheduler, deadline_scope, is_throttled, request_priority
+
+
+class Throttled(Exception):
+    code = 429
+
+
+def fast_lane(**settings):
+    return Lane("test/lane", **{"rate": 1000.0, "burst": 1000, "initial_concurrency": 4, **settings})
+
+
+def test_is_throttled():
+    assert is_throttled(Throttled())
+    assert not is_throttled(ValueError())
+
+    class Response:
+        status_code = 429
+
+    error = Exception()
+    error.response = Response()
+    assert is_throttled(error)
+
+
+def test_limit_grows_additively_and_halves_on_throttle():
+    lane = fast_lane(max_concurrency=8)
+    for _ in range(4):
+        lane.acquire((0,))
+        lane.release(0.01)
+    assert lane.limit == pytest.approx(5.0, abs=0.1)
+    lane.acquire((0,))
+    lane.release(0.01, throttled=True)
+    assert lane.limit == pytest.approx(2.5, abs=0.1)
+    assert lane.snapshot()["throttled"] == 1
+
+
+def test_limit_stays_within_bounds():
+    lane = fast_lane(initial_concurrency=2, min_concurrency=1, max_concurrency=3)
+    for _ in range(50):
+        lane.acquire((0,))
+        lane.release(0.01)
+    assert lane.limit == 3
+    for _ in range(5):
+        lane.acquire((0,))
+        lane.release(0.01, throttled=True)
+    assert lane.limit == 1
+
+
+def test_slow_responses_shrink_the_limit():
+    lane = fast_lane(latency_limit=1.0)
+    lane.acquire((0,))
+    lane.release(2.0)
+    assert lane.limit == 3.0 and lane.snapshot()["slow"] == 1
+
+
+def test_throttle_pauses_the_lane():
+    lane = fast_lane(rate=20.0)
+    lane.acquire((0,))
+    lane.release(0.0, throttled=True)
+    started = time.monotonic()
+    lane.acquire((0,))
+    assert time.monotonic() - started >= 0.04
+
+
+def test_token_bucket_caps_the_rate():
+    lane = Lane("test/rate", rate=50.0, burst=2, initial_concurrency=10)
+    started = time.monotonic()
+    for _ in range(7):
+        lane.acquire((0,))
+        lane.release(0.0)
+    # Two go out at once, the other five wait for a token each
+    assert time.monotonic() - started >= 0.09
+
+
+def test_concurrency_limit_caps_requests_in_flight():
+    scheduler = RequestScheduler(limits={("test", "work"): {"rate": 1000.0, "burst": 1000, "initial_concurrency": 2,
+                                                            "max_concurrency": 2}})
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    def work():
+        with lock:
+            in_flight.append(1)
+            peak.append(len(in_flight))
+        time.sleep(0.02)
+        with lock:
+            in_flight.pop()
+
+    threads = [threading.Thread(target=scheduler.call, args=("test", "work", work)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(peak) <= 2
+
+
+def test_waiting_requests_go_in_priority_order():
+    lane = fast_lane(initial_concurrency=1, max_concurrency=1)
+    lane.acquire((0,))  # Holds the only slot while the others queue up
+    order = []
+
+    def wait(priority):
+        lane.acquire(priority)
+        order.append(priority)
+        lane.release(0.0)
+
+    threads = []
+    for priority in [(3,), (1,), (2,)]:
+        thread = threading.Thread(target=wait, args=(priority,))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.02)
+    lane.release(0.0)
+    for thread in threads:
+        thread.join()
+    assert order == [(1,), (2,), (3,)]
+
+
+def test_requests_waiting_past_their_deadline_leave_the_queue():
+    lane = fast_lane(initial_concurrency=1, max_concurrency=1)
+    lane.acquire((0,))
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        lane.acquire((0,), deadline=time.monotonic() + 0.1)
+    assert 0.1 <= time.monotonic() - started < 0.5
+    assert lane.snapshot()["waiting"] == 0 and lane.snapshot()["expired"] == 1
+    # A request behind the expired one is admitted once the slot is free
+    admitted = threading.Event()
+    thread = threading.Thread(target=lambda: (lane.acquire((1,)), admitted.set()))
+    thread.start()
+    lane.release(0.0)
+    assert admitted.wait(1.0)
+    thread.join()
+
+
+def test_scheduler_does_not_send_requests_after_the_deadline():
+    scheduler = RequestScheduler(limits={("test", "api"): {"rate": 1000.0, "burst": 1000, "initial_concurrency": 1,
+                                                           "max_concurrency": 1}})
+    release = threading.Event()
+    sent = []
+
+    def slow():
+        sent.append("slow")
+        release.wait(5)
+
+    holder = threading.Thread(target=scheduler.call, args=("test", "api", slow))
+    holder.start()
+    while not sent:
+        time.sleep(0.01)
+    with deadline_scope(time.monotonic() + 0.1), pytest.raises(DeadlineExceeded):
+        scheduler.call("test", "api", sent.append, "late")
+    release.set()
+    holder.join()
+    assert sent == ["slow"]
+
+
+def test_scheduler_retries_throttled_requests_and_raises_others():
+    scheduler = RequestScheduler(limits={("test", "api"): {"rate": 1000.0, "burst": 1000, "initial_concurrency": 4}},
+                                 throttle_retries=2)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise Throttled()
+        return "ok"
+
+    assert scheduler.call("test", "api", flaky) == "ok"
+    assert len(calls) == 3
+
+    def always_throttled():
+        calls.append(1)
+        raise Throttled()
+
+    calls.clear()
+    with pytest.raises(Throttled):
+        scheduler.call("test", "api", always_throttled)
+    assert len(calls) == 3
+
+    with pytest.raises(ValueError):
+        scheduler.call("test", "api", int, "not a number")
+    assert scheduler.stats()["test/api"]["throttled"] == 5
+
+
+def test_local_backend_throttles_go_through_the_scheduler():
+    scheduler = RequestScheduler(throttle_retries=1)
+    scheduler.configure("local", "text", rate=1000.0, burst=1000)
+    backend = LocalBackend(throttle_rate=1.0, scheduler=scheduler)
+    with pytest.raises(LocalBackendError):
+        with request_priority((1, 0)):
+            backend.generate_text()
+    assert backend.throttles["text"] == 2
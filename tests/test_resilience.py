@@ -0,0 +1,197 @@
+# tests/test_resilience.py
+import threading
+import time
+
+import pytest
+import requests
+
+from ai.rate_limiter import RequestScheduler
+from ai.resilience import DeadlineExceeded, Resilience, deadline_scope, is_retriable, remaining_time
+
+
+class StatusError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+def scheduler():
+    return RequestScheduler(limits={("test", "api"): {"rate": 1000.0, "burst": 1000, "initial_concurrency": 16}},
+                            throttle_retries=0)
+
+
+def resilience(**settings):
+    return Resilience(**{"base_delay": 0.001, "hedge_percentile": None, **settings})
+
+
+def failing(errors, result="ok"):
+    """
+    Returns a function that raises the given errors in turn, then returns result.
+    """
+    calls = []
+
+    def call():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    call.calls = calls
+    return call
+
+
+@pytest.mark.parametrize("error, retriable", [
+    (ConnectionError(), True),
+    (TimeoutError(), True),
+    (requests.exceptions.ConnectionError(), True),
+    (requests.exceptions.ReadTimeout(), True),
+    (StatusError(408), True),
+    (StatusError(429), True),
+    (StatusError(503), True),
+    (StatusError(400), False),
+    (StatusError(403), False),
+    (ValueError("bad JSON"), False),
+    (KeyError("text"), False),
+    (TypeError(), False),
+])
+def test_is_retriable(error, retriable):
+    assert is_retriable(error) is retriable
+
+
+def test_google_transient_errors_are_retriable():
+    exceptions = pytest.importorskip("google.api_core.exceptions")
+    assert is_retriable(exceptions.ServiceUnavailable("down"))
+    assert is_retriable(exceptions.DeadlineExceeded("slow"))
+    assert not is_retriable(exceptions.InvalidArgument("bad"))
+
+
+def test_transient_errors_are_retried():
+    call = failing([ConnectionError(), TimeoutError()])
+    wrapper = resilience(attempts=3)
+    assert wrapper.call("test", "api", call, scheduler=scheduler()) == "ok"
+    assert len(call.calls) == 3
+    assert wrapper.stats()["test/api"] == {"calls": 1, "retries": 2, "retried_success": 1}
+
+
+def test_other_errors_are_raised_at_once():
+    call = failing([ValueError("parse error")])
+    with pytest.raises(ValueError):
+        resilience().call("test", "api", call, scheduler=scheduler())
+    assert len(call.calls) == 1
+
+
+def test_last_error_is_raised_after_every_attempt():
+    call = failing([ConnectionError("1"), ConnectionError("2"), ConnectionError("3")])
+    with pytest.raises(ConnectionError, match="3"):
+        resilience(attempts=3).call("test", "api", call, scheduler=scheduler())
+
+
+def test_throttles_are_retried_by_the_scheduler_only():
+    call = failing([StatusError(429)] * 10)
+    throttling = RequestScheduler(limits={("test", "api"): {"rate": 1000.0, "burst": 1000, "initial_concurrency": 4}},
+                                  throttle_retries=2)
+    with pytest.raises(StatusError):
+        resilience(attempts=3).call("test", "api", call, scheduler=throttling)
+    assert len(call.calls) == 3  # One attempt by Resilience, resent twice by the scheduler
+
+
+def test_deadline_scope_and_remaining_time():
+    assert remaining_time() is None
+    assert remaining_time(5.0) == 5.0
+    with deadline_scope(time.monotonic() + 1.0):
+        assert 0.9 < remaining_time() <= 1.0
+        assert remaining_time(0.5) == 0.5
+        with deadline_scope(None):
+            assert remaining_time() is None
+    assert remaining_time() is None
+
+
+def test_deadline_stops_waiting_for_a_slow_request():
+    release = threading.Event()
+    wrapper = resilience()
+    started = time.monotonic()
+    with deadline_scope(time.monotonic() + 0.1), pytest.raises(DeadlineExceeded):
+        wrapper.call("test", "api", release.wait, args=(5,), scheduler=scheduler())
+    release.set()
+    assert time.monotonic() - started < 1.0
+    assert wrapper.stats()["test/api"]["deadline_exceeded"] == 1
+
+
+def test_requests_queued_past_the_deadline_are_never_sent():
+    # One slot, held by a slow request, so the others queue up in the lane
+    lanes = RequestScheduler(limits={("test", "api"): {"rate": 1000.0, "burst": 1000, "initial_concurrency": 1,
+                                                       "max_concurrency": 1}}, throttle_retries=0)
+    release = threading.Event()
+    sent = []
+
+    def request(name):
+        sent.append(name)
+        if name == "slow":
+            release.wait(5)
+        return name
+
+    wrapper = resilience()
+    holder = threading.Thread(target=wrapper.call, args=("test", "api", request, ("slow",)), kwargs={"scheduler": lanes})
+    holder.start()
+    while not sent:
+        time.sleep(0.01)
+    for number in range(3):
+        with deadline_scope(time.monotonic() + 0.1), pytest.raises(DeadlineExceeded):
+            wrapper.call("test", "api", request, args=(number,), scheduler=lanes)
+    release.set()
+    holder.join()
+    time.sleep(0.2)  # Time for anything still queued to be sent
+    assert sent == ["slow"]
+    assert lanes.stats()["test/api"]["waiting"] == 0
+
+
+def test_endpoints_have_pools_of_their_own():
+    release = threading.Event()
+    wrapper = resilience(max_workers=1)
+    lanes = scheduler()
+    lanes.configure("test", "other", rate=1000.0, burst=1000, initial_concurrency=4)
+
+    def hold():
+        with deadline_scope(time.monotonic() + 5):
+            wrapper.call("test", "api", release.wait, args=(5,), scheduler=lanes)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    time.sleep(0.05)
+    # The only thread for test/api is busy; test/other still gets one
+    with deadline_scope(time.monotonic() + 1):
+        assert wrapper.call("test", "other", lambda: "done", scheduler=lanes) == "done"
+    release.set()
+    holder.join()
+
+
+def test_no_retry_without_time_left(monkeypatch):
+    monkeypatch.setattr("ai.resilience.random.uniform", lambda low, high: high)  # The longest backoff
+    call = failing([ConnectionError()])
+    wrapper = resilience(base_delay=10.0)
+    with deadline_scope(time.monotonic() + 0.5), pytest.raises(DeadlineExceeded):
+        wrapper.call("test", "api", call, scheduler=scheduler())
+    assert len(call.calls) == 1
+
+
+def test_slow_request_is_hedged():
+    wrapper = resilience(hedge_percentile=0.5, hedge_min_samples=5)
+    fast = scheduler()
+    for _ in range(5):
+        wrapper.call("test", "api", lambda: "warm", scheduler=fast)
+    calls = []
+    lock = threading.Lock()
+
+    def first_call_hangs():
+        with lock:
+            calls.append(1)
+            number = len(calls)
+        if number == 1:
+            time.sleep(1.0)
+            return "primary"
+        return "hedge"
+
+    started = time.monotonic()
+    assert wrapper.call("test", "api", first_call_hangs, scheduler=fast) == "hedge"
+    assert time.monotonic() - started < 0.5
+    assert wrapper.stats()["test/api"]["hedge_wins"] == 1
@@ -0,0 +1,97 @@
+# tests/test_server.py
+import asyncio
+import base64
+import io
+import json
+
+import pytest
+from PIL import Image
+
+from ai.backends import LocalBackend
+from ai.image_pipeline import close_image_pipeline
+from server.app import GameServer
+from server.websocket import connect
+
+
+async def request(port, method, path, payload=None):
+    """
+    Sends one HTTP request and returns the status and the decoded JSON body, if any.
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, data = response.partition(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    return status, json.loads(data) if data else None
+
+
+def png():
+    byte_io = io.BytesIO()
+    Image.new("L", (40, 40), 255).save(byte_io, format="PNG")
+    return base64.b64encode(byte_io.getvalue()).decode("ascii")
+
+
+@pytest.fixture
+def game_server(tmp_path):
+    async def start():
+        server = GameServer(backend=LocalBackend(seed=4), directory=str(tmp_path), turn_timeout=5.0)
+        return server, await server.start("127.0.0.1", 0)
+
+    yield start
+    close_image_pipeline()
+
+
+def test_lobby_requests_are_validated(game_server):
+    async def scenario():
+        server, port = await game_server()
+        try:
+            assert (await request(port, "GET", "/nowhere"))[0] == 404
+            assert (await request(port, "POST", "/lobbies", {"humans": 1, "ai_players": 1}))[0] == 400
+            assert (await request(port, "GET", "/lobbies/unknown"))[0] == 404
+            status, lobby = await request(port, "POST", "/lobbies", {"humans": 1, "ai_players": 2, "rounds": 1})
+            assert status == 201 and lobby["state"] == "waiting"
+            assert (await request(port, "POST", f"/lobbies/{lobby['id']}/join", {"name": "AI Bot 1"}))[0] == 409
+            status, _ = await request(port, "GET", f"/lobbies/{lobby['id']}/turn?name=ann&token=wrong")
+            assert status == 403
+            assert (await request(port, "GET", "/lobbies"))[1] == [lobby]
+        finally:
+            await server.stop()
+
+    asyncio.run(asyncio.wait_for(scenario(), 20))
+
+
+def test_human_plays_a_game_over_websocket(game_server):
+    async def scenario():
+        server, port = await game_server()
+        try:
+            _, lobby = await request(port, "POST", "/lobbies", {"humans": 1, "ai_players": 2, "rounds": 2, "seed": 1})
+            status, seat = await request(port, "POST", f"/lobbies/{lobby['id']}/join", {"name": "ann"})
+            assert status == 201
+            socket = await connect("127.0.0.1", port,
+                                   f"/lobbies/{lobby['id']}/ws?name=ann&token={seat['token']}")
+            phases = []
+            while True:
+                message = json.loads(await socket.receive())
+                if message["type"] == "turn":
+                    phases.append(message["phase"])
+                    answer = {"type": "submit", "turn": message["turn"]}
+                    if message["phase"] == "draw":
+                        answer["image"] = png()
+                    else:
+                        answer["text"] = "A cat on a mat"
+                    await socket.send(json.dumps(answer))
+                elif message["type"] == "game_over":
+                    break
+            await socket.close()
+            assert message["state"] == "finished"
+            assert phases == ["create_text", "draw", "guess_text", "draw"]
+            status, history = await request(port, "GET", f"/lobbies/{lobby['id']}/history")
+            assert status == 200 and [round_data["round"] for round_data in history] == [1, 2]
+            assert history[0]["texts"]["ann"] == "A cat on a mat"
+        finally:
+            await server.stop()
+
+    asyncio.run(asyncio.wait_for(scenario(), 30))
@@ -0,0 +1,84 @@
+# tests/test_strokes.py
+import math
+from array import array
+
+import pytest
+
+from ui.strokes import StrokeRecorder, load_strokes, render_strokes, save_strokes, stroke_path
+
+
+def test_straight_moves_are_coalesced():
+    recorder = StrokeRecorder()
+    for x in range(0, 100, 5):
+        recorder.add(x, 10)
+    recorder.end()
+    assert list(recorder.strokes[0]) == [0, 10, 95, 10]
+    assert recorder.events == 20 and recorder.point_count() == 2
+
+
+def test_turns_and_small_moves():
+    recorder = StrokeRecorder(min_distance=2.0)
+    recorder.start(0, 0)
+    assert recorder.add(1, 0) is False  # Closer than min_distance
+    recorder.add(10, 0)
+    recorder.add(10, 10)  # Turns a corner
+    assert list(recorder.strokes[0]) == [0, 0, 10, 0, 10, 10]
+    recorder.end()
+    recorder.add(50, 50)  # Starts a new stroke
+    assert len(recorder.strokes) == 2
+
+
+def test_reversing_direction_keeps_the_turning_point():
+    recorder = StrokeRecorder()
+    for x in (0, 10, 20, 10):
+        recorder.add(x, 0)
+    assert list(recorder.strokes[0]) == [0, 0, 20, 0, 10, 0]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    strokes = [array("h", [0, 0, 399, 399, -5, 3]), array("h", [200, 100]), array("h")]
+    path = tmp_path / "drawing.strokes"
+    save_strokes(str(path), strokes, (400, 300))
+    loaded, canvas_size = load_strokes(str(path))
+    assert canvas_size == (400, 300)
+    assert [list(points) for points in loaded] == [list(points) for points in strokes]
+
+
+@pytest.mark.parametrize("data", [b"", b"PNG\x00" + bytes(20)])
+def test_other_files_are_rejected(tmp_path, data):
+    path = tmp_path / "drawing.strokes"
+    path.write_bytes(data)
+    with pytest.raises(ValueError):
+        load_strokes(str(path))
+
+
+def test_render_scales_to_the_requested_size():
+    image = render_strokes([array("h", [0, 50, 99, 50]), array("h", [10, 10])], (100, 100), size=(50, 50))
+    assert image.size == (50, 50) and image.mode == "L"
+    assert image.getpixel((25, 25)) == 0
+    assert image.getpixel((5, 5)) == 0
+    assert image.getpixel((25, 5)) == 255
+
+
+def test_stroke_path():
+    assert stroke_path("assets/drawings/ann_drawing_1.png") == "assets/drawings/ann_drawing_1.strokes"
+
+
+def segment_distance(px, py, x0, y0, x1, y1):
+    dx, dy = x1 - x0, y1 - y0
+    length_sq = dx * dx + dy * dy
+    t = 0.0 if length_sq == 0 else max(0.0, min(1.0, ((px - x0) * dx + (py - y0) * dy) / length_sq))
+    return math.hypot(px - (x0 + t * dx), py - (y0 + t * dy))
+
+
+def test_curves_stay_within_tolerance():
+    recorder = StrokeRecorder(min_distance=0.5, tolerance=0.75)
+    moves = [(round(200 + 100 * math.cos(i * 0.02)), round(200 + 100 * math.sin(i * 0.02))) for i in range(315)]
+    for x, y in moves:
+        recorder.add(x, y)
+    points = recorder.strokes[0]
+    kept = [(points[i], points[i + 1]) for i in range(0, len(points), 2)]
+    assert len(kept) < len(moves) // 4
+    deviation = max(min(segment_distance(x, y, *kept[i], *kept[i + 1]) for i in range(len(kept) - 1))
+                    for x, y in moves)
+    assert deviation <= 0.75
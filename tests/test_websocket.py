@@ -0,0 +1,111 @@
+# tests/test_websocket.py
+import asyncio
+import os
+
+import pytest
+
+from server.websocket import MAX_MESSAGE, OP_PING, ConnectionClosed, WebSocket, _apply_mask, accept_key
+
+
+def test_accept_key_matches_rfc_6455_example():
+    assert accept_key("dGhlIHNhbXBsZSBub25jZQ==") == "s3pPLMBiTxaQ9kYGzzhZRbK+xOo="
+
+
+@pytest.mark.parametrize("length", [0, 1, 3, 4, 5, 1000])
+def test_masking_is_its_own_inverse(length):
+    payload, mask = os.urandom(length), os.urandom(4)
+    masked = _apply_mask(payload, mask)
+    assert len(masked) == length
+    assert _apply_mask(masked, mask) == payload
+    if length:
+        assert masked[0] == payload[0] ^ mask[0]
+
+
+async def socket_pair():
+    """
+    Returns a connected server-side and client-side WebSocket over a local TCP connection.
+    """
+    accepted = asyncio.get_running_loop().create_future()
+
+    async def on_connect(reader, writer):
+        accepted.set_result(WebSocket(reader, writer))
+
+    server = await asyncio.start_server(on_connect, "127.0.0.1", 0)
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.sockets[0].getsockname()[1])
+    client = WebSocket(reader, writer, client=True)
+    return server, await accepted, client
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, 10))
+
+
+@pytest.mark.parametrize("text", ["", "hello", "é" * 100, "x" * 70000])
+def test_frames_round_trip_in_both_directions(text):
+    async def scenario():
+        server, server_side, client = await socket_pair()
+        await client.send(text)
+        assert await server_side.receive() == text
+        await server_side.send(text[::-1])
+        assert await client.receive() == text[::-1]
+        await client.close()
+        with pytest.raises(ConnectionClosed):
+            await server_side.receive()
+        server.close()
+
+    run(scenario())
+
+
+def test_client_frames_are_masked_and_server_frames_are_not():
+    async def scenario():
+        server, server_side, client = await socket_pair()
+        await client.send("hi")
+        head = await server_side.reader.readexactly(2)
+        assert head[1] & 0x80
+        await server_side.send("hi")
+        head = await client.reader.readexactly(2)
+        assert not head[1] & 0x80
+        server.close()
+
+    run(scenario())
+
+
+def test_pings_are_answered_while_receiving():
+    async def scenario():
+        server, server_side, client = await socket_pair()
+        await client._send_frame(OP_PING, b"are you there")
+        await client.send("after the ping")
+        assert await server_side.receive() == "after the ping"
+        opcode, fin, payload = await client._read_frame()
+        assert (opcode, payload) == (0xA, b"are you there")
+        server.close()
+
+    run(scenario())
+
+
+def test_oversized_frames_close_the_connection():
+    async def scenario():
+        server, server_side, client = await socket_pair()
+        # A header announcing a frame larger than MAX_MESSAGE
+        client.writer.write(bytes([0x81, 0xFF]) + (MAX_MESSAGE + 1).to_bytes(8, "big"))
+        await client.writer.drain()
+        with pytest.raises(ConnectionClosed):
+            await server_side.receive()
+        server.close()
+
+    run(scenario())
+
+
+def test_unmasked_client_frames_close_the_connection():
+    async def scenario():
+        server, server_side, client = await socket_pair()
+        # A text frame sent the way a server would, without a mask
+        client.writer.write(bytes([0x81, 0x02]) + b"hi")
+        await client.writer.drain()
+        with pytest.raises(ConnectionClosed):
+            await server_side.receive()
+        opcode, fin, payload = await client._read_frame()
+        assert (opcode, payload) == (0x8, (1002).to_bytes(2, "big"))
+        server.close()
+
+    run(scenario())
@@ -0,0 +1,259 @@
+# ui/chain_export.py
+"""
+Renders every chain of a finished game into shareable files: a PNG contact sheet with one row per
+round (the text or guess next to the drawing made from it) and an animated GIF, and WebP where
+Pillow supports it, that steps through the chain.
+
+Run from the repository root on a history log:
+    python -m ui.chain_export game_history.jsonl --output chains --processes 4
+"""
+import argparse
+import hashlib
+import os
+import re
+import sys
+import textwrap
+import threading
+from collections import Counter, OrderedDict
+
+from PIL import Image, ImageDraw, ImageFont, features
+
+from game.chains import ChainIndex
+from game.history_log import load_history
+
+# Width and height of a drawing or text tile
+TILE_SIZE = 256
+CAPTION_HEIGHT = 22
+MARGIN = 8
+# Milliseconds each step of an animation is shown
+FRAME_MS = 1500
+DEFAULT_FORMATS = ("sheet", "gif", "webp")
+
+
+class ImageCache:
+    """
+    Decoded drawings shrunk to tile size, most recently used kept, so a drawing that comes up again
+    in a worker process, in another chain or another export, is not decoded again. Within a chain
+    the contact sheet and the animations share the same frames.
+
+    Parameters:
+        size (int): Largest width and height of a cached drawing.
+        max_items (int): Number of drawings kept.
+    """
+
+    def __init__(self, size=TILE_SIZE, max_items=256):
+        self.size = size
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path):
+        """
+        Returns the drawing at path as a grayscale image, or None if it cannot be read.
+        """
+        try:
+            stat = os.stat(path)
+        except (OSError, TypeError, ValueError):
+            return None
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+        try:
+            with Image.open(path) as image:
+                image.draft("L", (self.size, self.size))  # Lets JPEG decode at reduced size
+                image = image.convert("L")
+                image.thumbnail((self.size, self.size))
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self.misses += 1
+            self._items[key] = image
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+        return image
+
+
+_cache = None
+_font = None
+
+
+def _worker_state():
+    """
+    Returns the image cache and font of this process, created on first use.
+    """
+    global _cache, _font
+    if _cache is None:
+        _cache = ImageCache()
+        _font = ImageFont.load_default(size=14)
+    return _cache, _font
+
+
+def text_tile(text, font, size=TILE_SIZE):
+    """
+    Returns a tile with the text wrapped to fit.
+    """
+    tile = Image.new("L", (size, size), 255)
+    draw = ImageDraw.Draw(tile)
+    lines = textwrap.wrap(str(text), width=max(8, size // 9)) or [""]
+    line_height = font.size + 4
+    lines = lines[:(size - 2 * MARGIN) // line_height]
+    top = max(MARGIN, (size - line_height * len(lines)) // 2)
+    for number, line in enumerate(lines):
+        draw.text((MARGIN, top + number * line_height), line, fill=0, font=font)
+    return tile
+
+
+def drawing_tile(path, cache, font, size=TILE_SIZE):
+    """
+    Returns a tile with the drawing centered, or a note if the drawing is missing.
+    """
+    image = cache.get(path) if path not in (None, "No drawing") else None
+    if image is None:
+        return text_tile("(no drawing)", font, size)
+    tile = Image.new("L", (size, size), 255)
+    tile.paste(image, ((size - image.width) // 2, (size - image.height) // 2))
+    return tile
+
+
+def captioned(tile, caption, font):
+    """
+    Returns the tile with a caption above it.
+    """
+    image = Image.new("L", (tile.width, tile.height + CAPTION_HEIGHT), 255)
+    ImageDraw.Draw(image).text((MARGIN // 2, 4), caption, fill=0, font=font)
+    image.paste(tile, (0, CAPTION_HEIGHT))
+    return image
+
+
+def step_frames(steps, cache, font):
+    """
+    Returns one captioned tile per step of a chain (see ChainIndex.chain), in order.
+    """
+    frames = []
+    round_number = 0
+    for step in steps:
+        if step["action"] != "Drawing":
+            round_number += 1
+            tile = text_tile(step["content"], font)
+        else:
+            tile = drawing_tile(step["content"], cache, font)
+        frames.append(captioned(tile, f"{round_number}. {step['action']} by {step['player']}", font))
+    return frames
+
+
+def contact_sheet(frames):
+    """
+    Lays the frames out two per row: each text or guess next to the drawing made from it.
+    """
+    width, height = frames[0].size
+    rows = (len(frames) + 1) // 2
+    sheet = Image.new("L", (2 * width + 3 * MARGIN, rows * (height + MARGIN) + MARGIN), 255)
+    for index, frame in enumerate(frames):
+        sheet.paste(frame, (MARGIN + (index % 2) * (width + MARGIN), MARGIN + (index // 2) * (height + MARGIN)))
+    return sheet
+
+
+def render_chain(chain_id, steps, directory, formats=DEFAULT_FORMATS, name=None):
+    """
+    Writes the files of one chain and returns their paths. Runs in a worker process.
+    The files are named name, by default the chain id made safe for file names.
+    """
+    cache, font = _worker_state()
+    if not steps:
+        return []
+    frames = step_frames(steps, cache, font)
+    base = os.path.join(directory, name or _file_name(chain_id))
+    paths = []
+    if "sheet" in formats:
+        contact_sheet(frames).save(f"{base}.png", compress_level=6)
+        paths.append(f"{base}.png")
+    if "gif" in formats:
+        frames[0].save(f"{base}.gif", save_all=True, append_images=frames[1:], duration=FRAME_MS, loop=0,
+                       optimize=True)
+        paths.append(f"{base}.gif")
+    if "webp" in formats and features.check("webp"):
+        frames[0].save(f"{base}.webp", save_all=True, append_images=frames[1:], duration=FRAME_MS, loop=0,
+                       lossless=True, method=0)
+        paths.append(f"{base}.webp")
+    return paths
+
+
+def _render_chunk(chains, directory, formats):
+    return [render_chain(chain_id, steps, directory, formats, name) for chain_id, steps, name in chains]
+
+
+def _file_name(chain_id):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(chain_id)).strip("_") or "chain"
+
+
+def _file_names(chain_ids):
+    """
+    Returns a file name for each chain id. Ids that become the same name, such as "a b" and "a_b",
+    get a short hash of the id appended, so no chain overwrites the files of another.
+    """
+    names = {chain_id: _file_name(chain_id) for chain_id in chain_ids}
+    counts = Counter(names.values())
+    for chain_id, name in names.items():
+        if counts[name] > 1:
+            names[chain_id] = f"{name}-{hashlib.sha1(str(chain_id).encode('utf-8')).hexdigest()[:8]}"
+    return names
+
+
+def export_chains(history, directory, processes=None, formats=DEFAULT_FORMATS):
+    """
+    Renders every chain of a game. Chains are split into chunks rendered in parallel by a pool of
+    processes; each process keeps its own cache of decoded drawings.
+
+    Parameters:
+        history: The game history, as Game.history or a list of round data dictionaries.
+        directory (str): Where the files are written, named after the chain ids (see _file_names).
+        processes (int): Number of worker processes. 0 renders in this process, None uses one per CPU.
+        formats (tuple): Any of "sheet" (PNG contact sheet), "gif" and "webp".
+
+    Returns:
+        dict: Maps chain ids to the paths written for them.
+    """
+    index = ChainIndex(history)
+    names = _file_names(index.chain_ids())
+    chains = [(chain_id, index.chain(chain_id), names[chain_id]) for chain_id in index.chain_ids()]
+    os.makedirs(directory, exist_ok=True)
+    if processes == 0 or len(chains) <= 1:
+        return {chain_id: render_chain(chain_id, steps, directory, formats, name) for chain_id, steps, name in chains}
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    processes = processes or os.cpu_count() or 1
+    # A few chunks per process keeps them all busy without sending every chain on its own
+    size = max(1, len(chains) // (processes * 4))
+    chunks = [chains[start:start + size] for start in range(0, len(chains), size)]
+    results = {}
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+        for chunk, paths in zip(chunks, pool.map(_render_chunk, chunks, [directory] * len(chunks),
+                                                 [formats] * len(chunks))):
+            for (chain_id, _, _), chain_paths in zip(chunk, paths):
+                results[chain_id] = chain_paths
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render every chain of a game to contact sheets and animations.")
+    parser.add_argument("history", help="History log (JSON lines) written by the game")
+    parser.add_argument("--output", default="chains", help="Directory for the rendered files")
+    parser.add_argument("--processes", type=int, help="Worker processes; 0 renders in this process")
+    parser.add_argument("--formats", nargs="+", choices=DEFAULT_FORMATS, default=list(DEFAULT_FORMATS))
+    args = parser.parse_args(argv)
+
+    results = export_chains(load_history(args.history, repair=False), args.output, processes=args.processes,
+                            formats=tuple(args.formats))
+    print(f"Exported {len(results)} chains to '{args.output}'")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
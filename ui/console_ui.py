@@ -1,5 +1,85 @@
+import sys
+import threading
+import time
+from collections import deque
+
+
 def display_message(message):
     print(message)
 
-def get_user_input(prompt):
-    return input(prompt)
+def get_user_input(prompt, timeout=None):
+    """
+    Reads a line from the console.
+
+    Parameters:
+        prompt (str): Shown before reading.
+        timeout (float): Seconds to wait for the line. None waits as long as it takes.
+
+    Returns:
+        str: The line, or None if timeout passed first.
+    """
+    if timeout is None and _reader is None:
+        return input(prompt)
+    return _get_reader().read(prompt, timeout)
+
+
+class _ConsoleReader:
+    """
+    Reads stdin on one background thread, a line at a time and only while someone is waiting for
+    one, so a prompt can give up after a timeout without leaving a blocked input() behind to
+    swallow the answer to the next prompt. A line typed after its prompt gave up goes to the next one.
+    """
+
+    def __init__(self):
+        self._lines = deque()
+        self._waiting = 0
+        self._eof = False
+        self._condition = threading.Condition()
+        threading.Thread(target=self._run, daemon=True, name="console-reader").start()
+
+    def read(self, prompt, timeout):
+        print(prompt, end="", flush=True)
+        with self._condition:
+            self._waiting += 1
+            self._condition.notify_all()
+            try:
+                if not self._condition.wait_for(lambda: self._lines or self._eof, timeout=timeout):
+                    print()
+                    return None
+                if not self._lines:
+                    raise EOFError("EOF when reading a line")
+                return self._lines.popleft()
+            finally:
+                self._waiting -= 1
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._waiting > len(self._lines))
+            line = sys.stdin.readline()
+            with self._condition:
+                if not line:
+                    self._eof = True
+                    self._condition.notify_all()
+                    return
+                self._lines.append(line.rstrip("\n"))
+                self._condition.notify_all()
+
+
+_reader = None
+_reader_lock = threading.Lock()
+
+
+def _get_reader():
+    global _reader
+    with _reader_lock:
+        if _reader is None:
+            _reader = _ConsoleReader()
+        return _reader
+
+
+def countdown(deadline):
+    """
+    Returns the whole seconds left until a time.monotonic() deadline, for showing to a player.
+    """
+    return max(0, int(deadline - time.monotonic() + 0.5))
@@ -1,45 +1,84 @@
 import os
-import tkinter as tk
+import time
 from pathlib import Path
 from sys import base_prefix
 
-from PIL import Image, ImageDraw, ImageTk
+from PIL import Image
 
-os.environ["TCL_LIBRARY"] = str(Path(base_prefix) / "lib" / "tcl8.6")
-os.environ["TK_LIBRARY"] = str(Path(base_prefix) / "lib" / "tk8.6")
+from ui.console_ui import countdown
+from ui.strokes import StrokeRecorder, render_strokes, save_strokes, stroke_path
 
 
-def save_drawing(player_name, round):
+def load_tk():
+    """
+    Imports tkinter for a window about to open, pointing Tcl at the interpreter's own Tcl/Tk
+    libraries. Runs without a window never load Tk or change the environment.
+    """
+    os.environ["TCL_LIBRARY"] = str(Path(base_prefix) / "lib" / "tcl8.6")
+    os.environ["TK_LIBRARY"] = str(Path(base_prefix) / "lib" / "tk8.6")
+    import tkinter
+
+    return tkinter
+
+
+def save_drawing(player_name, round, timeout=None):
+    """
+    Opens a canvas for the player to draw on and saves the drawing when they press Save.
+
+    With a timeout the seconds left are shown in the title, and when they run out whatever has been
+    drawn so far is saved as if Save had been pressed.
+
+    Returns:
+        str: The path of the saved drawing, or None if the window was closed, or time ran out,
+            with nothing saved.
+    """
+    tk = load_tk()
+
     # Create a simple drawing canvas
     root = tk.Tk()
-    root.title(f"{player_name} - Draw")
+    title = f"{player_name} - Draw"
+    root.title(title)
 
     canvas_width = 400
     canvas_height = 400
     canvas = tk.Canvas(root, width=canvas_width, height=canvas_height, bg='white')
     canvas.pack()
 
-    drawing = Image.new("RGB", (canvas_width, canvas_height), "white")
-    draw = ImageDraw.Draw(drawing)
-    last_x, last_y = None, None
+    # Strokes are kept as point arrays and shown as one canvas line each; the image is drawn on save
+    recorder = StrokeRecorder()
+    stroke_item = None
     file_path = f"assets/drawings/{player_name}_drawing_{round}.png"
+    saved = False
 
     def draw_line(event):
-        nonlocal last_x, last_y
-        if last_x and last_y:
-            canvas.create_line(last_x, last_y, event.x, event.y, fill='black')
-            draw.line([last_x, last_y, event.x, event.y], fill='black')
-        last_x, last_y = event.x, event.y
+        nonlocal stroke_item
+        x = min(max(event.x, 0), canvas_width - 1)
+        y = min(max(event.y, 0), canvas_height - 1)
+        if recorder.current is None:
+            recorder.start(x, y)
+            return
+        if not recorder.add(x, y):
+            return
+        if stroke_item is None:
+            stroke_item = canvas.create_line(*recorder.current, fill='black')
+        else:
+            canvas.coords(stroke_item, *recorder.current)
 
     def reset(event):
-        nonlocal last_x, last_y
-        last_x, last_y = None, None
+        nonlocal stroke_item
+        recorder.end()
+        stroke_item = None
 
     def save_and_exit():
+        nonlocal saved
+        recorder.end()
         os.makedirs("/".join(file_path.split("/")[:-1]), exist_ok=True)
         if os.path.exists(file_path):
             os.remove(file_path)
-        drawing.save(file_path)
+        render_strokes(recorder.strokes, (canvas_width, canvas_height)).save(file_path)
+        # The strokes can redraw the drawing at any resolution later
+        save_strokes(stroke_path(file_path), recorder.strokes, (canvas_width, canvas_height))
+        saved = True
         root.destroy()
 
     canvas.bind("<B1-Motion>", draw_line)
@@ -48,14 +87,34 @@ def save_drawing(player_name, round):
     save_button = tk.Button(root, text="Save Drawing", command=save_and_exit)
     save_button.pack()
 
+    if timeout is not None:
+        deadline = time.monotonic() + timeout
+
+        def tick():
+            if time.monotonic() < deadline:
+                root.title(f"{title} ({countdown(deadline)}s left)")
+                root.after(250, tick)
+            elif recorder.strokes:
+                save_and_exit()
+            else:
+                root.destroy()
+
+        tick()
+
     root.mainloop()
-    return file_path
+    return file_path if saved else None
 
-def display_drawing(file_path):
+def display_drawing(file_path, timeout=None):
+    """
+    Shows a drawing until the player closes the window, or until timeout seconds have passed.
+    """
     if not os.path.exists(file_path):
         print(f"Drawing file not found: {file_path}")
         return
 
+    tk = load_tk()
+    from PIL import ImageTk
+
     root = tk.Tk()
     root.title("Drawing to Guess")
 
@@ -72,4 +131,7 @@ def display_drawing(file_path):
     close_button = tk.Button(root, text="Close", command=root.destroy)
     close_button.pack()
 
+    if timeout is not None:
+        root.after(int(timeout * 1000), root.destroy)
+
     root.mainloop()
\ No newline at end of file
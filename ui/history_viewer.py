@@ -0,0 +1,277 @@
+# ui/history_viewer.py
+import hashlib
+import os
+import queue
+import tempfile
+import threading
+import tkinter as tk
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import ttk
+from tkinter.scrolledtext import ScrolledText
+
+from PIL import Image, ImageTk
+
+from game.chains import ChainIndex
+from ui.drawing_interface import load_tk
+
+THUMBNAIL_SIZE = (400, 400)
+THUMBNAIL_DIR = os.path.join("assets", "cache", "thumbnails")
+
+
+class ThumbnailCache:
+    """
+    Bounded cache of drawing thumbnails. Recently used thumbnails are kept in memory;
+    every thumbnail is also written to disk, so reopening a game skips decoding the full images.
+    The least recently used files on disk are evicted once the file or size cap is exceeded,
+    with recency kept across restarts through the file modification times.
+    Safe to use from several threads.
+
+    Parameters:
+        directory (str): Where thumbnails are stored on disk.
+        size (tuple): Maximum width and height of a thumbnail.
+        max_memory (int): Maximum number of thumbnails kept in memory.
+        max_files (int): Maximum number of thumbnails kept on disk. None for no limit.
+        max_bytes (int): Maximum total size of the thumbnails on disk. None for no limit.
+    """
+
+    def __init__(self, directory=THUMBNAIL_DIR, size=THUMBNAIL_SIZE, max_memory=64, max_files=2000,
+                 max_bytes=100 * 1024 * 1024):
+        self.directory = directory
+        self.size = size
+        self.max_memory = max_memory
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._files = OrderedDict()  # Maps keys of thumbnails on disk to file sizes, least recently used first
+        self._bytes = 0
+        self._load()
+
+    def get(self, path):
+        """
+        Returns the thumbnail of the image at path as a loaded PIL image.
+        """
+        stat = os.stat(path)
+        spec = f"{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}:{self.size}"
+        key = hashlib.sha256(spec.encode("utf-8")).hexdigest()
+
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        cached_path = self._path(key)
+        thumbnail = None
+        if os.path.exists(cached_path):
+            try:
+                with Image.open(cached_path) as cached:
+                    thumbnail = cached.copy()
+                os.utime(cached_path)
+                with self._lock:
+                    if key in self._files:
+                        self._files.move_to_end(key)
+            except OSError:
+                thumbnail = None  # Evicted or half written by another process; decode it again
+        if thumbnail is None:
+            with Image.open(path) as image:
+                image.draft(image.mode, self.size)  # Lets JPEG decode at reduced size
+                image.thumbnail(self.size)
+                thumbnail = image.copy()
+            self._put(key, thumbnail)
+
+        with self._lock:
+            self._memory[key] = thumbnail
+            while len(self._memory) > self.max_memory:
+                self._memory.popitem(last=False)
+        return thumbnail
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_memory": len(self._memory),
+                "files": len(self._files),
+                "bytes": self._bytes,
+                "evictions": self.evictions,
+            }
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.png")
+
+    def _put(self, key, thumbnail):
+        os.makedirs(self.directory, exist_ok=True)
+        # A unique name, so other threads and processes never write to the same file
+        with tempfile.NamedTemporaryFile(dir=self.directory, prefix=f"{key}.", suffix=".tmp", delete=False) as f:
+            thumbnail.save(f, format="PNG")
+        size = os.path.getsize(f.name)
+        os.replace(f.name, self._path(key))
+        with self._lock:
+            if key in self._files:
+                self._bytes -= self._files.pop(key)
+            self._files[key] = size
+            self._bytes += size
+            self._evict()
+
+    def _load(self):
+        if not os.path.isdir(self.directory):
+            return
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".png"):
+                stat = os.stat(os.path.join(self.directory, name))
+                files.append((stat.st_mtime, name[:-len(".png")], stat.st_size))
+        for _, key, size in sorted(files):
+            self._files[key] = size
+            self._bytes += size
+        self._evict()
+
+    def _evict(self):
+        while self._files and (
+            (self.max_files is not None and len(self._files) > self.max_files)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            key, size = self._files.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+
+class HistoryViewer:
+    """
+    Shows the game history as one chat tab per chain.
+    A tab is filled only when it is selected, drawings are decoded on worker threads,
+    and only the most recently viewed tabs keep their images, so opening the window and
+    its memory use do not grow with the length of the game.
+
+    Parameters:
+        history (list): Round data dictionaries, as in Game.history.
+        thumbnails (ThumbnailCache): Where thumbnails come from. Defaults to a new cache.
+        max_open_tabs (int): Number of filled tabs kept before the least recent one is emptied.
+        workers (int): Number of threads decoding drawings.
+    """
+
+    def __init__(self, history, thumbnails=None, max_open_tabs=3, workers=2):
+        self.chains = ChainIndex(history)
+        self.thumbnails = thumbnails or ThumbnailCache()
+        self.max_open_tabs = max_open_tabs
+        self.workers = workers
+        self._results = queue.Queue()  # Decoded thumbnails waiting to be shown by the UI thread
+        self._tabs = {}  # Maps notebook tab ids to chain ids
+        self._displays = {}  # Maps chain ids to their ScrolledText widgets
+        self._open = OrderedDict()  # Filled chain ids, least recently viewed first
+        self._generation = {}  # Bumped whenever a tab is filled, to drop results for emptied tabs
+
+    def show(self):
+        """
+        Opens the window and blocks until it is closed.
+        """
+        load_tk()
+        self.root = tk.Tk()
+        self.root.title("Game History")
+
+        # Use a notebook to organize chains in tabs
+        self.notebook = ttk.Notebook(self.root)
+        self.notebook.pack(expand=True, fill='both')
+
+        for chain_id in self.chains.chain_ids():
+            frame = ttk.Frame(self.notebook)
+            self.notebook.add(frame, text=f"{chain_id}'s Chain")
+            chat_display = ScrolledText(frame, wrap='word', state='disabled')
+            chat_display.pack(expand=True, fill='both')
+            chat_display.images = []  # Keep references to images to prevent garbage collection
+            self._tabs[str(frame)] = chain_id
+            self._displays[chain_id] = chat_display
+
+        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+            self._on_tab_changed(None)  # Fill the tab selected on opening
+            self.root.after(50, self._poll)
+            self.root.mainloop()
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _on_tab_changed(self, event):
+        chain_id = self._tabs.get(str(self.notebook.select()))
+        if chain_id is None:
+            return
+        if chain_id in self._open:
+            self._open.move_to_end(chain_id)
+            return
+        self._fill(chain_id)
+        self._open[chain_id] = True
+        while len(self._open) > self.max_open_tabs:
+            oldest, _ = self._open.popitem(last=False)
+            self._empty(oldest)
+
+    def _fill(self, chain_id):
+        chat_display = self._displays[chain_id]
+        generation = self._generation.get(chain_id, 0) + 1
+        self._generation[chain_id] = generation
+
+        # Enable the text widget to insert content
+        chat_display.configure(state='normal')
+        for number, entry in enumerate(self.chains.chain(chain_id)):
+            player = entry['player']
+            action = entry['action']
+            content = entry['content']
+
+            if action == 'Drawing' and os.path.exists(content):
+                # Reserve the place of the image and decode it off the UI thread
+                tag = f"drawing-{number}"
+                chat_display.insert(tk.END, f"\n{player} ({action}):\n")
+                chat_display.insert(tk.END, "[Loading drawing...]", tag)
+                chat_display.insert(tk.END, "\n\n")
+                self.executor.submit(self._decode, chain_id, generation, tag, content)
+            else:
+                # Format the message
+                message = f"{player} ({action}): {content}\n\n"
+                chat_display.insert(tk.END, message)
+
+        # Disable the text widget to prevent user editing
+        chat_display.configure(state='disabled')
+
+    def _empty(self, chain_id):
+        chat_display = self._displays[chain_id]
+        self._generation[chain_id] = self._generation.get(chain_id, 0) + 1
+        chat_display.configure(state='normal')
+        chat_display.delete("1.0", tk.END)
+        chat_display.configure(state='disabled')
+        chat_display.images.clear()
+
+    def _decode(self, chain_id, generation, tag, path):
+        try:
+            thumbnail = self.thumbnails.get(path)
+        except Exception:
+            thumbnail = None
+        self._results.put((chain_id, generation, tag, thumbnail))
+
+    def _poll(self):
+        """
+        Shows the thumbnails decoded since the last poll. PhotoImages must be created on the UI thread.
+        """
+        try:
+            while True:
+                chain_id, generation, tag, thumbnail = self._results.get_nowait()
+                if self._generation.get(chain_id) != generation:
+                    continue  # The tab was emptied after this drawing was requested
+                chat_display = self._displays[chain_id]
+                ranges = chat_display.tag_ranges(tag)
+                if not ranges:
+                    continue
+                chat_display.configure(state='normal')
+                chat_display.delete(ranges[0], ranges[1])
+                if thumbnail is None:
+                    chat_display.insert(ranges[0], "[Error displaying image]")
+                else:
+                    photo = ImageTk.PhotoImage(thumbnail)
+                    chat_display.image_create(ranges[0], image=photo)
+                    chat_display.images.append(photo)
+                chat_display.configure(state='disabled')
+        except queue.Empty:
+            pass
+        self.root.after(50, self._poll)
@@ -0,0 +1,196 @@
+# ui/strokes.py
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+from PIL import Image, ImageDraw
+
+# File header: magic, format version, canvas width and height, number of strokes
+STROKE_MAGIC = b"GPST"
+STROKE_VERSION = 1
+HEADER = struct.Struct("<4sBHHI")
+
+
+class StrokeRecorder:
+    """
+    Records freehand strokes as flat arrays of x, y coordinates.
+    Points closer than min_distance to the last kept point are dropped, and a point that
+    continues the current straight segment replaces the end of that segment instead of adding one,
+    so a stroke keeps only the points needed to redraw it. Every point a segment has absorbed
+    stays within tolerance of it, so curves do not flatten as their segments grow.
+
+    Parameters:
+        min_distance (float): Pixels the pointer must move before a new point is kept.
+        tolerance (float): Pixels a point may be off a straight segment and still extend it.
+    """
+
+    def __init__(self, min_distance=2.0, tolerance=0.75):
+        self.min_distance = min_distance
+        self.tolerance = tolerance
+        self.strokes = []  # One array('h') of x0, y0, x1, y1, ... per stroke
+        self.current = None
+        self._merged = array("h")  # The points the last segment of the current stroke has absorbed
+        self.events = 0  # Number of pointer events seen, for comparing with the points kept
+
+    def start(self, x, y):
+        """
+        Starts a new stroke at x, y.
+        """
+        self.current = array("h", (x, y))
+        self._merged = array("h")
+        self.strokes.append(self.current)
+        self.events += 1
+
+    def add(self, x, y):
+        """
+        Adds a pointer position to the current stroke, starting one if needed.
+
+        Returns:
+            bool: Whether the stroke changed and needs to be redrawn.
+        """
+        if self.current is None:
+            self.start(x, y)
+            return True
+        self.events += 1
+        points = self.current
+        last_x, last_y = points[-2], points[-1]
+        if (x - last_x) ** 2 + (y - last_y) ** 2 < self.min_distance ** 2:
+            return False
+        if len(points) >= 4 and self._extends_segment(points[-4], points[-3], x, y, last_x, last_y):
+            # Coalesce: move the end of the segment instead of adding a point
+            self._merged.extend((last_x, last_y))
+            points[-2], points[-1] = x, y
+        else:
+            self._merged = array("h")
+            points.extend((x, y))
+        return True
+
+    def end(self):
+        """
+        Ends the current stroke.
+        """
+        self.current = None
+
+    def point_count(self):
+        return sum(len(points) // 2 for points in self.strokes)
+
+    def _extends_segment(self, x0, y0, x1, y1, px, py):
+        """
+        Whether (px, py) lies within tolerance of the segment from (x0, y0) to (x1, y1)
+        and the segment keeps its direction, and so do the points the segment has absorbed before.
+        """
+        dx, dy = x1 - x0, y1 - y0
+        length_sq = dx * dx + dy * dy
+        if length_sq == 0:
+            return True
+        # The point must lie between the two ends; past (x1, y1) the pointer turned back
+        if (px - x0) * dx + (py - y0) * dy < 0 or (px - x1) * dx + (py - y1) * dy > 0:
+            return False
+        limit = self.tolerance ** 2 * length_sq
+        cross = dx * (py - y0) - dy * (px - x0)
+        if cross * cross > limit:
+            return False
+        merged = self._merged
+        for i in range(0, len(merged), 2):
+            cross = dx * (merged[i + 1] - y0) - dy * (merged[i] - x0)
+            if cross * cross > limit:
+                return False
+        return True
+
+
+def render_strokes(strokes, canvas_size, size=None, width=1, fill="black", background="white"):
+    """
+    Rasterizes strokes into a new image, drawing each one as a single polyline.
+
+    Parameters:
+        strokes (list): Flat coordinate arrays as recorded by StrokeRecorder.
+        canvas_size (tuple): Width and height of the canvas the strokes were drawn on.
+        size (tuple): Width and height of the image. Defaults to canvas_size.
+        width (int): Line width in canvas pixels; scaled with the image.
+
+    Returns:
+        Image: A grayscale image.
+    """
+    size = size or canvas_size
+    scale_x = size[0] / canvas_size[0]
+    scale_y = size[1] / canvas_size[1]
+    image = Image.new("L", size, background)
+    draw = ImageDraw.Draw(image)
+    line_width = max(1, round(width * min(scale_x, scale_y)))
+    for points in strokes:
+        coords = [(points[i] * scale_x, points[i + 1] * scale_y) for i in range(0, len(points), 2)]
+        if len(coords) == 1:
+            draw.point(coords, fill=fill)
+        else:
+            draw.line(coords, fill=fill, width=line_width, joint="curve" if line_width > 2 else None)
+    return image
+
+
+def stroke_path(drawing_path):
+    """
+    Returns where the strokes of the drawing saved at drawing_path are kept.
+    """
+    return os.path.splitext(drawing_path)[0] + ".strokes"
+
+
+def save_strokes(path, strokes, canvas_size):
+    """
+    Writes strokes to a compact binary file: a header, then for every stroke its point count and
+    the differences between consecutive points, little-endian and zlib-compressed.
+    """
+    body = array("I")
+    deltas = array("h")
+    for points in strokes:
+        body.append(len(points) // 2)
+        previous_x = previous_y = 0
+        for i in range(0, len(points), 2):
+            deltas.extend((points[i] - previous_x, points[i + 1] - previous_y))
+            previous_x, previous_y = points[i], points[i + 1]
+    if sys.byteorder == "big":
+        body.byteswap()
+        deltas.byteswap()
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(STROKE_MAGIC, STROKE_VERSION, canvas_size[0], canvas_size[1], len(strokes)))
+        f.write(zlib.compress(body.tobytes() + deltas.tobytes(), 9))
+
+
+def load_strokes(path):
+    """
+    Reads a file written by save_strokes.
+
+    Returns:
+        tuple: The list of stroke arrays and the canvas size.
+
+    Raises:
+        ValueError: If the file is not a stroke file.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"Not a stroke file: {path}")
+    magic, version, width, height, count = HEADER.unpack_from(data)
+    if magic != STROKE_MAGIC or version != STROKE_VERSION:
+        raise ValueError(f"Not a stroke file: {path}")
+    payload = zlib.decompress(data[HEADER.size:])
+    counts = array("I")
+    counts.frombytes(payload[:count * counts.itemsize])
+    deltas = array("h")
+    deltas.frombytes(payload[count * counts.itemsize:])
+    if sys.byteorder == "big":
+        counts.byteswap()
+        deltas.byteswap()
+
+    strokes = []
+    offset = 0
+    for n in counts:
+        points = array("h")
+        x = y = 0
+        for i in range(offset, offset + 2 * n, 2):
+            x += deltas[i]
+            y += deltas[i + 1]
+            points.extend((x, y))
+        offset += 2 * n
+        strokes.append(points)
+    return strokes, (width, height)
@@ -1,13 +1,19 @@
 # utils/derangement.py
+import random
 
-def derangement(lst):
+
+def derangement(lst, rng=None):
     """
-    Generates a derangement of the input list by shifting elements by one position.
+    Generates a uniformly random derangement of the input list: every element moves to a new position.
     Returns None if a derangement is not possible.
-    
+
+    A shuffle has no fixed point with probability close to 1/e, so rejecting shuffles that
+    do takes about e shuffles on average, which keeps the expected cost O(n).
+
     Parameters:
         lst (list): The input list to derange.
-    
+        rng (random.Random): Source of randomness, for reproducible results. Defaults to the random module.
+
     Returns:
         list or None: The deranged list or None if derangement isn't possible.
     """
@@ -15,6 +21,111 @@ def derangement(lst):
     if n < 2:
         return None  # No derangement possible for lists with fewer than 2 elements
 
-    # Shift the list by one position to the left
-    deranged = lst[1:] + lst[:1]
-    return deranged
+    rng = rng or random
+    order = list(range(n))
+    while True:
+        rng.shuffle(order)
+        if all(source != position for position, source in enumerate(order)):
+            return [lst[source] for source in order]
+
+
+class AssignmentSchedule:
+    """
+    Decides up front who receives whose work in every phase of a game, so that no player sees
+    the same chain twice for as long as the number of players allows.
+
+    The players are seated in a random order and chain c is at seat seat(c) + offset[k] after
+    step k, where step 0 is writing the first text, step 1 the first drawing, step 2 the guess
+    of round 2 and so on. The offsets are distinct, so the chains and steps form a Latin rectangle:
+    every step is a derangement of the players, and every chain visits distinct players.
+    With n players that holds for n steps, i.e. the first n // 2 rounds; after that offsets are
+    reused, never twice in a row, so nobody receives their own work.
+
+    Memory and the cost of each step are O(n), so the schedule works for thousands of players.
+
+    Parameters:
+        names (list): The player names, in game order.
+        rounds (int): The number of rounds to schedule.
+        seed: Seed for the seating and the offsets. The same seed and names give the same schedule, and
+            a schedule of more rounds begins with the same steps.
+    """
+
+    def __init__(self, names, rounds, seed=None):
+        self.names = list(names)
+        self.rounds = rounds
+        self.seed = seed
+        n = len(self.names)
+        rng = random.Random(seed)
+
+        # seats[s] is the index of the player at seat s; seat_of is the inverse
+        self.seats = list(range(n))
+        rng.shuffle(self.seats)
+        self.seat_of = [0] * n
+        for seat, index in enumerate(self.seats):
+            self.seat_of[index] = seat
+
+        steps = 2 * rounds
+        self.offsets = [0]
+        if n >= 2:
+            # Always draws all n - 1 offsets, so a longer schedule with the same seed, such as the one
+            # of a resumed game, starts with the same steps
+            self.offsets.extend(rng.sample(range(1, n), n - 1)[:steps - 1])
+            while len(self.offsets) < steps:
+                # Every player has seen every chain; reuse offsets, never the previous one
+                block = list(range(n))
+                rng.shuffle(block)
+                if block[0] == self.offsets[-1]:
+                    block[0], block[-1] = block[-1], block[0]
+                self.offsets.extend(block[:steps - len(self.offsets)])
+
+    @property
+    def repeat_free_rounds(self):
+        """
+        The number of rounds in which no player sees a chain for the second time.
+        """
+        return min(self.rounds, len(self.names) // 2)
+
+    def step(self, round, phase):
+        """
+        Returns the step number of a phase: 1 for the first drawing, 2 for the guess of round 2, and so on.
+        """
+        if phase == 'draw':
+            step = 2 * round - 1
+        elif phase == 'guess_text':
+            step = 2 * round - 2
+        else:
+            raise ValueError(f"No assignment in phase {phase}")
+        if not 1 <= step < len(self.offsets):
+            raise ValueError(f"Round {round} is not in the schedule")
+        return step
+
+    def source_indices(self, round, phase):
+        """
+        Returns a list whose entry i is the index of the player whose work player i receives,
+        or None if there are too few players for a derangement.
+        """
+        n = len(self.names)
+        if n < 2:
+            return None
+        step = self.step(round, phase)
+        shift = self.offsets[step] - self.offsets[step - 1]
+        return [self.seats[(self.seat_of[index] - shift) % n] for index in range(n)]
+
+    def sources(self, round, phase):
+        """
+        Returns a dictionary mapping each player name to the name of the player whose work they
+        receive in the given round and phase ('guess_text' or 'draw'), or None if there are too
+        few players for a derangement.
+        """
+        indices = self.source_indices(round, phase)
+        if indices is None:
+            return None
+        return {name: self.names[source] for name, source in zip(self.names, indices)}
+
+    def holder(self, chain_index, round, phase):
+        """
+        Returns the index of the player who works on the chain started by player chain_index
+        in the given round and phase.
+        """
+        step = 0 if phase == 'create_text' else self.step(round, phase)
+        return self.seats[(self.seat_of[chain_index] + self.offsets[step]) % len(self.names)]
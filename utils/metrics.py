@@ -0,0 +1,258 @@
+# utils/metrics.py
+import bisect
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Labels kept on histograms and counters. Span labels such as player and round identify single
+# calls in the trace but would make one time series per player per round in the metrics.
+METRIC_LABELS = ("phase", "provider", "endpoint", "kind", "reason", "mode")
+
+# Prefix of every exported metric name
+NAMESPACE = "gentic_phone"
+
+
+class _NullSpan:
+    """
+    Span returned while metrics are disabled; entering and leaving it does nothing.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **labels):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """
+    Times a block of code. Labels of enclosing spans in the same thread are inherited,
+    so a backend request made during a player's turn carries the player, phase and round.
+    """
+
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        stack = self.metrics._stack()
+        if stack:
+            self.labels = {**stack[-1].labels, **self.labels}
+        stack.append(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.started
+        self.metrics._stack().pop()
+        if exc_type is not None:
+            self.labels["error"] = exc_type.__name__
+        self.metrics._finish(self, duration)
+        return False
+
+    def set(self, **labels):
+        """
+        Adds labels known only once the span has started, e.g. the size of a response.
+        """
+        self.labels.update(labels)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last one counts values above every bound
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    Collects spans, counters and histograms for one process and exports them as a JSON trace
+    (Chrome trace event format, readable by chrome://tracing and Perfetto) and as a Prometheus
+    text file. While disabled, span() returns a shared no-op object and count() and observe()
+    return right away, so instrumented code costs one attribute check.
+
+    Parameters:
+        max_spans (int): Number of most recent spans kept for the trace.
+        buckets (tuple): Upper bounds in seconds of the latency histogram buckets.
+    """
+
+    def __init__(self, max_spans=100000, buckets=LATENCY_BUCKETS):
+        self.enabled = False
+        self.buckets = buckets
+        self._spans = deque(maxlen=max_spans)
+        self._counters = {}  # Maps (name, labels) to a number
+        self._histograms = {}  # Maps (name, labels) to a Histogram
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._epoch = time.perf_counter()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+            self._histograms.clear()
+            self._epoch = time.perf_counter()
+
+    def span(self, name, **labels):
+        """
+        Returns a context manager that records how long its block takes as a span named name,
+        and in the histogram <name>_seconds.
+        """
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, labels)
+
+    def count(self, name, value=1, **labels):
+        """
+        Adds value to the counter name.
+        """
+        if not self.enabled:
+            return
+        key = (name, _metric_labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        """
+        Records value in the histogram name.
+        """
+        if not self.enabled:
+            return
+        key = (name, _metric_labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def labels(self):
+        """
+        Returns the labels of the innermost open span of this thread, to carry them to another thread.
+        """
+        stack = getattr(self._local, "stack", None)
+        return dict(stack[-1].labels) if stack else {}
+
+    def spans(self, name=None):
+        """
+        Returns the recorded spans, optionally only those named name, as
+        (name, labels, started, duration) tuples with started in time.perf_counter() seconds.
+        """
+        with self._lock:
+            spans = list(self._spans)
+        return [(span_name, labels, started, duration) for span_name, labels, started, duration, _ in spans
+                if name is None or span_name == name]
+
+    def export_trace(self, path):
+        """
+        Writes the recorded spans to path in Chrome trace event format.
+        """
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self._spans)
+        events = [
+            {
+                "name": name,
+                "ph": "X",
+                "ts": round((started - self._epoch) * 1e6, 1),
+                "dur": round(duration * 1e6, 1),
+                "pid": pid,
+                "tid": thread,
+                "args": labels,
+            }
+            for name, labels, started, duration, thread in spans
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def export_prometheus(self, path):
+        """
+        Writes the counters and histograms to path in the Prometheus text exposition format.
+        """
+        with open(path, "w") as f:
+            f.write(self.prometheus_text())
+
+    def prometheus_text(self):
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            histograms = [(key, list(h.counts), h.sum, h.count) for key, h in histograms]
+
+        lines = []
+        typed = set()
+        for (name, labels), value in counters:
+            metric = f"{NAMESPACE}_{name}"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_format_labels(labels)} {value}")
+        for (name, labels), counts, total, count in histograms:
+            metric = f"{NAMESPACE}_{name}"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{metric}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _finish(self, span, duration):
+        self.observe(f"{span.name}_seconds", duration, **span.labels)
+        if "error" in span.labels:
+            self.count(f"{span.name}_errors_total", **span.labels)
+        with self._lock:
+            self._spans.append((span.name, span.labels, span.started, duration, threading.get_ident()))
+
+
+def _metric_labels(labels):
+    return tuple((key, str(labels[key])) for key in METRIC_LABELS if key in labels)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    """
+    Returns the process-wide Metrics. It starts disabled; call enable() to record.
+    """
+    return _metrics